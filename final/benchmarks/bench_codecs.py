@@ -0,0 +1,39 @@
+"""Compare file size, encode and decode time of the task file codecs.
+
+Run from the project root:
+
+    python benchmarks/bench_codecs.py [N]
+"""
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from final import codec
+
+
+def make_tasks(n):
+    return [
+        {"id": i, "title": f"Homework {i}", "description": "Read chapter and answer questions " * 3,
+         "due_date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "summary": None if i % 2 else "short"}
+        for i in range(1, n + 1)
+    ]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tasks = make_tasks(n)
+    print(f"{n} tasks")
+    print(f"{'codec':<8} {'bytes':>10} {'save ms':>9} {'load ms':>9}")
+    for name in codec.CODECS:
+        start = time.perf_counter()
+        raw = codec.encode(tasks, name)
+        saved = time.perf_counter()
+        assert codec.decode(raw) == tasks
+        loaded = time.perf_counter()
+        print(f"{name:<8} {len(raw):>10} {(saved - start) * 1000:9.1f} {(loaded - saved) * 1000:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Stress test: N processes adding tasks to one store at the same time.
+
+Checks that no task is lost and reports throughput per storage mode.
+Run from the project root:
+
+    python benchmarks/bench_concurrent_adders.py [PROCESSES] [ADDS_PER_PROCESS]
+"""
+from pathlib import Path
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import final
+
+
+def adder(path, mode, n):
+    final.find_tasks_file = lambda: path
+    final.STORAGE_MODE = mode
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(n):
+            final.main(["add", f"HW{os.getpid()}-{i}", "--due", "2025-11-30"])
+
+
+def run(mode, procs, n):
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "tasks.json"
+        final.find_tasks_file = lambda: path
+        final.STORAGE_MODE = mode
+        final.save_tasks([])
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=adder, args=(path, mode, n)) for _ in range(procs)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - start
+        got = len(final.load_tasks())
+        final.STORAGE_MODE = None
+        return elapsed, got
+
+
+def main():
+    procs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    os.environ["FINAL_NO_DAEMON"] = "1"
+    print(f"{procs} processes x {n} adds")
+    failed = False
+    for mode in final.STORAGE_MODES:
+        elapsed, got = run(mode, procs, n)
+        lost = procs * n - got
+        failed |= lost != 0
+        print(f"  {mode:8s} {elapsed:7.3f}s  {procs * n / elapsed:8.0f} adds/s  lost={lost}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
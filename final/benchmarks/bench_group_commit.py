@@ -0,0 +1,50 @@
+"""Compare per-command commits with one group commit for a burst of adds.
+
+Run from the project root:
+
+    python benchmarks/bench_group_commit.py [N]
+"""
+from pathlib import Path
+import contextlib
+import io
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import final
+from final import durable
+
+
+def run(n, mode, grouped):
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "tasks.json"
+        final.find_tasks_file = lambda: path
+        final.STORAGE_MODE = mode
+        final.save_tasks([])
+        before = dict(durable.STATS)
+        start = time.perf_counter()
+        ctx = final.batch() if grouped else contextlib.nullcontext()
+        with contextlib.redirect_stdout(io.StringIO()), ctx:
+            for i in range(n):
+                final.main(["add", f"HW{i}", "--due", "2025-11-30"])
+        elapsed = time.perf_counter() - start
+        assert len(final.load_tasks()) == n
+        final.STORAGE_MODE = None
+        return elapsed, durable.STATS["fsyncs"] - before["fsyncs"]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{n} adds")
+    print(f"{'mode':<6} {'commit':<8} {'seconds':>8} {'fsyncs':>7} {'fsyncs/s':>9} {'adds/s':>9}")
+    for mode in ("json", "log"):
+        for grouped in (False, True):
+            elapsed, fsyncs = run(n, mode, grouped)
+            print(f"{mode:<6} {'group' if grouped else 'each':<8} {elapsed:8.3f} {fsyncs:7d} "
+                  f"{fsyncs / elapsed:9.1f} {n / elapsed:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Time `search` end to end with and without the server's word index.
+
+Writes N synthetic tasks to a temporary store and runs
+``main(["search", ...])`` one-shot on each storage mode (JSON and log scan;
+binary and sharded read their on-disk postings, built by the first search
+and again after ``add``), and as inside ``final serve`` with the word index
+and with ``FINAL_NO_INDEX=1``. The server rows include building the index
+on the first search and keeping it current on ``add``. The result cache is
+cleared before every run so each search does the work. Run from the project
+root:
+
+    python benchmarks/bench_index_search.py [N]
+"""
+from pathlib import Path
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import final
+from final import resultcache
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "qu", "ph", "st"]
+QUERIES = [("lomine", "all"), ("quphst", "title"), ("rusa ze", "description"), ("2026-03", "date")]
+REPEAT = 5
+
+
+def word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_tasks(n):
+    rng = random.Random(1)
+    return [{"id": i, "title": " ".join(word(rng) for _ in range(3)),
+             "description": " ".join(word(rng) for _ in range(8)),
+             "due_date": f"{rng.choice([2025, 2026])}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"}
+            for i in range(1, n + 1)]
+
+
+def run(path, argv):
+    """Milliseconds for one ``main(argv)``, from a cold result cache."""
+    try:
+        os.unlink(resultcache.cache_path(path))
+    except FileNotFoundError:
+        pass
+    if final._resident is not None:
+        final._resident.pop(("results", path), None)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        final.main(argv)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(path, label):
+    first = run(path, ["search", "-q", QUERIES[0][0], "-f", QUERIES[0][1]])
+    row = [min(run(path, ["search", "-q", q, "-f", f]) for _ in range(REPEAT)) for q, f in QUERIES]
+    add = min(run(path, ["add", "Bench", "kalo", "--due", "2026-01-01"]) for _ in range(REPEAT))
+    after = run(path, ["search", "-q", "kalo", "-f", "all"])
+    cells = "".join(f"{t:10.1f}" for t in row)
+    print(f"{label:16s}{first:10.1f}{cells}{add:10.1f}{after:10.1f}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    os.environ.pop("FINAL_NO_INDEX", None)
+    tasks = make_tasks(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{n} tasks, milliseconds (best of {REPEAT})")
+        heads = "".join(f"{repr(q)[:9]:>10s}" for q, _ in QUERIES)
+        print(f"{'':16s}{'first':>10s}{heads}{'add':>10s}{'after add':>10s}")
+        final._resident = None
+        for mode in final.STORAGE_MODES:
+            path = Path(tmp) / mode / "tasks.json"
+            path.parent.mkdir()
+            final.find_tasks_file = lambda: path
+            os.environ["FINAL_STORAGE"] = mode
+            final.save_tasks(tasks)
+            measure(path, f"one-shot {mode}")
+        path = Path(tmp) / "serve" / "tasks.json"
+        path.parent.mkdir()
+        final.find_tasks_file = lambda: path
+        os.environ["FINAL_STORAGE"] = "json"
+        final.save_tasks(tasks)
+        final._resident = {}
+        measure(path, "serve")
+        final._resident = {}
+        os.environ["FINAL_NO_INDEX"] = "1"
+        measure(path, "serve, scan")
+
+
+if __name__ == "__main__":
+    main()
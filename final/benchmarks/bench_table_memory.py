@@ -0,0 +1,57 @@
+"""Resident memory of load_tasks() as dicts vs as a TaskTable.
+
+Writes a synthetic task file and measures each representation with
+tracemalloc. Run from the project root:
+
+    python benchmarks/bench_table_memory.py [N]     # default 1,000,000
+"""
+from pathlib import Path
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import final
+
+
+def synthetic(n):
+    descriptions = ["Read the chapter", "Problem set", "Lab report", "Essay draft", ""]
+    return [
+        {"id": i, "title": f"Homework {i}", "description": descriptions[i % len(descriptions)],
+         "due_date": f"20{25 + i % 3}-{i % 12 + 1:02d}-{i % 28 + 1:02d}"}
+        for i in range(1, n + 1)
+    ]
+
+
+def measure(as_table):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks = final.load_tasks(as_table=as_table)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(tasks) > 0
+    del tasks
+    return current, peak, elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "tasks.json"
+        final.find_tasks_file = lambda: path
+        final.CODEC = "compact"
+        final.save_tasks(synthetic(n))
+        print(f"{n} tasks, {path.stat().st_size / 2**20:.1f} MiB on disk")
+        for label, as_table in (("dicts", False), ("TaskTable", True)):
+            current, peak, elapsed = measure(as_table)
+            print(f"{label:<10} resident {current / 2**20:8.1f} MiB  "
+                  f"({current / n:6.1f} B/task)  peak {peak / 2**20:8.1f} MiB  load {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
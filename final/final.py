@@ -8,7 +8,9 @@ import importlib.util
 import sys
 
 pkg_path = Path(__file__).parent / "src" / "final" / "__init__.py"
-spec = importlib.util.spec_from_file_location("final", str(pkg_path))
+spec = importlib.util.spec_from_file_location(
+    "final", str(pkg_path), submodule_search_locations=[str(pkg_path.parent)]
+)
 module = importlib.util.module_from_spec(spec)
 sys.modules["final"] = module
 spec.loader.exec_module(module)
@@ -2,13 +2,52 @@ def inc(n: int) -> int:
     return n + 1
 
 from pathlib import Path
-import argparse
-import json
+import importlib.util
 import sys
 import os
+import io
 import re
+import shlex
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import closing, contextmanager, redirect_stderr, redirect_stdout
+from itertools import count, groupby, islice
 from datetime import date
 
+from . import daemon
+
+
+def _lazy(name):
+    """Submodule ``name``, imported on first attribute access.
+
+    A command forwarded to `final serve` never touches the storage, index or
+    cache modules, so the thin client does not pay for importing them.
+    """
+    full = f"{__name__}.{name}"
+    if full in sys.modules:
+        return sys.modules[full]
+    spec = importlib.util.find_spec(full)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[full] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+agenda, bintable, codec, durable, extsort, fuzzy, idseq, importer, lockfile, oplog, parsecache, postings, query, \
+    ranking, render, resultcache, shards, stream, summarycache, table, textindex = map(_lazy, (
+        "agenda", "bintable", "codec", "durable", "extsort", "fuzzy", "idseq", "importer", "lockfile", "oplog",
+        "parsecache", "postings", "query", "ranking", "render", "resultcache", "shards", "stream", "summarycache",
+        "table", "textindex"))
+
+
+def __getattr__(name):
+    # `from final import TaskTable` keeps working without importing it eagerly.
+    if name == "TaskTable":
+        return table.TaskTable
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 TASKS_LOCATIONS = [
     Path(__file__).parent / "tasks.json",
     Path(__file__).parent.parent / "tasks.json",
@@ -16,6 +55,27 @@ TASKS_LOCATIONS = [
     Path.cwd() / "data" / "tasks.json",
 ]
 
+STORAGE_MODES = ["json", "log", "binary", "sharded"]
+# Set by `--storage`; falls back to $FINAL_STORAGE, then plain JSON.
+STORAGE_MODE = None
+# Set by `--codec`; falls back to $FINAL_CODEC, then whatever the file has.
+CODEC = None
+# The active durable.GroupCommit while inside `batch()`.
+_batch = None
+# Inside `final serve`: parsed snapshots kept between requests, keyed by path.
+_resident = None
+# Commands that need the caller's terminal, files or API key; never forwarded.
+_LOCAL_COMMANDS = {"serve", "batch", "import", "ai-process"}
+# Optimistic attempts before update_tasks() falls back to holding the lock.
+UPDATE_RETRIES = 5
+
+
+def storage_mode():
+    mode = STORAGE_MODE or os.environ.get("FINAL_STORAGE") or "json"
+    if mode not in STORAGE_MODES:
+        raise SystemExit(f"Unknown storage mode: {mode}")
+    return mode
+
 
 def find_tasks_file():
     data_path = Path(__file__).resolve().parents[2] / "data" / "tasks.json"
@@ -29,27 +89,726 @@ def find_tasks_file():
     return data_path
 
 
-def load_tasks():
+def load_tasks(as_table=False):
+    """Load every task.
+
+    With `as_table=True` plain JSON data comes back as a column-oriented
+    TaskTable (read-only rows, much smaller in memory) instead of dicts.
+    """
+    tasks = _load_tasks()
+    if as_table and isinstance(tasks, list):
+        return table.TaskTable.from_tasks(tasks, consume=True)
+    return tasks
+
+
+def _load_tasks():
     p = find_tasks_file()
+    staged = _batch.pending(p) if _batch is not None else None
+    if staged is not None:
+        return list(staged)
+    if storage_mode() == "binary":
+        bp = bintable.table_path(p)
+        if bp.exists():
+            return bintable.open_table(bp)
+        # First use of binary mode: start from the JSON file.
+    if storage_mode() == "sharded":
+        sd = shards.shard_dir(p)
+        if shards.exists(sd):
+            return shards.load_all(sd)
+    return _read_snapshot(p)["tasks"]
+
+
+def iter_tasks():
+    """Yield tasks one at a time, in load_tasks() order.
+
+    JSON snapshots are decoded incrementally (and any operation log applied
+    on the fly), shards are read one at a time and binary tables row by row,
+    so memory stays flat however large the store is.
+    """
+    p = find_tasks_file()
+    staged = _batch.pending(p) if _batch is not None else None
+    if staged is not None:
+        yield from list(staged)
+        return
+    if storage_mode() == "binary" and bintable.table_path(p).exists():
+        yield from load_tasks()
+        return
+    if storage_mode() == "sharded" and shards.exists(shards.shard_dir(p)):
+        for _, chunk in shards.iter_shards(shards.shard_dir(p)):
+            yield from chunk
+        return
+    if not p.exists() or codec.detect_file(p) == "binary":
+        yield from load_tasks()
+        return
+    with open(p, encoding="utf-8") as f:
+        snapshot = stream.iter_array(f)
+        try:
+            if oplog.has_log(p):
+                yield from oplog.stream_replay(snapshot, oplog.read_records(p))
+            else:
+                yield from snapshot
+        except ValueError as e:
+            raise SystemExit(f"Invalid JSON in {p}: {e}")
+
+
+def _read_snapshot(p, with_agenda=False, with_due=False):
+    """Decode tasks.json plus its log, via the parse cache when it is fresh.
+
+    Returns a dict with "tasks" and, if asked for, the "agenda" cmd_list
+    prints and the "due" column (see `_due_column`). Both are kept in the
+    cache with the tasks, so they are built once per version of the file.
+    """
+    wanted = [name for name, on in (("agenda", with_agenda), ("due", with_due)) if on]
     if not p.exists():
         p.parent.mkdir(parents=True, exist_ok=True)
         p.write_text("[]", encoding="utf-8")
-    text = p.read_text(encoding="utf-8").strip()
-    if not text:
-        return []
+    if _resident is not None:
+        # Stat before reading: a write that lands in between only makes the
+        # next request parse again.
+        rkey = _resident_key(p)
+        hit = _resident.get(p)
+        if hit is not None and hit[0] == rkey:
+            entry = hit[1]
+            for name in wanted:
+                if name not in entry:
+                    entry[name] = _DERIVED[name](entry["tasks"])
+            return dict(entry, tasks=list(entry["tasks"]))
+    raw = p.read_bytes()
+    lp = oplog.log_path(p)
+    log_raw = lp.read_bytes() if lp.exists() else None
+    key = parsecache.stamp(p, raw, lp, log_raw) if parsecache.enabled() else None
+    entry = parsecache.load(p, key) if key else None
+    if entry is None:
+        try:
+            tasks = codec.decode(raw, empty=[])
+        except ValueError as e:
+            raise SystemExit(f"Invalid JSON in {p}: {e}")
+        # Always honour a pending log, even in json mode, so switching modes
+        # never loses appended records.
+        if log_raw is not None:
+            tasks = oplog.replay(tasks, oplog.read_records(p, log_raw))
+        entry = {"tasks": tasks}
+    elif all(name in entry for name in wanted):
+        return _remember(p, rkey, entry) if _resident is not None else entry
+    for name in wanted:
+        if name not in entry:
+            entry[name] = _DERIVED[name](entry["tasks"])
+    if key:
+        parsecache.store(p, key, entry)
+    return _remember(p, rkey, entry) if _resident is not None else entry
+
+
+def _resident_key(p):
+    # Every writer replaces tasks.json by rename or appends to the log, so
+    # inode, mtime and size of both change on any write.
+    st = os.stat(p)
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    try:
+        lst = os.stat(oplog.log_path(p))
+    except FileNotFoundError:
+        return key
+    return key + (lst.st_ino, lst.st_mtime_ns, lst.st_size)
+
+
+def _remember(p, rkey, entry):
+    _resident[p] = (rkey, entry)
+    # Callers may append to the list they get back; the kept one stays intact.
+    return dict(entry, tasks=list(entry["tasks"]))
+
+
+def save_tasks(tasks, expect=None):
+    """Replace the whole store with `tasks`.
+
+    `expect` is the lockfile.version() read before `tasks` was loaded; if
+    another process has written since, lockfile.Conflict is raised instead.
+    """
+    p = find_tasks_file()
+    if _batch is not None and storage_mode() != "sharded":
+        # Group commit: only the last state staged in the batch is written.
+        # The batch holds the lock, so nobody else can have written.
+        return _batch.stage(p, list(tasks), lambda state: _write_tasks(p, state))
+    return _write_tasks(p, tasks, expect)
+
+
+def update_tasks(change):
+    """Read-modify-write the whole store without losing concurrent writes.
+
+    `change(tasks)` returns the new task list, or None to write nothing. It
+    runs unlocked on a fresh read and is rerun if another process wrote in
+    the meantime; after UPDATE_RETRIES conflicts it runs under the lock.
+    """
+    p = find_tasks_file()
+    for attempt in range(UPDATE_RETRIES):
+        seen = lockfile.version(p)
+        new = change(load_tasks())
+        if new is None:
+            return None
+        try:
+            return save_tasks(new, expect=seen)
+        except lockfile.Conflict:
+            import random
+            time.sleep(random.uniform(0, 0.002 * 2 ** attempt))
+    with lockfile.locked(p):
+        new = change(load_tasks())
+        return None if new is None else save_tasks(new)
+
+
+def _write_tasks(p, tasks, expect=None):
+    with lockfile.locked(p) as fd:
+        lockfile.check(fd, expect)
+        result = _replace_tasks(p, tasks)
+        lockfile.bump(fd)
+        if storage_mode() != "sharded":
+            _sync_index(p, tasks)
+            _sync_agenda(p, tasks)
+        return result
+
+
+def _index_source(p):
+    """Identity of the snapshot files (not the log) a word index reflects."""
+    sig = []
+    for f in (p, bintable.table_path(p)):
+        try:
+            st = os.stat(f)
+        except FileNotFoundError:
+            sig.append(None)
+            continue
+        sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def _load_index(p):
+    return _resident.get(("index", p)) if _resident is not None else None
+
+
+def _keep_index(p, idx):
+    if idx is None:
+        _resident.pop(("index", p), None)
+    else:
+        _resident[("index", p)] = idx
+
+
+def _sync_index(p, tasks):
+    """Carry the server's word index over a full rewrite of the store."""
+    idx = _load_index(p)
+    if idx is None:
+        return  # not in the server, or never searched; built on first use
+    if not idx.sync(tasks) or idx.worn():
+        return _keep_index(p, None)
+    idx.source = _index_source(p)
+    idx.log_inode, idx.log_offset = None, 0
+    _keep_index(p, idx)
+
+
+def _load_agenda(p):
+    if _resident is not None and ("agenda", p) in _resident:
+        return _resident[("agenda", p)]
+    return agenda.load(p)
+
+
+def _keep_agenda(p, view):
+    if _resident is not None:
+        _resident[("agenda", p)] = view
+    if view is None:
+        agenda.invalidate(p)
+    else:
+        agenda.store(p, view)
+
+
+def _sync_agenda(p, tasks):
+    """Carry an existing agenda view over a full rewrite of the store."""
+    view = _load_agenda(p)
+    if view is None:
+        return  # never listed; built on first use
+    if not view.sync(tasks):
+        return _keep_agenda(p, None)
+    view.source = _index_source(p)
+    view.log_inode, view.log_offset = None, 0
+    _keep_agenda(p, view)
+
+
+def _log_at(p, inode, offset):
+    """Whether the operation log is exactly `offset` bytes of file `inode`."""
+    try:
+        st = os.stat(oplog.log_path(p))
+    except FileNotFoundError:
+        return offset == 0
+    return st.st_size == offset and (offset == 0 or st.st_ino == inode)
+
+
+def _agenda_view(p):
+    """List groups of printed lines from the agenda view, caught up with the
+    store; None when the view cannot be used.
+
+    When the stored view is current its buckets are read one at a time as
+    they are printed; otherwise it is loaded, caught up (or rebuilt) and
+    stored again.
+    """
+    if _batch is not None and _batch.pending(p) is not None:
+        return None
+    source = _index_source(p)
+    if _resident is None:
+        opened = agenda.read_header(p)
+        if opened is not None:
+            header, f = opened
+            if header["source"] == source and _log_at(p, header["log_inode"], header["log_offset"]):
+                return agenda.iter_groups(header, f)
+            f.close()
+    view = _load_agenda(p)
+    changed = False
+    if view is not None and view.source == source:
+        fresh, changed = _catch_up_log(p, view)
+        if not fresh:
+            view = None
+    else:
+        view = None
+    if view is None:
+        view = agenda.Agenda.build(load_tasks())
+        if view is None:
+            return None
+        view.source = source
+        _catch_up_log(p, view)
+        changed = True
+    if changed:
+        _keep_agenda(p, view)
+    return view.groups()
+
+
+def _search_index(p, source, tasks):
+    """The word index, caught up with the store, or None.
+
+    `tasks` is the store as loaded after `source` was taken; an index that
+    is out of date is diffed against it, and one is built from it when
+    missing.
+    """
+    idx = _load_index(p)
+    changed = False
+    if idx is not None and idx.source == source:
+        fresh, changed = _catch_up_log(p, idx)
+        if not fresh or idx.worn():
+            idx = None
+    elif idx is not None:
+        # Another process rewrote the store; `tasks` already holds its log.
+        if idx.sync(tasks) and not idx.worn():
+            idx.source = source
+            idx.log_inode, idx.log_offset = None, 0
+            _catch_up_log(p, idx)
+            changed = True
+        else:
+            idx = None
+    if idx is None:
+        idx = textindex.TextIndex.build(tasks)
+        if idx is None:
+            return None
+        idx.source = source
+        _catch_up_log(p, idx)
+        changed = True
+    if changed:
+        _keep_index(p, idx)
+    return idx
+
+
+def _catch_up_log(p, idx):
+    """Apply log records the index has not seen; returns (usable, changed)."""
+    lp = oplog.log_path(p)
+    try:
+        st = os.stat(lp)
+    except FileNotFoundError:
+        return idx.log_offset == 0, False
+    if idx.log_offset and (st.st_ino != idx.log_inode or st.st_size < idx.log_offset):
+        return False, False  # the log was replaced since
+    if st.st_size == idx.log_offset:
+        return True, False
+    with open(lp, "rb") as f:
+        f.seek(idx.log_offset)
+        raw = f.read()
+    end = raw.rfind(b"\n") + 1  # leave a torn last line for later
+    if not idx.apply(oplog.read_records(p, raw[:end])):
+        return False, False
+    idx.log_inode = st.st_ino
+    idx.log_offset += end
+    return True, True
+
+
+def _usable_index(p, source, tasks):
+    """The index for a JSON, log or binary store inside `final serve`, unless
+    indexing is off or a batch has staged changes the index has not seen.
+    One-shot runs scan or use the on-disk postings; see :mod:`final.textindex`."""
+    if _resident is None or not textindex.enabled() or storage_mode() == "sharded":
+        return None
+    if _batch is not None and _batch.pending(p) is not None:
+        return None
+    return _search_index(p, source, tasks)
+
+
+def _index_candidates(p, source, tasks, query, field, exact):
+    """Ids that may match, from the word index; None means scan everything."""
+    if not textindex.indexed(field):
+        return None
+    idx = _usable_index(p, source, tasks)
+    return idx.candidates(query, field, exact) if idx is not None else None
+
+
+def _postings_for(path, st, tasks):
+    """The on-disk postings of data file `path`, whose rows `tasks` were read
+    with `os.fstat` result `st`; rebuilt from `tasks` when stale."""
+    pp = postings.postings_path(path)
+    version = postings.stamp(st)
+    found = postings.load(pp, version)
+    if found is None:
+        postings.store(pp, version, tasks)
+        found = postings.load(pp, version)
+    return found
+
+
+def _postings_usable():
+    """Whether a one-shot run may read the on-disk postings: `final serve`
+    keeps the word index instead, and staged batch changes are not in them."""
+    if _resident is not None or not textindex.enabled() or storage_mode() not in ("binary", "sharded"):
+        return False
+    return _batch is None or _batch.pending(find_tasks_file()) is None
+
+
+def _rows_with_ids(tasks, ids):
+    if isinstance(tasks, bintable.MappedTaskTable):
+        return (tasks[i] for i in tasks.rows_with_ids(ids))
+    return (t for t in tasks if t.get("id") in ids)
+
+
+def _postings_rows(query, field, exact):
+    """Tasks that may match `search -q query -f field`, narrowed by the
+    on-disk postings of a binary or sharded store; None means scan."""
+    if textindex.FIELDS.get(field) not in postings.TEXTS or not _postings_usable():
+        return None
+    if storage_mode() == "sharded":
+        sd = _shard_dir()
+        return _shard_postings_rows(sd, _shard_keys(sd), query, field, exact)
+    tasks = load_tasks()
+    if not isinstance(tasks, bintable.MappedTaskTable):
+        return None
+    found = _postings_for(tasks.path, tasks.stat, tasks)
+    rows = found.candidates(query, field, exact) if found is not None else None
+    return None if rows is None else (tasks[i] for i in sorted(rows))
+
+
+def _shard_keys(sd):
+    return shards.keys_in_order(shards.read_manifest(sd))
+
+
+def _shard_postings_rows(sd, keys, query, field, exact):
+    # A shard none of whose rows can match is never read.
+    for key in keys:
+        path = sd / f"{key}.json"
+        try:
+            version = postings.stamp(os.stat(path))
+        except FileNotFoundError:
+            continue
+        found = postings.load(postings.postings_path(path), version)
+        rows = found.candidates(query, field, exact) if found is not None else None
+        if rows is not None and not rows:
+            continue
+        tasks, st = shards.read_shard_stat(sd, key)
+        if st is None:
+            continue
+        if rows is None or postings.stamp(st) != version:
+            # Missing, stale or unable to narrow: check every row.
+            found = _postings_for(path, st, tasks)
+            rows = found.candidates(query, field, exact) if found is not None else None
+        yield from (tasks[i] for i in sorted(rows)) if rows is not None else tasks
+
+
+def _shard_postings_estimate(sd, query, field, exact):
+    """Rows the shard postings would hand over, building missing or stale
+    ones; None when the query has no words to look up."""
+    total = 0
+    for key in _shard_keys(sd):
+        path = sd / f"{key}.json"
+        try:
+            found = postings.load(postings.postings_path(path), postings.stamp(os.stat(path)))
+        except FileNotFoundError:
+            continue
+        if found is None:
+            tasks, st = shards.read_shard_stat(sd, key)
+            if st is None:
+                continue
+            found = _postings_for(path, st, tasks)
+            if found is None:
+                return None
+        est = found.estimate(query, field, exact)
+        if est is None:
+            return None
+        total += est
+    return total
+
+
+def _replace_tasks(p, tasks):
+    # Ids written by other means (imports, hand edits) must never be reissued.
+    idseq.observe(p, lambda: max((t.get("id", 0) for t in tasks if isinstance(t.get("id"), int)), default=0))
+    if storage_mode() == "binary":
+        return bintable.write_table(bintable.table_path(p), tasks)
+    if storage_mode() == "sharded":
+        return shards.write_all(shards.shard_dir(p), tasks)
+    name = CODEC or codec.requested() or codec.detect_file(p)
+    parsecache.invalidate(p)
+    durable.atomic_write(p, codec.encode(tasks, name))
+    # The snapshot now holds everything the log did.
+    oplog.drop(p)
+    if _resident is not None:
+        _resident[p] = (_resident_key(p), {"tasks": list(tasks)})
+    return p
+
+
+@contextmanager
+def batch(window=None):
+    """Group every write made inside the block into one commit.
+
+    Reads inside the block see the staged state. Writes are flushed (one
+    rewrite and one fsync per file) when the block exits, or earlier once
+    they have been pending for `window` seconds ($FINAL_COMMIT_WINDOW).
+    If the block raises, staged rewrites are discarded. Sharded mode already
+    rewrites a single shard per change and is not batched. Nested calls join
+    the outer batch. The store's write lock is held for the whole block, so
+    other processes' writes wait until it exits.
+    """
+    global _batch
+    if _batch is not None:
+        yield _batch
+        return
+    _batch = durable.GroupCommit(window if window is not None else durable.commit_window())
     try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        raise SystemExit(f"Invalid JSON in {p}: {e}")
+        p = find_tasks_file()
+        with lockfile.locked(p):
+            yield _batch
+            current = _batch
+            _batch = None
+            current.flush()
+            if storage_mode() == "log":
+                lp = oplog.log_path(p)
+                if lp.exists() and lp.stat().st_size >= oplog.compact_threshold():
+                    compact_tasks()
+    finally:
+        _batch = None
 
 
-def save_tasks(tasks):
+def compact_tasks():
+    """Fold the operation log into a fresh snapshot."""
+    return update_tasks(lambda tasks: tasks)
+
+
+def _log_record(record):
+    return _log_records([record])
+
+
+def _log_records(records):
     p = find_tasks_file()
-    p.write_text(json.dumps(tasks, indent=2, ensure_ascii=False), encoding="utf-8")
+    with lockfile.locked(p) as fd:
+        if _batch is not None:
+            # Appended now, fsynced once when the batch flushes; compaction
+            # waits for the end of the batch.
+            oplog.append_many(p, records, sync=False)
+            _batch.sync(oplog.log_path(p))
+            lockfile.bump(fd)
+            return p
+        size = oplog.append_many(p, records)
+        lockfile.bump(fd)
+    if size >= oplog.compact_threshold():
+        compact_tasks()
     return p
 
 
+def _use_log():
+    # A snapshot staged in the current batch supersedes the log, so further
+    # changes go onto that snapshot instead.
+    if storage_mode() != "log":
+        return False
+    return _batch is None or _batch.pending(find_tasks_file()) is None
+
+
+def _shard_dir():
+    """The sharded layout, converted from tasks.json on first use."""
+    p = find_tasks_file()
+    sd = shards.shard_dir(p)
+    if not shards.exists(sd):
+        with lockfile.locked(p) as fd:
+            if not shards.exists(sd):
+                shards.write_all(sd, load_tasks())
+                lockfile.bump(fd)
+    return sd
+
+
+def max_task_id():
+    """Highest id in the store; a full scan, used only to seed the sequence."""
+    if storage_mode() == "sharded":
+        return shards.max_id(_shard_dir())
+    tasks = load_tasks() if storage_mode() == "binary" else iter_tasks()
+    if isinstance(tasks, bintable.MappedTaskTable):
+        return tasks.max_id()
+    return max((t.get("id", 0) for t in tasks), default=0)
+
+
+def next_task_id(count=1):
+    """Reserve `count` new ids from the persisted sequence; return the first."""
+    p = find_tasks_file()
+    if _batch is not None:
+        first = idseq.allocate(p, max_task_id, count, sync=False)
+        _batch.sync(idseq.seq_path(p))
+        return first
+    return idseq.allocate(p, max_task_id, count)
+
+
+def commit_add(task):
+    """Persist a newly added task.
+
+    Sharded and log modes write only the new task; the others rewrite the
+    whole store.
+    """
+    return commit_adds([task])
+
+
+def commit_adds(new_tasks):
+    """Persist several new tasks as one commit (one rewrite, one fsync)."""
+    if storage_mode() == "sharded":
+        sd = _shard_dir()
+        with lockfile.locked(find_tasks_file()) as fd:
+            result = shards.add_many(sd, new_tasks)
+            lockfile.bump(fd)
+        return result
+    if _use_log() and len(new_tasks) == 1:
+        return _log_record({"op": "add", "task": new_tasks[0]})
+
+    def append(tasks):
+        if isinstance(tasks, bintable.MappedTaskTable):
+            tasks = list(tasks)
+        tasks.extend(new_tasks)
+        return tasks
+    # Log mode too: a bulk add would outgrow the log at once, so it goes
+    # straight into a fresh snapshot.
+    return update_tasks(append)
+
+
+def remove_tasks(ids=None, where=None):
+    """Delete the tasks whose id is in `ids` and/or that satisfy `where`.
+
+    One scan and one write however many tasks match. Returns the removed ids.
+    """
+    if ids is not None:
+        ids = set(ids)
+    only_ids = where is None
+    where = _where(ids, where)
+    p = find_tasks_file()
+    if storage_mode() == "sharded":
+        sd = _shard_dir()
+        with lockfile.locked(p) as fd:
+            # A plain id list can skip shards by their id range.
+            removed = shards.remove(sd, ids) if only_ids else shards.remove_where(sd, where)
+            if removed:
+                lockfile.bump(fd)
+        return removed
+    if _use_log():
+        with lockfile.locked(p):
+            removed = [t.get("id") for t in load_tasks() if where(t)]
+            if removed:
+                _log_record({"op": "done", "ids": removed})
+        return removed
+    removed = []
+
+    def drop(tasks):
+        removed.clear()
+        keep = []
+        for t in tasks:
+            if where(t):
+                removed.append(t.get("id"))
+            else:
+                keep.append(t)
+        return keep if removed else None
+    update_tasks(drop)
+    return removed
+
+
+def edit_tasks(changes, ids=None, where=None):
+    """Set fields on the tasks whose id is in `ids` and/or that satisfy
+    `where`; one scan and one write.
+
+    `changes` maps field names to new values; None removes the field.
+    Returns the ids of the edited tasks.
+    """
+    where = _where(set(ids) if ids is not None else None, where)
+
+    def apply(task):
+        new = dict(task)
+        for k, v in changes.items():
+            if v is None:
+                new.pop(k, None)
+            else:
+                new[k] = v
+        return new
+
+    p = find_tasks_file()
+    if storage_mode() == "sharded":
+        sd = _shard_dir()
+        with lockfile.locked(p) as fd:
+            edited = shards.update_where(sd, where, apply)
+            if edited:
+                lockfile.bump(fd)
+        return edited
+    if _use_log():
+        # Replay treats an add of an existing id as a replacement. The lock
+        # keeps another process from removing a task between scan and append.
+        with lockfile.locked(p):
+            new = [apply(t) for t in load_tasks() if where(t)]
+            if new:
+                _log_records([{"op": "add", "task": t} for t in new])
+        return [t.get("id") for t in new]
+    edited = []
+
+    def change(tasks):
+        edited.clear()
+        out = []
+        for t in tasks:
+            if where(t):
+                t = apply(t)
+                edited.append(t.get("id"))
+            out.append(t)
+        return out if edited else None
+    update_tasks(change)
+    return edited
+
+
+def _where(ids, where):
+    if where is None:
+        return lambda t: t.get("id") in ids
+    if ids is None:
+        return where
+    return lambda t: t.get("id") in ids and where(t)
+
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_PROMPT = (
+    "You summarize tasks as very short phrases, 15 words or less. "
+    "Output only the bare summary with no extra commentary."
+)
+SUMMARY_REQUEST = "Summarize the following task description as a very short phrase:\n\n"
+
+
 def summarize_task(description: str) -> str:
+    """Short summary of `description`, from the summary cache when the same
+    text was summarized before with the same model and prompt."""
+    if not summarycache.enabled():
+        return _request_summary(description)
+    p = find_tasks_file()
+    key = summarycache.summary_key(description, SUMMARY_MODEL, SUMMARY_PROMPT, SUMMARY_REQUEST)
+    cache = summarycache.load(p)
+    try:
+        summary = cache.get(key)
+        if summary is None:
+            summary = _request_summary(description)
+            cache.put(key, summary)
+    finally:
+        summarycache.store(p, cache)  # the counters too, even if the request failed
+    return summary
+
+
+def _request_summary(description: str) -> str:
     # Lazy import so environments without the SDK can still import this module
     try:
         from openai import OpenAI
@@ -61,16 +820,10 @@ def summarize_task(description: str) -> str:
 
     client = OpenAI()
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=SUMMARY_MODEL,
         messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You summarize tasks as very short phrases, 15 words or less. "
-                    "Output only the bare summary with no extra commentary."
-                ),
-            },
-            {"role": "user", "content": "Summarize the following task description as a very short phrase:\n\n" + description},
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": SUMMARY_REQUEST + description},
         ],
         max_tokens=32,
         temperature=0.2,
@@ -112,9 +865,6 @@ def process_file_content_with_ai(content: str, filename: str | None = None) -> s
 
 
 def cmd_add(args):
-    tasks = load_tasks()
-    max_id = max((t.get("id", 0) for t in tasks), default=0)
-    task_id = max_id + 1
     title = getattr(args, "title", None)
     description = getattr(args, "description", "") or ""
     due = getattr(args, "due", None)
@@ -140,7 +890,7 @@ def cmd_add(args):
                 break
             except ValueError:
                 print("Invalid date format. Use YYYY-MM-DD.")
-    task = {"id": task_id, "title": title, "description": description, "due_date": due}
+    task = {"id": next_task_id(), "title": title, "description": description, "due_date": due}
     # Optionally summarize via AI
     if getattr(args, "summarize", False) and description:
         try:
@@ -149,14 +899,395 @@ def cmd_add(args):
             print(f"AI summary: {summary}")
         except Exception as e:
             print(f"AI summarization failed: {e}")
-    tasks.append(task)
-    save_tasks(tasks)
+    commit_add(task)
     print(f"Task added: {task}")
     return 0
 
 
+def _today():
+    return date.today()
+
+
+def _due_window(args):
+    """`(lo, hi)` day ordinals from --from/--to/--overdue/--due-within, either
+    end None when open; None when no window was asked for. Raises ValueError
+    with a message for the user."""
+    lo = hi = None
+    asked = False
+    for name, flag in (("from_date", "--from"), ("to_date", "--to")):
+        value = getattr(args, name, None)
+        if value is None:
+            continue
+        try:
+            o = date.fromisoformat(value).toordinal()
+        except ValueError:
+            raise ValueError(f"Invalid date format for {flag}. Use YYYY-MM-DD.") from None
+        asked = True
+        if name == "from_date":
+            lo = o if lo is None else max(lo, o)
+        else:
+            hi = o if hi is None else min(hi, o)
+    today = _today().toordinal()
+    if getattr(args, "overdue", False):
+        asked = True
+        hi = today - 1 if hi is None else min(hi, today - 1)
+    within = getattr(args, "due_within", None)
+    if within is not None:
+        asked = True
+        lo = today if lo is None else max(lo, today)
+        hi = today + within if hi is None else min(hi, today + within)
+    return (lo, hi) if asked else None
+
+
+def _due_ordinal(task):
+    try:
+        return date.fromisoformat(task.get("due_date")).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _due_in(task, lo, hi):
+    o = _due_ordinal(task)
+    return o is not None and (lo is None or o >= lo) and (hi is None or o <= hi)
+
+
+def _due_column(tasks):
+    """`(ordinals, positions)`: the day ordinal of every task with a valid due
+    date, ascending, and each one's position in `tasks`."""
+    pairs = sorted((o, i) for i, o in enumerate(map(_due_ordinal, tasks)) if o is not None)
+    return array("i", (o for o, _ in pairs)), array("I", (i for _, i in pairs))
+
+
+def tasks_due_between(lo, hi):
+    """Tasks due in `[lo, hi]` (day ordinals; None leaves that end open), in
+    store order.
+
+    Sharded stores only read the shards whose date range overlaps and binary
+    tables compare the ordinal column. JSON and log stores bisect the sorted
+    due-date column kept with the parsed tasks in the parse cache (and in
+    `final serve`), so dates are parsed once per version of the file, not
+    on every run, and only the matching tasks are visited.
+    """
+    p = find_tasks_file()
+    if storage_mode() == "sharded":
+        sd = _shard_dir()
+        keys = shards.keys_due_between(sd, lo, hi)
+        return [t for _, chunk in shards.iter_shards(sd, keys) for t in chunk if _due_in(t, lo, hi)]
+    if storage_mode() == "binary" or (_batch is not None and _batch.pending(p) is not None):
+        tasks = load_tasks()
+        if isinstance(tasks, bintable.MappedTaskTable):
+            return [tasks[i] for i in tasks.rows_due_between(lo, hi)]
+        return [t for t in tasks if _due_in(t, lo, hi)]
+    entry = _read_snapshot(p, with_due=True)
+    ords, positions = entry["due"]
+    i = 0 if lo is None else bisect_left(ords, lo)
+    j = len(ords) if hi is None else bisect_right(ords, hi)
+    tasks = entry["tasks"]
+    return [tasks[k] for k in sorted(positions[i:j])]
+
+
+def _bounds_text(field, lo, hi):
+    if field == "due_date":
+        lo, hi = (None if o is None else date.fromordinal(o).isoformat() for o in (lo, hi))
+    if lo == hi:
+        return f"{field}={lo}"
+    return " ".join(x for x in (lo is not None and f"{field}>={lo}", hi is not None and f"{field}<={hi}") if x)
+
+
+def _index_paths(idx, terms):
+    """Access paths the index offers for `terms`: (description, estimated
+    rows, function returning candidate ids)."""
+    paths = []
+    for field in ("id", "due_date"):
+        b = query.bounds(terms, field)
+        if b is None:
+            continue
+        lo, hi = b
+        desc = f"{'id lookup' if field == 'id' else 'due-date index'} {_bounds_text(field, lo, hi)}"
+        if field == "due_date":
+            paths.append((desc, idx.estimate_due(lo, hi), lambda lo=lo, hi=hi: idx.due_between(lo, hi)))
+        elif lo is not None and lo == hi:
+            paths.append((desc, int(lo in idx.fingerprints), lambda lo=lo: {lo} & idx.fingerprints.keys()))
+        else:
+            n = len(idx.fingerprints)
+            est = n if lo is None or hi is None else max(0, min(hi - lo + 1, n))
+            paths.append((desc, est, lambda lo=lo, hi=hi: {i for i in idx.fingerprints
+                                                           if (lo is None or i >= lo) and (hi is None or i <= hi)}))
+    for term in terms:
+        if term.negated or term.field == "id" or term.op not in (":", "="):
+            continue
+        exact = term.op == "="
+        est = idx.estimate(term.value, term.field, exact)
+        if est is None:
+            continue
+        kind = "due-text" if textindex.FIELDS[term.field] == "due_date" else "word"
+        paths.append((f"{kind} index for {term}", est,
+                      lambda term=term, exact=exact: idx.candidates(term.value, term.field, exact)))
+    return paths
+
+
+def _postings_paths(terms, estimate, fetch):
+    """Access paths the on-disk postings offer for `terms`; `estimate` and
+    `fetch` take (query, field, exact), the latter returning the rows."""
+    paths = []
+    for term in terms:
+        if term.negated or term.op not in (":", "=") or textindex.FIELDS.get(term.field) not in postings.TEXTS:
+            continue
+        exact = term.op == "="
+        est = estimate(term.value, term.field, exact)
+        if est is not None:
+            paths.append((f"word postings for {term}", est,
+                          lambda term=term, exact=exact: fetch(term.value, term.field, exact)))
+    return paths
+
+
+def _shard_paths(sd, terms):
+    """Like _index_paths, from the shard zone maps: the function returns the
+    shard keys to read."""
+    manifest = shards.read_manifest(sd)
+    count = lambda keys: sum(manifest["shards"][k]["count"] for k in keys)
+    paths = [("full scan", count(manifest["shards"]), lambda: None)]
+    for field, pick in (("id", shards.keys_with_ids), ("due_date", shards.keys_due_between)):
+        b = query.bounds(terms, field)
+        if b is not None:
+            keys = pick(sd, *b)
+            paths.append((f"{len(keys)} of {len(manifest['shards'])} shards for {_bounds_text(field, *b)}",
+                          count(keys), lambda keys=keys: keys))
+    for term in terms:
+        if not term.negated and term.field == "due_date" and term.op in (":", "="):
+            keys = shards.matching_due_keys(sd, term.value, term.op == "=")
+            paths.append((f"{len(keys)} of {len(manifest['shards'])} shards for {term}",
+                          count(keys), lambda keys=keys: keys))
+    return paths
+
+
+def run_query(terms):
+    """Tasks matching every term of a parsed `--where` query, and the plan.
+
+    The planner lists the access paths the store offers (the index's id,
+    due-date, word and due-text lookups, shard zone maps, or the on-disk word
+    postings of a binary or sharded store) with an estimate
+    of the rows each would hand over, takes the smallest, and runs the whole
+    predicate on those rows only. Index lookups are supersets, so the
+    predicate also rechecks the term they came from. The plan is a dict with
+    the chosen `path`, its `estimate`, the `paths` considered and the rows
+    actually `scanned`.
+    """
+    pred = query.compile(terms, matches)
+    if storage_mode() == "sharded":
+        sd = _shard_dir()
+        paths = [(d, e, lambda keys=keys: (t for _, chunk in shards.iter_shards(sd, keys()) for t in chunk))
+                 for d, e, keys in _shard_paths(sd, terms)]
+        if _postings_usable():
+            paths += _postings_paths(terms, lambda q, f, exact: _shard_postings_estimate(sd, q, f, exact),
+                                     lambda q, f, exact: _shard_postings_rows(sd, _shard_keys(sd), q, f, exact))
+    else:
+        p = find_tasks_file()
+        source = _index_source(p)
+        tasks = load_tasks()
+        idx = _usable_index(p, source, tasks)
+        paths = [("full scan", len(tasks), lambda: tasks)]
+        if idx is not None:
+            paths += [(d, e, lambda ids=ids: _rows_with_ids(tasks, ids())) for d, e, ids in _index_paths(idx, terms)]
+        elif isinstance(tasks, bintable.MappedTaskTable) and _postings_usable():
+            found = _postings_for(tasks.path, tasks.stat, tasks)
+            if found is not None:
+                paths += _postings_paths(terms, found.estimate, lambda q, f, exact: (
+                    tasks[i] for i in sorted(found.candidates(q, f, exact))))
+    desc, est, fetch = min(paths, key=lambda path: path[1])
+    rows = fetch()
+    scanned = 0
+    results = []
+    for t in rows:
+        scanned += 1
+        if pred(t):
+            results.append(t)
+    plan = {"path": desc, "estimate": est, "paths": [(d, e) for d, e, _ in paths], "scanned": scanned}
+    return results, plan
+
+
+def _print_plan(terms, plan, matched):
+    out = sys.stderr
+    print(f"Plan: {plan['path']} (estimated {plan['estimate']} rows)", file=out)
+    for desc, est in plan["paths"]:
+        if desc != plan["path"]:
+            print(f"  not chosen: {desc} (estimated {est} rows)", file=out)
+    print(f"  filter: {' '.join(str(t) for t in terms)}", file=out)
+    print(f"Scanned {plan['scanned']} rows (estimated {plan['estimate']}), {matched} matched", file=out)
+
+
+def _store_generation(p):
+    """Changes whenever the store does: the version every locked write
+    bumps, plus the data files' identity for writes that bypass the lock."""
+    sig = [storage_mode(), lockfile.version(p)]
+    for f in (p, oplog.log_path(p), bintable.table_path(p), shards.shard_dir(p) / shards.MANIFEST):
+        try:
+            st = os.stat(f)
+        except FileNotFoundError:
+            sig.append(None)
+            continue
+        sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def _load_results(p):
+    if _resident is not None and ("results", p) in _resident:
+        return _resident[("results", p)]
+    return resultcache.load(p)
+
+
+def _keep_results(p, cache):
+    if _resident is not None:
+        _resident[("results", p)] = cache
+    else:
+        resultcache.store(p, cache)
+
+
+def _with_result_cache(key, run):
+    """Run the command body `run` (which prints its output), or print what it
+    printed for the same `key` if the store has not changed since."""
+    if key is None or not resultcache.enabled() or _batch is not None:
+        return run()
+    p = find_tasks_file()
+    generation = _store_generation(p)
+    cache = _load_results(p)
+    text = cache.get(generation, key)
+    if text is not None:
+        sys.stdout.write(text)
+        _keep_results(p, cache)
+        return 0
+    tee = resultcache.Tee(sys.stdout)
+    with redirect_stdout(tee):
+        rc = run()
+    if rc == 0 and tee.complete:
+        cache.put(key, tee.getvalue())
+    _keep_results(p, cache)
+    return rc
+
+
+def _window_key(args):
+    try:
+        return _due_window(args)
+    except ValueError:
+        return False
+
+
 def cmd_list(args):
-    tasks = load_tasks()
+    window = _window_key(args)
+    key = None if window is False else ("list", window, args.format, args.limit, args.page)
+    return _with_result_cache(key, lambda: _list(args))
+
+
+def _list(args):
+    try:
+        window = _due_window(args)
+    except ValueError as e:
+        print(e)
+        return 1
+    if args.page is not None and args.limit is None:
+        print("--page needs --limit")
+        return 1
+    fmt = args.format or "table"
+    with render.Output(sys.stdout) as out:
+        if args.external:
+            memory = None if args.memory is None else extsort.megabytes(args.memory)
+            with closing(_external_groups(window, memory)) as groups:
+                render.agenda(out, _paged(groups, args.limit, args.page), fmt)
+            return 0
+        if window is None and fmt == "table" and storage_mode() != "sharded":
+            groups = _agenda_view(find_tasks_file())
+            if groups is not None:
+                render.agenda(out, _paged(groups, args.limit, args.page), fmt, line=str)
+                return 0
+        if window is None and storage_mode() == "binary":
+            tasks = load_tasks()
+            if isinstance(tasks, bintable.MappedTaskTable):
+                return _list_table(out, tasks, fmt, args.limit, args.page)
+        render.agenda(out, _paged(_agenda_groups(window), args.limit, args.page), fmt)
+    return 0
+
+
+def _paged(groups, limit, page=None):
+    """The `(heading, items)` groups cut down to the `page`-th run (from 1)
+    of `limit` items in list order (all of them when `limit` is None).
+    Groups are consumed only as far as needed."""
+    if limit is None:
+        if page is not None:
+            raise ValueError("--page needs --limit")
+        yield from groups
+        return
+    skip, left = ((page or 1) - 1) * limit, limit
+    for heading, items in groups:
+        if left <= 0:
+            return
+        items = list(items)
+        if skip >= len(items):
+            skip -= len(items)
+            continue
+        part = items[skip:skip + left]
+        skip = 0
+        left -= len(part)
+        yield heading, part
+
+
+def _agenda_groups(window):
+    """`(heading, tasks)` in list order; the None heading holds undated tasks."""
+    if window is not None:
+        groups, _ = build_agenda(tasks_due_between(*window))
+        yield from groups
+        return
+    if storage_mode() == "sharded":
+        # Shards come back in month order, so each one can be printed as
+        # soon as it is read.
+        no_date = []
+        for _, chunk in shards.iter_shards(_shard_dir()):
+            groups, undated = build_agenda(chunk)
+            yield from groups
+            no_date.extend(undated)
+        yield None, no_date
+        return
+    groups, no_date = load_agenda()
+    yield from groups
+    yield None, no_date
+
+
+def _external_groups(window, memory=None):
+    """`_agenda_groups` for stores too big to sort in memory: tasks are
+    streamed through an external merge sort (see :mod:`final.extsort`) and
+    come out in build_agenda's order."""
+    seq = count()
+
+    def order(t):
+        d = t.get("due_date")
+        return (*agenda.bucket_order(str(d) if d else None), t.get("id"), next(seq))
+
+    tasks = iter_tasks()
+    if window is not None:
+        tasks = (t for t in tasks if _due_in(t, *window))
+    with extsort.sorted_stream(tasks, order, memory) as ordered:
+        yield from groupby(ordered, key=lambda t: t.get("due_date") or None)
+
+
+def load_agenda():
+    """(groups, no_date) as cmd_list prints them.
+
+    For JSON snapshots this comes straight from the parse cache when the
+    file is unchanged since the last run.
+    """
+    p = find_tasks_file()
+    staged = _batch is not None and _batch.pending(p) is not None
+    if storage_mode() in ("json", "log") and parsecache.enabled() and not staged:
+        return _read_snapshot(p, with_agenda=True)["agenda"]
+    return build_agenda(load_tasks(as_table=True))
+
+
+def build_agenda(tasks):
+    """Group dated tasks by due date, in date order with each group sorted
+    by id; return `(groups, no_date)` where groups is `[(due_date, tasks)]`.
+
+    Buckets are ordered by `agenda.bucket_order` (dates that do not parse
+    last, by their text) and undated tasks by id, as in the stored view.
+    """
     groups = {}
     no_date = []
     for t in tasks:
@@ -165,25 +1296,31 @@ def cmd_list(args):
             no_date.append(t)
         else:
             groups.setdefault(d, []).append(t)
+    by_id = lambda x: x.get("id")
+    ordered = [(d, sorted(groups[d], key=by_id)) for d in sorted(groups, key=lambda k: agenda.bucket_order(str(k)))]
+    return ordered, sorted(no_date, key=by_id)
 
-    def parse_key(k):
-        try:
-            return date.fromisoformat(k)
-        except Exception:
-            return date.max
-
-    for d in sorted(groups.keys(), key=parse_key):
-        print(d)
-        for t in sorted(groups[d], key=lambda x: x.get("id")):
-            desc = t.get("summary") or t.get("description") or ""
-            print(f"- [{t.get('id')}] {t.get('title')} : {desc}")
-        print()
-
-    if no_date:
-        print("No due date:")
-        for t in no_date:
-            desc = t.get("summary") or t.get("description") or ""
-            print(f"- [{t.get('id')}] {t.get('title')} : {desc}")
+
+# Values derived from the parsed tasks that _read_snapshot keeps with them.
+_DERIVED = {"agenda": build_agenda, "due": _due_column}
+
+
+def _list_table(out, view, fmt, limit=None, page=None):
+    # Same output as cmd_list, read column-wise; only printed strings are decoded.
+    groups, no_date = view.agenda()
+    groups = list(_paged(groups + [(None, no_date)], limit, page))
+    if fmt != "table":
+        render.agenda(out, ((d, (view[i] for i in rows)) for d, rows in groups), fmt)
+        return 0
+    ids = view.ids()
+    flags = view.flags()
+
+    def line(i):
+        tid = ids[i] if flags[i] & bintable.HAS_ID else None
+        desc = view.field(i, "summary") or view.field(i, "description") or ""
+        return f"- [{tid}] {view.field(i, 'title')} : {desc}"
+
+    render.agenda(out, groups, fmt, line)
     return 0
 
 
@@ -200,35 +1337,509 @@ def matches(task, query, field, exact):
         return (task.get("title") == query) if exact else q in s(task.get("title"))
     if field == "description":
         return (task.get("description") == query) if exact else q in s(task.get("description"))
+    if field == "summary":
+        return (task.get("summary") == query) if exact else q in s(task.get("summary"))
     if field == "date" or field == "due_date":
         return (task.get("due_date") == query) if exact else q in s(task.get("due_date"))
     combined = f"{task.get('title','')} {task.get('description','')}".lower()
     return (combined == q) if exact else q in combined
 
 
-def cmd_search(args):
+FUZZY_FIELDS = ["all", "title", "description"]
+
+
+def fuzzy_search(text, field="all", k=10, distance=None, window=None):
+    """The `k` tasks whose `field` text has a word close to every word of
+    `text`, fewest typos first.
+
+    `distance` caps the edits per word (default: fuzzy.default_distance).
+    With the word index only tasks sharing close vocabulary words are
+    scored; otherwise every task is.
+    """
+    qwords = fuzzy.words(text)
+    limits = [fuzzy.default_distance(w) if distance is None else distance for w in qwords]
+    if field == "all":
+        text_of = lambda t: f"{t.get('title', '')} {t.get('description', '')}"
+    else:
+        text_of = lambda t: t.get(field) or ""
+    if window is not None:
+        return [t for _, t in fuzzy.rank(tasks_due_between(*window), text_of, qwords, limits, k)]
+    if storage_mode() == "sharded":
+        return [t for _, t in fuzzy.rank(load_tasks(), text_of, qwords, limits, k)]
+    p = find_tasks_file()
+    source = _index_source(p)
     tasks = load_tasks()
-    results = [t for t in tasks if matches(t, args.query, args.field, args.exact)]
-    if not results:
-        print("No tasks found.")
-        return 0
-    print(json.dumps(results, indent=2))
+    idx = _usable_index(p, source, tasks)
+    if idx is None:
+        return [t for _, t in fuzzy.rank(tasks, text_of, qwords, limits, k)]
+    bounds = idx.fuzzy_bounds(qwords, limits)
+    if isinstance(tasks, bintable.MappedTaskTable):
+        rows = (tasks[i] for i in tasks.rows_with_ids(bounds))
+    else:
+        rows = (t for t in tasks if t.get("id") in bounds)
+    by_id = {t.get("id"): t for t in rows}
+    best = fuzzy.top(bounds, lambda tid: fuzzy.score(text_of(by_id[tid]), qwords, limits), k)
+    return [by_id[tid] for _, tid in best]
+
+
+def ranked_search(text, field="all", exact=False, k=10, window=None):
+    """The `k` best tasks matching `search -q text -f field` by BM25 over
+    their title, description and summary.
+
+    The index supplies the match candidates and the term statistics; without
+    it the statistics are counted from the loaded tasks.
+    """
+    idx = None
+    if storage_mode() == "sharded":
+        tasks = load_tasks()
+    else:
+        p = find_tasks_file()
+        source = _index_source(p)
+        tasks = load_tasks()
+        idx = _usable_index(p, source, tasks)
+    if idx is None:
+        stats, rows = ranking.RankStats.build(tasks), tasks
+    else:
+        stats = idx.rank
+        ids = idx.candidates(text, field, exact) if textindex.indexed(field) else None
+        if window is not None:
+            due = idx.due_between(*window)
+            ids = due if ids is None else ids & due
+        if ids is None:
+            rows = tasks
+        elif isinstance(tasks, bintable.MappedTaskTable):
+            rows = (tasks[i] for i in tasks.rows_with_ids(ids))
+        else:
+            rows = (t for t in tasks if t.get("id") in ids)
+    hits = (t for t in rows if matches(t, text, field, exact) and (window is None or _due_in(t, *window)))
+    return stats.top(hits, text, k, exact)
+
+
+def _search_terms(args, window):
+    """The search arguments as query terms: `--where` plus `-q/-f/--exact`
+    and the due-date window."""
+    terms = query.parse(args.where) if args.where else []
+    if args.query is not None:
+        field = {"date": "due_date"}.get(args.field, args.field)
+        value = args.query
+        if field == "id":
+            try:
+                value = int(value)
+            except ValueError:
+                raise query.QueryError(f"Invalid id: {value}") from None
+        terms.append(query.Term(field, "=" if args.exact or field == "id" else ":", value))
+    if window is not None:
+        lo, hi = window
+        for op, o in ((">=", lo), ("<=", hi)):
+            if o is not None:
+                terms.append(query.Term("due_date", op, date.fromordinal(o)))
+    return terms
+
+
+def _search_key(args):
+    """Normalized search arguments, or None when they are invalid or the
+    output must not be cached."""
+    window = _window_key(args)
+    if window is False or args.explain:
+        return None
+    where = None
+    if args.where:
+        try:
+            terms = query.parse(args.where)
+        except query.QueryError:
+            return None
+        where = tuple((t.field, t.op, t.value.lower() if t.op == ":" else t.value, t.negated) for t in terms)
+    q = args.query
+    if q is not None and not args.exact:
+        q = q.lower()  # non-exact matching ignores case
+    field = {"date": "due_date"}.get(args.field, args.field)
+    return ("search", q, field, args.exact, where, window,
+            args.fuzzy, args.distance, args.rank, args.limit, args.format)
+
+
+def cmd_search(args):
+    return _with_result_cache(_search_key(args), lambda: _search(args))
+
+
+def _search(args):
+    candidates = None
+    try:
+        window = _due_window(args)
+    except ValueError as e:
+        print(e)
+        return 1
+    if args.query is None and window is None and not args.where:
+        print("Give a query (-q), a --where expression or a due-date window (--from/--to/--overdue/--due-within)")
+        return 1
+    top_k = 10 if args.limit is None else args.limit
+    if args.fuzzy:
+        if args.query is None or args.where:
+            print("--fuzzy needs a query (-q) and cannot be combined with --where")
+            return 1
+        if args.field not in FUZZY_FIELDS:
+            print(f"--fuzzy searches {', '.join(FUZZY_FIELDS)}, not {args.field}")
+            return 1
+        if not fuzzy.words(args.query):
+            print("No words to match in the query")
+            return 1
+        return _print_results(fuzzy_search(args.query, args.field, top_k, args.distance, window), args.format)
+    if args.rank:
+        if args.query is None or args.where:
+            print("--rank needs a query (-q) and cannot be combined with --where")
+            return 1
+        return _print_results(ranked_search(args.query, args.field, args.exact, top_k, window), args.format)
+    if args.where or args.explain:
+        try:
+            terms = _search_terms(args, window)
+        except query.QueryError as e:
+            print(e)
+            return 1
+        results, plan = run_query(terms)
+        if args.explain:
+            _print_plan(terms, plan, len(results))
+        return _print_results(islice(results, args.limit), args.format)
+    if window is not None:
+        tasks = tasks_due_between(*window)
+        if args.query is not None:
+            tasks = (t for t in tasks if matches(t, args.query, args.field, args.exact))
+        return _print_results(islice(tasks, args.limit), args.format)
+    narrowed = None if args.stream else _postings_rows(args.query, args.field, args.exact)
+    if storage_mode() == "sharded" and args.field in ("date", "due_date"):
+        # Zone maps rule out shards whose due range cannot contain a match.
+        sd = _shard_dir()
+        keys = shards.matching_due_keys(sd, args.query, args.exact)
+        tasks = [t for _, chunk in shards.iter_shards(sd, keys) for t in chunk]
+    elif narrowed is not None:
+        tasks = narrowed
+    elif args.stream:
+        # Filter while reading instead of loading everything first.
+        tasks = iter_tasks()
+    else:
+        p = find_tasks_file()
+        source = _index_source(p)
+        tasks = load_tasks()
+        candidates = _index_candidates(p, source, tasks, args.query, args.field, args.exact)
+        if candidates is None and isinstance(tasks, list):
+            # Full scan: the column layout is much smaller in memory.
+            tasks = table.TaskTable.from_tasks(tasks, consume=True)
+    if isinstance(tasks, bintable.MappedTaskTable) and args.field in ("id", "date", "due_date"):
+        if args.field == "id":
+            try:
+                rows = tasks.rows_with_id(int(args.query))
+            except ValueError:
+                rows = []
+        else:
+            rows = tasks.rows_matching_due(args.query, args.exact)
+        results = (tasks[i] for i in rows)
+    elif candidates is not None:
+        if isinstance(tasks, bintable.MappedTaskTable):
+            rows = (tasks[i] for i in tasks.rows_with_ids(candidates))
+        else:
+            rows = (t for t in tasks if t.get("id") in candidates)
+        results = (t for t in rows if matches(t, args.query, args.field, args.exact))
+    else:
+        results = (t for t in tasks if matches(t, args.query, args.field, args.exact))
+    # Matches are rendered as they are found.
+    return _print_results(islice(results, args.limit), args.format)
+
+
+def _print_results(results, fmt=None):
+    """Render search results; by default as a JSON array, with a message
+    instead when nothing matched."""
+    with render.Output(sys.stdout) as out:
+        render.tasks(out, results, fmt or "json", "No tasks found." if fmt in (None, "table") else None)
     return 0
 
 
+def _selection(args):
+    """`(ids, where)` for the tasks picked by done/update arguments.
+
+    Plain ids become an id set; id ranges (`3-7`), `-q/-f/--exact` (with the
+    same meaning as in search) and `--due-before` become a predicate, and
+    all of them must hold. Raises ValueError with a message for the user.
+    """
+    ids, ranges = set(), []
+    for spec in args.ids:
+        lo, sep, hi = spec.partition("-")
+        try:
+            if sep:
+                ranges.append((int(lo), int(hi)))
+            else:
+                ids.add(int(spec))
+        except ValueError:
+            raise ValueError(f"Invalid id: {spec}") from None
+    conds = []
+    if ranges:
+        def in_ranges(t):
+            tid = t.get("id")
+            return tid in ids or (isinstance(tid, int) and any(lo <= tid <= hi for lo, hi in ranges))
+        conds.append(in_ranges)
+    if args.query is not None:
+        conds.append(lambda t: matches(t, args.query, args.field, args.exact))
+    if args.due_before:
+        try:
+            limit = date.fromisoformat(args.due_before)
+        except ValueError:
+            raise ValueError("Invalid date format for --due-before. Use YYYY-MM-DD.") from None
+
+        def due_before(t):
+            try:
+                return date.fromisoformat(t.get("due_date")) < limit
+            except (TypeError, ValueError):
+                return False
+        conds.append(due_before)
+    id_set = ids if args.ids and not ranges else None
+    if id_set is None and not conds:
+        raise ValueError("Give task ids, an id range (3-7), -q or --due-before")
+    if not conds:
+        return id_set, None
+    if len(conds) == 1:
+        return id_set, conds[0]
+    return id_set, lambda t: all(c(t) for c in conds)
+
+
+def _report(verb, ids):
+    ids = sorted(ids, key=lambda i: (not isinstance(i, int), i if isinstance(i, int) else str(i)))
+    if len(ids) == 1:
+        return f"{verb} task {ids[0]}"
+    if len(ids) <= 20:
+        return f"{verb} {len(ids)} tasks: {', '.join(str(i) for i in ids)}"
+    return f"{verb} {len(ids)} tasks"
+
+
 def cmd_done(args):
-    tasks = load_tasks()
     try:
-        remove_id = int(args.id)
-    except ValueError:
-        print("Invalid id")
+        ids, where = _selection(args)
+    except ValueError as e:
+        print(e)
         return 1
-    new = [t for t in tasks if t.get("id") != remove_id]
-    if len(new) == len(tasks):
-        print(f"No task with id {remove_id}")
+    removed = remove_tasks(ids, where)
+    missing = sorted(ids - set(removed)) if ids is not None and where is None else []
+    for tid in missing:
+        print(f"No task with id {tid}")
+    if removed:
+        print(_report("Removed", removed))
+    elif not missing:
+        print("No matching tasks")
+    return 0 if removed and not missing else 1
+
+
+def cmd_update(args):
+    changes = {}
+    if args.title is not None:
+        changes["title"] = args.title
+    if args.description is not None:
+        changes["description"] = args.description
+    if args.due is not None:
+        try:
+            date.fromisoformat(args.due)
+        except ValueError:
+            print("Invalid date format for --due. Use YYYY-MM-DD.")
+            return 1
+        changes["due_date"] = args.due
+    if args.summary is not None:
+        changes["summary"] = args.summary or None  # "" removes the summary
+    if not changes:
+        print("Nothing to change; give --title, --description, --due or --summary")
+        return 1
+    try:
+        ids, where = _selection(args)
+    except ValueError as e:
+        print(e)
+        return 1
+    edited = edit_tasks(changes, ids, where)
+    if not edited:
+        print("No matching tasks")
         return 1
-    save_tasks(new)
-    print(f"Removed task {remove_id}")
+    print(_report("Updated", edited))
+    return 0
+
+
+def cmd_compact(args):
+    p = compact_tasks()
+    print(f"Compacted {p}")
+    return 0
+
+
+def cmd_stats(args):
+    p = find_tasks_file()
+    cache = _load_results(p)
+    lookups = cache.hits + cache.misses
+    current = cache.generation == _store_generation(p)
+    print(f"Result cache: {len(cache.entries) if current else 0} of {resultcache.SIZE} entries, "
+          f"{cache.size() if current else 0} bytes")
+    rate = f" ({100 * cache.hits / lookups:.0f}% hit rate)" if lookups else ""
+    print(f"Lookups: {cache.hits} hits, {cache.misses} misses{rate}")
+    summaries = summarycache.load(p)
+    lookups = summaries.hits + summaries.misses
+    rate = f" ({100 * summaries.hits / lookups:.0f}% hit rate)" if lookups else ""
+    print(f"Summary cache: {len(summaries.entries)} summaries, {summaries.size} of {summarycache.MAX_BYTES} bytes")
+    print(f"Summary lookups: {summaries.hits} hits, {summaries.misses} misses{rate}")
+    print(f"Store generation: {lockfile.version(p)}")
+    return 0
+
+
+def cmd_batch(args):
+    """Run one command per line (from a file or stdin) as a single commit."""
+    stream = open(args.file, encoding="utf-8") if args.file != "-" else sys.stdin
+    rc = 0
+    try:
+        with batch(window=args.window):
+            for line in stream:
+                argv = shlex.split(line, comments=True)
+                if not argv:
+                    continue
+                if argv[0] == "batch":
+                    print("Nested batch is not supported")
+                    rc = 1
+                    continue
+                try:
+                    rc = main(argv) or rc
+                except SystemExit as e:
+                    # argparse errors should not abort the rest of the batch
+                    rc = e.code if isinstance(e.code, int) else 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return rc
+
+
+def cmd_serve(args):
+    """Keep the tasks in memory and run forwarded commands until stopped."""
+    global _resident
+    sock = daemon.socket_path(find_tasks_file())
+    if args.stop:
+        if not daemon.stop(sock):
+            print(f"No server listening on {sock}")
+            return 1
+        print(f"Stopped server on {sock}")
+        return 0
+    _resident = {}
+    try:
+        daemon.serve(sock, _serve_request, ready=lambda: print(f"Serving {find_tasks_file()} on {sock}", flush=True))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _resident = None
+    return 0
+
+
+def _serve_request(argv, env):
+    """Run one forwarded command as the client would have; capture its output."""
+    global STORAGE_MODE, CODEC
+    out, err = io.StringIO(), io.StringIO()
+    saved_env = {k: os.environ.get(k) for k in daemon.FORWARDED_ENV}
+    saved = STORAGE_MODE, CODEC, sys.stdin
+    # Only the client's flags and environment decide the mode; there is no
+    # terminal to prompt on.
+    STORAGE_MODE, CODEC, sys.stdin = None, None, io.StringIO()
+    for k in daemon.FORWARDED_ENV:
+        if k in env:
+            os.environ[k] = env[k]
+        else:
+            os.environ.pop(k, None)
+    try:
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                rc = main(argv)
+            except SystemExit as e:
+                rc = e.code
+                if not isinstance(rc, int) and rc is not None:
+                    print(rc, file=sys.stderr)
+                    rc = 1
+            except Exception:
+                import traceback
+                # A half-applied change may have touched the kept snapshot.
+                _resident.clear()
+                traceback.print_exc()
+                rc = 1
+    finally:
+        STORAGE_MODE, CODEC, sys.stdin = saved
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    return {"rc": rc or 0, "out": out.getvalue(), "err": err.getvalue()}
+
+
+def _command(argv):
+    """The command word of ``argv`` and the arguments after it, read without
+    the argument parser, or None unless only ``--codec``/``--storage`` come
+    before it."""
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a in ("--codec", "--storage"):
+            i += 2
+        elif a.startswith(("--codec=", "--storage=")):
+            i += 1
+        elif a.startswith("-"):
+            return None
+        else:
+            return a, argv[i + 1:]
+    return None
+
+
+def _forward(argv):
+    """Run the command on a `final serve` process if one is listening.
+
+    Called before the argument parser is built, so a forwarded command costs
+    the client little more than the socket round trip; anything the command
+    word and flags do not plainly allow to forward runs here. Returns the
+    exit code, or None to run the command here instead.
+    """
+    if _resident is not None or _batch is not None or os.environ.get("FINAL_NO_DAEMON"):
+        return None
+    found = _command(argv)
+    if found is None or found[0] in _LOCAL_COMMANDS:
+        return None
+    command, rest = found
+    if command == "add":
+        # Prompting for a due date or calling the AI needs this process.
+        options = rest[:rest.index("--")] if "--" in rest else rest
+        if not any(a == "--due" or a.startswith("--due=") for a in options) or any(a.startswith("--s") for a in options):
+            return None
+    response = daemon.forward(daemon.socket_path(find_tasks_file()), argv)
+    if response is None:
+        return None
+    sys.stdout.write(response.get("out", ""))
+    sys.stderr.write(response.get("err", ""))
+    return response.get("rc", 1)
+
+
+def cmd_import(args):
+    """Add every row of a CSV or JSONL file as one commit."""
+    fmt = args.format or importer.detect_format(args.file)
+    if fmt is None:
+        print(f"Cannot tell the format of {args.file}; use --format csv or --format jsonl")
+        return 1
+    try:
+        f = open(args.file, encoding="utf-8", newline="") if args.file != "-" else sys.stdin
+    except OSError as e:
+        print(f"Cannot read {args.file}: {e.strerror}")
+        return 1
+    try:
+        tasks, errors = importer.read_tasks(f, fmt)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    if errors:
+        for e in errors[:10]:
+            print(e)
+        if len(errors) > 10:
+            print(f"... and {len(errors) - 10} more")
+        if not args.skip_invalid:
+            print("Nothing imported.")
+            return 1
+    if not tasks:
+        print("No tasks to import.")
+        return 0
+    first = next_task_id(len(tasks))
+    for i, t in enumerate(tasks):
+        t["id"] = first + i
+    commit_adds(tasks)
+    print(f"Imported {len(tasks)} tasks (ids {first}-{first + len(tasks) - 1})")
     return 0
 
 
@@ -260,9 +1871,41 @@ def cmd_ai_process(args):
     return 0
 
 
+def _positive_int(text):
+    import argparse
+    try:
+        n = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {text!r}") from None
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {n}")
+    return n
+
+
+def _add_window_args(p):
+    p.add_argument("--from", dest="from_date", help="Only tasks due on or after this date (YYYY-MM-DD)")
+    p.add_argument("--to", dest="to_date", help="Only tasks due on or before this date (YYYY-MM-DD)")
+    p.add_argument("--overdue", action="store_true", help="Only tasks due before today")
+    p.add_argument("--due-within", type=int, metavar="N", help="Only tasks due between today and N days from now")
+
+
+def _add_selection_args(p):
+    p.add_argument("ids", nargs="*", help="Task ids or id ranges like 3-7")
+    p.add_argument("-q", "--query", help="Only tasks matching this query (as in search)")
+    p.add_argument("-f", "--field", choices=["title", "description", "summary", "id", "all", "date", "due_date"], default="all")
+    p.add_argument("--exact", action="store_true", help="Exact match for -q")
+    p.add_argument("--due-before", help="Only tasks due before this date (YYYY-MM-DD)")
+
+
 def main(argv=None):
     argv = argv if argv is not None else sys.argv[1:]
+    rc = _forward(argv)
+    if rc is not None:
+        return rc
+    import argparse
     parser = argparse.ArgumentParser(prog="python -m final")
+    parser.add_argument("--codec", choices=codec.CODECS, help="Encoding for tasks.json when it is written (default: keep the file's current one)")
+    parser.add_argument("--storage", choices=STORAGE_MODES, help="Storage mode: json rewrites tasks.json, log appends to tasks.json.log, binary uses a memory-mapped tasks.bin, sharded splits tasks.d/ by due month")
     sub = parser.add_subparsers(dest="command", required=True)
     p_add = sub.add_parser("add", help="Add a task")
     p_add.add_argument("title")
@@ -271,20 +1914,67 @@ def main(argv=None):
     p_add.add_argument("--summarize", action="store_true", help="Use AI to summarize the description into a short phrase and store it as `summary`")
     p_add.set_defaults(func=cmd_add)
     p_list = sub.add_parser("list", help="List tasks")
+    _add_window_args(p_list)
+    p_list.add_argument("--format", choices=render.FORMATS, help="Output format (default: table grouped by due date)")
+    p_list.add_argument("--limit", type=_positive_int, metavar="N", help="Print at most N tasks")
+    p_list.add_argument("--page", type=_positive_int, metavar="P", help="With --limit, print the P-th page of N tasks (from 1)")
+    p_list.add_argument("--external", action="store_true", help="Sort on disk in bounded memory (for stores larger than RAM)")
+    p_list.add_argument("--memory", type=float, metavar="MB", help="Memory for --external sorting (default: $FINAL_SORT_MEMORY or 64)")
     p_list.set_defaults(func=cmd_list)
     p_search = sub.add_parser("search", help="Search tasks")
-    p_search.add_argument("-q", "--query", required=True, help="Query string")
-    p_search.add_argument("-f", "--field", choices=["title", "description", "id", "all", "date", "due_date"], default="all")
+    p_search.add_argument("-q", "--query", help="Query string")
+    p_search.add_argument("-f", "--field", choices=["title", "description", "summary", "id", "all", "date", "due_date"], default="all")
     p_search.add_argument("--exact", action="store_true", help="Exact match")
+    p_search.add_argument("--stream", action="store_true", help="Filter while reading the file (flat memory for huge stores)")
+    p_search.add_argument("-w", "--where", metavar="EXPR", help='Query expression, e.g. \'title:essay due<2025-12-01 -summary:draft\'')
+    p_search.add_argument("--fuzzy", action="store_true", help="Tolerate typos: best matches within a small edit distance per word")
+    p_search.add_argument("--distance", type=int, metavar="N", help="Edits allowed per word with --fuzzy (default: by word length)")
+    p_search.add_argument("--format", choices=render.FORMATS, help="Output format (default: a JSON array)")
+    p_search.add_argument("--rank", action="store_true", help="Order matches by BM25 relevance over title, description and summary")
+    p_search.add_argument("--limit", type=_positive_int, metavar="K", help="Return at most K results (default: all; 10 with --fuzzy or --rank)")
+    p_search.add_argument("--explain", action="store_true", help="Print the query plan and the rows it scanned (to stderr)")
+    _add_window_args(p_search)
     p_search.set_defaults(func=cmd_search)
-    p_done = sub.add_parser("done", help="Mark task done and remove it")
-    p_done.add_argument("id", help="ID of task to remove")
+    p_done = sub.add_parser("done", help="Mark tasks done and remove them")
+    _add_selection_args(p_done)
     p_done.set_defaults(func=cmd_done)
+    p_update = sub.add_parser("update", help="Change fields of the selected tasks")
+    _add_selection_args(p_update)
+    p_update.add_argument("--title", help="New title")
+    p_update.add_argument("--description", help="New description")
+    p_update.add_argument("--due", help="New due date in YYYY-MM-DD")
+    p_update.add_argument("--summary", help="New summary (empty to remove it)")
+    p_update.set_defaults(func=cmd_update)
+    p_compact = sub.add_parser("compact", help="Fold the operation log into tasks.json")
+    p_compact.set_defaults(func=cmd_compact)
+    p_stats = sub.add_parser("stats", help="Show result cache size and hit rate")
+    p_stats.set_defaults(func=cmd_stats)
+    p_batch = sub.add_parser("batch", help="Run commands from a file (one per line) with one group commit")
+    p_batch.add_argument("file", nargs="?", default="-", help="File of commands, or - for stdin")
+    p_batch.add_argument("--window", type=float, default=None, help="Flush pending writes at least every N seconds")
+    p_batch.set_defaults(func=cmd_batch)
+    p_import = sub.add_parser("import", help="Add tasks from a CSV or JSONL file in one commit")
+    p_import.add_argument("file", help="CSV or JSONL file (title, description, due_date, summary), or - for stdin")
+    p_import.add_argument("--format", choices=importer.FORMATS, help="File format (default: from the file suffix)")
+    p_import.add_argument("--skip-invalid", action="store_true", help="Import the valid rows even if some rows are invalid")
+    p_import.set_defaults(func=cmd_import)
+    p_serve = sub.add_parser("serve", help="Keep tasks in memory and answer other invocations over a Unix socket")
+    p_serve.add_argument("--stop", action="store_true", help="Stop the running server")
+    p_serve.set_defaults(func=cmd_serve)
     p_ai = sub.add_parser("ai-process", help="Process all files in a folder with AI and write outputs to a 'done' subfolder")
     p_ai.add_argument("folder", help="Path to folder containing files to process")
     p_ai.set_defaults(func=cmd_ai_process)
     args = parser.parse_args(argv)
-    return args.func(args)
+    global STORAGE_MODE, CODEC
+    previous = STORAGE_MODE, CODEC
+    if args.storage:
+        STORAGE_MODE = args.storage
+    if args.codec:
+        CODEC = args.codec
+    try:
+        return args.func(args)
+    finally:
+        STORAGE_MODE, CODEC = previous
 
 
 if __name__ == "__main__":
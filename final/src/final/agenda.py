@@ -0,0 +1,195 @@
+"""Materialized agenda for ``list`` (``tasks.json.agenda``).
+
+The view holds what ``list`` prints: the tasks' lines in due-date buckets,
+buckets in date order and each bucket's ids in ascending order, undated tasks
+last. Writes keep it current the way they keep the word index current: full
+rewrites are diffed against the stored lines, and log-mode appends are
+replayed from the log offset the view has reached. Only moved or changed
+tasks are touched, so nothing is re-sorted.
+
+On disk the header (source stamps and bucket sizes) comes first and every
+bucket follows as its own pickle, so the first page of a huge agenda is
+printed after reading only the buckets it needs.
+
+Buckets of dates that do not parse sort after all real dates by their text,
+and undated tasks are ordered by id like every other bucket; every other
+``list`` path (``build_agenda``, binary tables, ``--external``) uses the
+same order.
+"""
+from bisect import bisect_left, insort
+from datetime import date
+from pathlib import Path
+import os
+import pickle
+
+from .render import task_line
+
+AGENDA_SUFFIX = ".agenda"
+VERSION = 1
+
+
+def agenda_path(path: Path) -> Path:
+    return path.with_name(path.name + AGENDA_SUFFIX)
+
+
+def bucket_order(due):
+    """Sort key of the bucket for ``due`` (text or None)."""
+    if due is None:
+        return (2, 0, "")
+    try:
+        return (0, date.fromisoformat(due).toordinal(), due)
+    except (TypeError, ValueError):
+        return (1, 0, due)
+
+
+class Agenda:
+    def __init__(self):
+        self.entries = {}  # id -> (due date or None, printed line)
+        self.buckets = {}  # due date or None -> ids, ascending
+        self.order = []  # bucket_order() of every bucket, ascending
+        # Same meaning as on TextIndex: the snapshot files reflected and how
+        # far into the operation log the view has read.
+        self.source = None
+        self.log_inode = None
+        self.log_offset = 0
+
+    @classmethod
+    def build(cls, tasks):
+        """The view of ``tasks``; None if their ids are not unique ints."""
+        view = cls()
+        return view if view.sync(tasks) else None
+
+    def add(self, task) -> bool:
+        tid = task.get("id")
+        if not isinstance(tid, int) or isinstance(tid, bool):
+            return False
+        due = task.get("due_date") or None
+        entry = (None if due is None else str(due), task_line(task))
+        if self.entries.get(tid) == entry:
+            return True
+        self.remove(tid)
+        self.entries[tid] = entry
+        ids = self.buckets.get(entry[0])
+        if ids is None:
+            self.buckets[entry[0]] = [tid]
+            insort(self.order, bucket_order(entry[0]))
+        else:
+            insort(ids, tid)
+        return True
+
+    def remove(self, tid):
+        entry = self.entries.pop(tid, None)
+        if entry is None:
+            return
+        ids = self.buckets[entry[0]]
+        del ids[bisect_left(ids, tid)]
+        if not ids:
+            del self.buckets[entry[0]]
+            del self.order[bisect_left(self.order, bucket_order(entry[0]))]
+
+    def sync(self, tasks) -> bool:
+        """Bring the view in line with the complete task list ``tasks``."""
+        seen = set()
+        for t in tasks:
+            if t.get("id") in seen or not self.add(t):
+                return False
+            seen.add(t.get("id"))
+        for tid in [i for i in self.entries if i not in seen]:
+            self.remove(tid)
+        return True
+
+    def apply(self, records) -> bool:
+        """Apply operation-log records (see :mod:`final.oplog`)."""
+        for rec in records:
+            op = rec.get("op")
+            if op == "add":
+                if not self.add(rec["task"]):
+                    return False
+            elif op == "done":
+                for tid in rec.get("ids", [rec.get("id")]):
+                    self.remove(tid)
+        return True
+
+    def keys(self):
+        return [None if k[0] == 2 else k[2] for k in self.order]
+
+    def groups(self):
+        """``(due date or None, printed lines)`` in list order."""
+        for due in self.keys():
+            yield due, [self.entries[tid][1] for tid in self.buckets[due]]
+
+
+def _header(view):
+    return {"source": view.source, "log_inode": view.log_inode, "log_offset": view.log_offset,
+            "buckets": len(view.buckets)}
+
+
+def store(path: Path, view: Agenda):
+    """Write ``view``; failures only cost a rebuild later."""
+    target = agenda_path(path)
+    tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            dump = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump
+            dump(VERSION)
+            dump(_header(view))
+            for due in view.keys():
+                dump((due, [(tid, view.entries[tid][1]) for tid in view.buckets[due]]))
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def read_header(path: Path):
+    """Open the stored view; returns ``(header, file)`` or None. The file
+    is positioned at the first bucket."""
+    try:
+        f = open(agenda_path(path), "rb")
+    except OSError:
+        return None
+    try:
+        if pickle.load(f) == VERSION:
+            return pickle.load(f), f
+    except (EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        pass
+    f.close()
+    return None
+
+
+def iter_groups(header, f):
+    """``(due date or None, printed lines)`` read one bucket at a time;
+    closes ``f`` when done or abandoned."""
+    with f:
+        for _ in range(header["buckets"]):
+            due, rows = pickle.load(f)
+            yield due, [line for _, line in rows]
+
+
+def load(path: Path):
+    opened = read_header(path)
+    if opened is None:
+        return None
+    header, f = opened
+    view = Agenda()
+    view.source, view.log_inode, view.log_offset = header["source"], header["log_inode"], header["log_offset"]
+    try:
+        with f:
+            for _ in range(header["buckets"]):
+                due, rows = pickle.load(f)
+                view.buckets[due] = [tid for tid, _ in rows]
+                view.order.append(bucket_order(due))
+                for tid, line in rows:
+                    view.entries[tid] = (due, line)
+    except (EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    return view
+
+
+def invalidate(path: Path):
+    try:
+        agenda_path(path).unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,289 @@
+"""Memory-mapped fixed-width binary task table (``binary`` storage mode).
+
+Layout of ``tasks.bin``::
+
+    header   magic b"FTBL", version u16, reserved u16, count u32, heap offset u64
+    records  count x 52 bytes: id i32, due ordinal i32, flags u32,
+             then (offset u32, length u32) heap refs for title, description,
+             due_date, summary and a JSON blob of any other keys
+    heap     UTF-8 strings
+
+Every integer is little-endian and the header and records are 4-byte
+aligned, so on little-endian machines the id and due-ordinal columns are
+read straight out of the mapping as strided ``memoryview`` slices. Strings are
+decoded only when a row or field is actually asked for.
+"""
+from datetime import date
+from pathlib import Path
+import json
+import mmap
+import os
+import struct
+import sys
+
+from . import durable
+
+MAGIC = b"FTBL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")
+STR_FIELDS = ("title", "description", "due_date", "summary")
+RECORD = struct.Struct("<iiI" + "II" * (len(STR_FIELDS) + 1))
+ABSENT = 0xFFFFFFFF
+
+HAS_ID = 1
+# due_date is exactly date.fromordinal(ordinal).isoformat(), so it can be
+# rebuilt from the ordinal column without touching the heap.
+DUE_CANONICAL = 2
+
+_WORDS = RECORD.size // 4
+_NO_DUE = 0
+
+
+def table_path(path: Path) -> Path:
+    return path.with_suffix(".bin")
+
+
+def _due_ordinal(due):
+    if not isinstance(due, str) or not due:
+        return _NO_DUE, 0
+    try:
+        d = date.fromisoformat(due)
+    except ValueError:
+        return _NO_DUE, 0
+    return d.toordinal(), DUE_CANONICAL if d.isoformat() == due else 0
+
+
+def write_table(path: Path, tasks) -> Path:
+    """Write ``tasks`` (an iterable of task dicts) as a binary table.
+
+    The file is replaced atomically, so readers that still have the old
+    table mapped keep a valid view.
+    """
+    records = bytearray()
+    heap = bytearray()
+    count = 0
+
+    def ref(value):
+        if value is None:
+            return ABSENT, 0
+        data = value.encode("utf-8")
+        off = len(heap)
+        heap.extend(data)
+        return off, len(data)
+
+    for t in tasks:
+        tid = t.get("id")
+        flags = 0
+        extra = {k: v for k, v in t.items() if k != "id" and (k not in STR_FIELDS or not isinstance(v, str))}
+        if isinstance(tid, int) and not isinstance(tid, bool) and -2**31 <= tid < 2**31:
+            flags |= HAS_ID
+        else:
+            if "id" in t:
+                extra["id"] = tid
+            tid = 0
+        ordinal, canon = _due_ordinal(t.get("due_date"))
+        flags |= canon
+        refs = []
+        for name in STR_FIELDS:
+            v = t.get(name)
+            refs.extend(ref(v if isinstance(v, str) else None))
+        refs.extend(ref(json.dumps(extra, ensure_ascii=False) if extra else None))
+        records.extend(RECORD.pack(tid, ordinal, flags, *refs))
+        count += 1
+
+    heap_offset = HEADER.size + len(records)
+    header = HEADER.pack(MAGIC, VERSION, 0, count, heap_offset)
+    return durable.atomic_write(path, b"".join((header, records, heap)))
+
+
+def open_table(path: Path) -> "MappedTaskTable":
+    return MappedTaskTable(path)
+
+
+class MappedTaskTable:
+    """Read-only, lazily decoded view of a ``tasks.bin`` file.
+
+    Indexing or iterating yields plain task dicts (built on demand), so code
+    written against ``load_tasks()`` lists keeps working; the column helpers
+    below let hot paths avoid building those dicts at all.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # The file these rows came from, for sidecars keyed on it.
+            self.stat = os.fstat(f.fileno())
+        magic, version, _, count, heap_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise SystemExit(f"Not a task table: {self.path}")
+        self._count = count
+        self._heap = heap_offset
+        self._words = None
+        if sys.byteorder == "little" and count:
+            self._words = memoryview(self._mm)[HEADER.size:heap_offset].cast("i")
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        rec = RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)
+        task = {}
+        if rec[2] & HAS_ID:
+            task["id"] = rec[0]
+        for n, name in enumerate(STR_FIELDS):
+            s = self._str(rec[3 + 2 * n], rec[4 + 2 * n])
+            if s is not None:
+                task[name] = s
+        extra = self._str(rec[-2], rec[-1])
+        if extra:
+            task.update(json.loads(extra))
+        return task
+
+    def _str(self, off, length):
+        if off == ABSENT:
+            return None
+        start = self._heap + off
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _column(self, word):
+        if self._words is not None:
+            return self._words[word::_WORDS]
+        return [struct.unpack_from("<i", self._mm, HEADER.size + i * RECORD.size + 4 * word)[0]
+                for i in range(self._count)]
+
+    def ids(self):
+        """The id column (rows without an integer id read as 0)."""
+        return self._column(0)
+
+    def due_ordinals(self):
+        """The due-date column as day ordinals (0 when there is no valid date)."""
+        return self._column(1)
+
+    def flags(self):
+        return self._column(2)
+
+    def field(self, i, name):
+        """Decode a single string field of row ``i`` without building the row."""
+        n = STR_FIELDS.index(name)
+        base = HEADER.size + i * RECORD.size + 12 + 8 * n
+        off, length = struct.unpack_from("<II", self._mm, base)
+        return self._str(off, length)
+
+    def due_string(self, i, ordinal=None, flags=None):
+        if flags is None:
+            flags = self.flags()[i]
+        if flags & DUE_CANONICAL:
+            if ordinal is None:
+                ordinal = self.due_ordinals()[i]
+            return _iso(ordinal)
+        return self.field(i, "due_date")
+
+    def max_id(self):
+        flags = self.flags()
+        return max((tid for tid, fl in zip(self.ids(), flags) if fl & HAS_ID), default=0)
+
+    def rows_with_id(self, tid):
+        flags = self.flags()
+        return [i for i, (x, fl) in enumerate(zip(self.ids(), flags)) if x == tid and fl & HAS_ID]
+
+    def rows_with_ids(self, ids):
+        """Row numbers, in order, of the rows whose id is in the set ``ids``."""
+        flags = self.flags()
+        return [i for i, (x, fl) in enumerate(zip(self.ids(), flags)) if fl & HAS_ID and x in ids]
+
+    def rows_due_between(self, lo, hi):
+        """Rows whose due date falls in ``[lo, hi]`` (day ordinals; None
+        leaves that end open). Only non-canonical dates are read from the heap.
+        """
+        lo = 1 if lo is None else lo
+        hi = date.max.toordinal() if hi is None else hi
+        rows = []
+        for i, (o, fl) in enumerate(zip(self.due_ordinals(), self.flags())):
+            if not fl & DUE_CANONICAL:
+                o, _ = _due_ordinal(self.field(i, "due_date"))
+            if o != _NO_DUE and lo <= o <= hi:
+                rows.append(i)
+        return rows
+
+    def rows_matching_due(self, query, exact):
+        """Rows whose due_date equals (``exact``) or contains ``query``.
+
+        Canonical dates are tested once per distinct ordinal rather than once
+        per row; only non-canonical dates are read from the heap.
+        """
+        q = str(query).lower()
+        verdict = {}
+        rows = []
+        for i, (o, fl) in enumerate(zip(self.due_ordinals(), self.flags())):
+            if fl & DUE_CANONICAL:
+                hit = verdict.get(o)
+                if hit is None:
+                    s = _iso(o)
+                    hit = verdict[o] = (s == query) if exact else q in s
+            else:
+                s = self.field(i, "due_date")
+                hit = (s == query) if exact else q in (s or "").lower()
+            if hit:
+                rows.append(i)
+        return rows
+
+    def agenda(self):
+        """Return ``(groups, no_date)`` in the order ``cmd_list`` prints them.
+
+        ``groups`` is a list of ``(due_date, [row, ...])`` sorted by date, rows
+        sorted by id; only the due strings of group headers are decoded.
+        """
+        ids = self.ids()
+        flags = self.flags()
+        buckets = {}
+        no_date = []
+        for i, (o, fl) in enumerate(zip(self.due_ordinals(), flags)):
+            if fl & DUE_CANONICAL:
+                buckets.setdefault(o, []).append(i)
+                continue
+            s = self.field(i, "due_date")
+            if not s:
+                no_date.append(i)
+            else:
+                buckets.setdefault(s, []).append(i)
+
+        def sort_key(k):
+            # agenda.bucket_order: dates, then unparsable text in text order.
+            if isinstance(k, int):
+                return (0, k, _iso(k))
+            o, _ = _due_ordinal(k)
+            return (0, o, k) if o != _NO_DUE else (1, 0, k)
+
+        by_id = lambda i: ids[i] if flags[i] & HAS_ID else 0
+        groups = []
+        for k in sorted(buckets, key=sort_key):
+            label = _iso(k) if isinstance(k, int) else k
+            groups.append((label, sorted(buckets[k], key=by_id)))
+        return groups, sorted(no_date, key=by_id)
+
+    def close(self):
+        if self._words is not None:
+            self._words.release()
+            self._words = None
+        self._mm.close()
+
+
+_iso_cache = {}
+
+
+def _iso(ordinal):
+    s = _iso_cache.get(ordinal)
+    if s is None:
+        s = _iso_cache[ordinal] = date.fromordinal(ordinal).isoformat()
+    return s
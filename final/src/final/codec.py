@@ -0,0 +1,219 @@
+"""Serializers for task data files.
+
+Three codecs are available, chosen per data file:
+
+- ``pretty``: indented JSON, the historical format, meant for humans
+- ``compact``: JSON without whitespace, roughly half the size
+- ``binary``: MessagePack behind a ``FTMP`` magic header
+
+Files are detected on load: a magic header means binary, anything else is
+JSON. When saving, a file keeps the codec it already has unless one is
+requested explicitly. The binary codec uses the ``msgpack`` package when it
+is installed and a small pure-Python encoder otherwise; both write standard
+MessagePack.
+"""
+import json
+import os
+import struct
+
+MAGIC = b"FTMP\x01"
+CODECS = ["pretty", "compact", "binary"]
+DEFAULT = "pretty"
+
+
+def encode(data, codec=DEFAULT) -> bytes:
+    if codec == "pretty":
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    if codec == "compact":
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if codec == "binary":
+        return MAGIC + _pack(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decode(raw: bytes, empty=None):
+    """Decode file contents written by any codec; ``empty`` for a blank file."""
+    if raw.startswith(MAGIC):
+        try:
+            return _unpack(memoryview(raw)[len(MAGIC):])
+        except (IndexError, struct.error) as e:
+            raise ValueError(f"truncated binary data: {e}") from e
+    text = raw.decode("utf-8").strip()
+    if not text:
+        return empty
+    return json.loads(text)
+
+
+def detect(raw: bytes) -> str:
+    """Name of the codec that produced ``raw`` (``pretty`` for empty files)."""
+    if raw.startswith(MAGIC):
+        return "binary"
+    head = raw[:64].lstrip()
+    if len(head) > 1 and head[:1] in (b"[", b"{") and head[1:2] not in (b"\n", b"\r", b"]", b"}"):
+        return "compact"
+    return "pretty"
+
+
+def detect_file(path) -> str:
+    try:
+        with open(path, "rb") as f:
+            return detect(f.read(64))
+    except FileNotFoundError:
+        return DEFAULT
+
+
+def requested():
+    """Codec asked for through $FINAL_CODEC, if any."""
+    value = os.environ.get("FINAL_CODEC")
+    return value if value in CODECS else None
+
+
+# --- MessagePack -----------------------------------------------------------
+
+def _pack(data) -> bytes:
+    try:
+        import msgpack
+    except ImportError:
+        out = bytearray()
+        _pack_into(out, data)
+        return bytes(out)
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def _unpack(buf):
+    try:
+        import msgpack
+    except ImportError:
+        value, _ = _unpack_from(buf, 0)
+        return value
+    return msgpack.unpackb(buf, raw=False, strict_map_key=False)
+
+
+def _pack_into(out, obj):
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif 0 < obj < 0x10000:
+            out.append(0xCD)
+            out += struct.pack(">H", obj)
+        elif 0 < obj < 2**32:
+            out.append(0xCE)
+            out += struct.pack(">I", obj)
+        elif -2**63 <= obj < 2**63:
+            out.append(0xD3)
+            out += struct.pack(">q", obj)
+        else:
+            out.append(0xCF)
+            out += struct.pack(">Q", obj)
+    elif isinstance(obj, float):
+        out.append(0xCB)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            out.append(0xA0 | n)
+        elif n < 0x100:
+            out += bytes((0xD9, n))
+        elif n < 0x10000:
+            out.append(0xDA)
+            out += struct.pack(">H", n)
+        else:
+            out.append(0xDB)
+            out += struct.pack(">I", n)
+        out += data
+    elif isinstance(obj, (list, tuple)):
+        _pack_len(out, len(obj), 0x90, 0xDC)
+        for item in obj:
+            _pack_into(out, item)
+    elif isinstance(obj, dict):
+        _pack_len(out, len(obj), 0x80, 0xDE)
+        for k, v in obj.items():
+            _pack_into(out, k)
+            _pack_into(out, v)
+    else:
+        raise TypeError(f"Cannot encode {type(obj).__name__}")
+
+
+def _pack_len(out, n, fix, base):
+    if n < 16:
+        out.append(fix | n)
+    elif n < 0x10000:
+        out.append(base)
+        out += struct.pack(">H", n)
+    else:
+        out.append(base + 1)
+        out += struct.pack(">I", n)
+
+
+_FIXED = {
+    0xCC: ">B", 0xCD: ">H", 0xCE: ">I", 0xCF: ">Q",
+    0xD0: ">b", 0xD1: ">h", 0xD2: ">i", 0xD3: ">q",
+    0xCA: ">f", 0xCB: ">d",
+}
+
+
+def _unpack_from(buf, pos):
+    b = buf[pos]
+    pos += 1
+    if b < 0x80:
+        return b, pos
+    if b >= 0xE0:
+        return b - 0x100, pos
+    if 0xA0 <= b <= 0xBF:
+        return _str(buf, pos, b & 0x1F)
+    if 0x90 <= b <= 0x9F:
+        return _array(buf, pos, b & 0x0F)
+    if 0x80 <= b <= 0x8F:
+        return _map(buf, pos, b & 0x0F)
+    if b == 0xC0:
+        return None, pos
+    if b == 0xC2:
+        return False, pos
+    if b == 0xC3:
+        return True, pos
+    fmt = _FIXED.get(b)
+    if fmt:
+        size = struct.calcsize(fmt)
+        return struct.unpack_from(fmt, buf, pos)[0], pos + size
+    if b in (0xD9, 0xDA, 0xDB, 0xC4, 0xC5, 0xC6):
+        fmt = {0xD9: ">B", 0xDA: ">H", 0xDB: ">I", 0xC4: ">B", 0xC5: ">H", 0xC6: ">I"}[b]
+        n = struct.unpack_from(fmt, buf, pos)[0]
+        pos += struct.calcsize(fmt)
+        if b >= 0xD9:
+            return _str(buf, pos, n)
+        return bytes(buf[pos:pos + n]), pos + n
+    if b in (0xDC, 0xDD, 0xDE, 0xDF):
+        fmt = ">H" if b in (0xDC, 0xDE) else ">I"
+        n = struct.unpack_from(fmt, buf, pos)[0]
+        pos += struct.calcsize(fmt)
+        return (_array if b in (0xDC, 0xDD) else _map)(buf, pos, n)
+    raise ValueError(f"Unsupported MessagePack type 0x{b:02x}")
+
+
+def _str(buf, pos, n):
+    return str(buf[pos:pos + n], "utf-8"), pos + n
+
+
+def _array(buf, pos, n):
+    items = []
+    for _ in range(n):
+        value, pos = _unpack_from(buf, pos)
+        items.append(value)
+    return items, pos
+
+
+def _map(buf, pos, n):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack_from(buf, pos)
+        result[key], pos = _unpack_from(buf, pos)
+    return result, pos
@@ -0,0 +1,139 @@
+"""Resident task server and the thin client that talks to it.
+
+``final serve`` keeps the parsed task set in memory and answers CLI
+commands over a Unix socket (``tasks.json.sock`` next to the data file, or
+``$FINAL_SOCKET``). ``main()`` forwards a command when the socket answers and
+runs it directly otherwise, so the daemon is purely an accelerator.
+
+The wire format is one JSON object per connection in each direction::
+
+    request   {"argv": [...], "env": {"FINAL_STORAGE": "log", ...}}
+    response  {"rc": 0, "out": "...", "err": "..."}
+
+A request of ``{"op": "stop"}`` shuts the server down.
+"""
+from pathlib import Path
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+
+SOCK_SUFFIX = ".sock"
+# Client-side settings that change what a command does; forwarded so the
+# server runs it as the client would have.
+FORWARDED_ENV = (
+    "FINAL_STORAGE", "FINAL_CODEC", "FINAL_LOG_COMPACT_BYTES",
+    "FINAL_NO_CACHE", "FINAL_COMMIT_WINDOW", "FINAL_SORT_MEMORY", "FINAL_NO_INDEX",
+)
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path(data_path: Path) -> Path:
+    override = os.environ.get("FINAL_SOCKET")
+    if override:
+        return Path(override)
+    return data_path.with_name(data_path.name + SOCK_SUFFIX)
+
+
+def _recv_all(conn) -> bytes:
+    chunks = []
+    while True:
+        data = conn.recv(1 << 16)
+        if not data:
+            return b"".join(chunks)
+        chunks.append(data)
+
+
+def _exchange(sock_path: Path, request: dict, timeout=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(CONNECT_TIMEOUT)
+        conn.connect(str(sock_path))
+        conn.settimeout(timeout)
+        conn.sendall(json.dumps(request).encode("utf-8"))
+        conn.shutdown(socket.SHUT_WR)
+        return json.loads(_recv_all(conn) or b"null")
+
+
+def forward(sock_path: Path, argv):
+    """Run ``argv`` on the server; returns its response, or None if no
+    server is listening (the caller then runs the command itself)."""
+    if not sock_path.exists():
+        return None
+    env = {k: os.environ[k] for k in FORWARDED_ENV if k in os.environ}
+    try:
+        response = _exchange(sock_path, {"argv": list(argv), "env": env})
+    except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+        return None
+    if response is None:
+        # The request was sent, so running it again here could apply it twice.
+        return {"rc": 1, "out": "", "err": "Task server closed the connection without replying\n"}
+    return response
+
+
+def stop(sock_path: Path) -> bool:
+    try:
+        _exchange(sock_path, {"op": "stop"}, timeout=5)
+    except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+        return False
+    return True
+
+
+def is_running(sock_path: Path) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(CONNECT_TIMEOUT)
+            conn.connect(str(sock_path))
+        return True
+    except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+        return False
+
+
+class _Server(socketserver.UnixStreamServer):
+    def __init__(self, sock_path, run):
+        self.run = run
+        super().__init__(str(sock_path), _Handler)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(_recv_all(self.request) or b"{}")
+        except ValueError:
+            request = {}
+        if request.get("op") == "stop":
+            self.request.sendall(b'{"rc": 0, "out": "", "err": ""}')
+            # shutdown() blocks until serve_forever returns, so it must run
+            # outside this (serving) thread's call stack.
+            threading.Thread(target=self.server.shutdown).start()
+            return
+        response = self.server.run(request.get("argv") or [], request.get("env") or {})
+        self.request.sendall(json.dumps(response).encode("utf-8"))
+
+
+def serve(sock_path: Path, run, ready=None):
+    """Serve requests until stopped; ``run(argv, env)`` returns a response.
+
+    Requests are handled one at a time, so commands never interleave.
+    """
+    if sock_path.exists():
+        if is_running(sock_path):
+            raise SystemExit(f"A server is already listening on {sock_path}")
+        sock_path.unlink()  # left behind by a server that died
+    server = _Server(sock_path, run)
+    if threading.current_thread() is threading.main_thread():
+        # Let `kill` take the normal exit path so the socket is removed.
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        os.chmod(sock_path, 0o600)
+        if ready is not None:
+            ready()
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            sock_path.unlink()
+        except FileNotFoundError:
+            pass
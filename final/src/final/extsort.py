@@ -0,0 +1,97 @@
+"""External merge sort for ``list --external``.
+
+Tasks are read as a stream and collected until their estimated size
+reaches the memory budget; each batch is sorted and written to a temporary
+run file, and the runs are merged with ``heapq.merge``. If there are more
+runs than the budget allows to read at once (each open run holds a read
+buffer), they are merged in several passes. Memory therefore stays near
+the budget whatever the store's size, and the temporary files are removed
+afterwards.
+
+Sizes are estimates of the Python objects involved, not exact
+measurements.
+"""
+from contextlib import contextmanager
+import heapq
+import os
+import pickle
+import tempfile
+
+DEFAULT_MEMORY = 64 << 20
+BUFFER = 1 << 16
+# Rough in-memory cost of a task dict and of each of its values.
+_DICT_COST = 360
+_VALUE_COST = 50
+
+
+def megabytes(mb) -> int:
+    """``mb`` MiB (fractions allowed) in bytes, at least one."""
+    return max(1, int(float(mb) * (1 << 20)))
+
+
+def memory_budget() -> int:
+    """Bytes allowed for sorting: ``$FINAL_SORT_MEMORY`` (in MiB) or 64 MiB."""
+    try:
+        return megabytes(os.environ["FINAL_SORT_MEMORY"])
+    except (KeyError, ValueError):
+        return DEFAULT_MEMORY
+
+
+def footprint(task) -> int:
+    """Estimated bytes ``task`` occupies while buffered."""
+    return _DICT_COST + sum(_VALUE_COST + (len(v) if isinstance(v, str) else 0) for v in task.values())
+
+
+def _write_run(d, items):
+    fd, name = tempfile.mkstemp(dir=d, suffix=".run")
+    # One pickle per item: a shared pickler (and unpickler) would memoize,
+    # and so keep alive, everything in the run.
+    with open(fd, "wb", buffering=BUFFER) as f:
+        for item in items:
+            pickle.dump(item, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return name
+
+
+def _read_run(name):
+    with open(name, "rb", buffering=BUFFER) as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+@contextmanager
+def sorted_stream(items, key, memory=None, size=footprint):
+    """Context manager giving ``items`` sorted by ``key(item)``.
+
+    ``memory`` bounds the bytes (as estimated by ``size``) held at once.
+    """
+    memory = memory_budget() if memory is None else memory
+    with tempfile.TemporaryDirectory(prefix="final-sort-") as d:
+        runs = []
+        batch, used = [], 0
+        for item in items:
+            batch.append((key(item), item))
+            used += size(item)
+            if used >= memory:
+                batch.sort(key=lambda pair: pair[0])
+                runs.append(_write_run(d, batch))
+                batch, used = [], 0
+        batch.sort(key=lambda pair: pair[0])
+        if not runs:
+            yield (item for _, item in batch)
+            return
+        if batch:
+            runs.append(_write_run(d, batch))
+        del batch
+        fan_in = max(2, memory // BUFFER)
+        while len(runs) > fan_in:
+            merged = []
+            for i in range(0, len(runs), fan_in):
+                group = runs[i:i + fan_in]
+                merged.append(_write_run(d, heapq.merge(*map(_read_run, group), key=lambda pair: pair[0])))
+                for name in group:
+                    os.unlink(name)
+            runs = merged
+        yield (item for _, item in heapq.merge(*map(_read_run, runs), key=lambda pair: pair[0]))
@@ -0,0 +1,106 @@
+"""Typo-tolerant matching for ``search --fuzzy``.
+
+A task matches when every word of the query is within a small edit distance
+of some word of the task's text; its score is the sum of those distances
+(0 is a match without typos). Results are the ``k`` best scores.
+
+Comparing the query with every word of every task would be slow, so the
+word index keeps the padded trigrams of its vocabulary (``$$homework$$``).
+A word within edit distance ``d`` of the query word shares all but at most
+``3 * d`` of its distinct trigrams, so counting shared trigrams leaves only
+a few words to run the (bounded) Levenshtein distance on.
+"""
+import heapq
+import re
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    return _WORD.findall(text.lower())
+
+
+def grams(word):
+    padded = f"$${word}$$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def default_distance(word) -> int:
+    """Typos tolerated in a query word: none in very short words, one up to
+    five letters, two beyond."""
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+
+def distance(a, b, limit):
+    """Levenshtein distance of ``a`` and ``b``, or None if above ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if a == b:
+        return 0
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return None
+        prev = cur
+    return prev[-1] if prev[-1] <= limit else None
+
+
+def score(text, query_words, limits, cache=None):
+    """Sum over ``query_words`` of the distance to the closest word of
+    ``text``, or None if some query word has none within its limit.
+    ``cache`` maps (query word, word) to a distance across calls."""
+    tokens = set(words(text))
+    total = 0
+    for q, limit in zip(query_words, limits):
+        best = None
+        for w in tokens:
+            if cache is None:
+                d = distance(q, w, limit)
+            else:
+                d = cache.get((q, w), False)
+                if d is False:
+                    d = cache[(q, w)] = distance(q, w, limit)
+            if d is not None and (best is None or d < best):
+                best = d
+                if d == 0:
+                    break
+        if best is None:
+            return None
+        total += best
+    return total
+
+
+def rank(tasks, text_of, query_words, limits, k):
+    """The ``k`` best ``(score, task)`` pairs of ``tasks`` by scanning them
+    all (used when there is no word index)."""
+    cache = {}
+    scored = ((score(text_of(t), query_words, limits, cache), i, t) for i, t in enumerate(tasks))
+    best = heapq.nsmallest(k, ((s, i, t) for s, i, t in scored if s is not None), key=lambda x: x[:2])
+    return [(s, t) for s, _, t in best]
+
+
+def top(bounds, exact_score, k):
+    """The ``k`` best ``(score, id)`` pairs given lower ``bounds`` on each
+    id's score.
+
+    ``exact_score(id)`` gives the real score (None when it no longer
+    matches); it is only called for ids whose bound could still make the
+    top ``k``.
+    """
+    heap = [(s, tid, False) for tid, s in bounds.items()]
+    heapq.heapify(heap)
+    out = []
+    while heap and len(out) < k:
+        s, tid, checked = heapq.heappop(heap)
+        if checked:
+            out.append((s, tid))
+            continue
+        real = exact_score(tid)
+        if real is not None:
+            heapq.heappush(heap, (real, tid, True))
+    return out
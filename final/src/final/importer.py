@@ -0,0 +1,80 @@
+"""Row readers for ``final import``: CSV and JSON Lines, read as a stream.
+
+Both formats carry the same fields as ``add``: ``title`` (required),
+``description``, ``due_date`` (``due`` is accepted too) and ``summary``.
+Other columns are ignored. Rows are validated as they are read, and every
+problem is reported with its line number instead of stopping at the first.
+"""
+from datetime import date
+import csv
+import json
+
+FORMATS = ["csv", "jsonl"]
+_TEXT_FIELDS = ("title", "description", "due_date", "due", "summary")
+_SUFFIXES = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def detect_format(name):
+    """Format implied by a file name's suffix, or None."""
+    for suffix, fmt in _SUFFIXES.items():
+        if str(name).lower().endswith(suffix):
+            return fmt
+    return None
+
+
+def iter_rows(f, fmt):
+    """Yield ``(line_number, row)`` from text file ``f``.
+
+    A JSONL line that is not a JSON object comes back as a string (the error
+    to report) in place of the row.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for n, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield n, f"invalid JSON ({e})"
+            continue
+        yield n, row if isinstance(row, dict) else "not a JSON object"
+
+
+def read_tasks(f, fmt):
+    """Validate every row; return ``(tasks, errors)``.
+
+    Tasks have the same keys, in the same order, as ``add`` creates, with
+    ``id`` left as None for the caller to fill in from one block of ids.
+    """
+    fromiso = date.fromisoformat
+    tasks = []
+    errors = []
+    for n, row in iter_rows(f, fmt):
+        if isinstance(row, str):
+            errors.append(f"line {n}: {row}")
+            continue
+        wrong = [k for k in _TEXT_FIELDS if row.get(k) is not None and not isinstance(row[k], str)]
+        if wrong:
+            errors.append(f"line {n}: {wrong[0]} must be text, not {type(row[wrong[0]]).__name__}")
+            continue
+        title = row.get("title")
+        if not title:
+            errors.append(f"line {n}: missing title")
+            continue
+        due = row.get("due_date") or row.get("due") or None
+        if due is not None:
+            try:
+                fromiso(due)
+            except (TypeError, ValueError):
+                errors.append(f"line {n}: invalid due date {due!r}; use YYYY-MM-DD")
+                continue
+        task = {"id": None, "title": title, "description": row.get("description") or "", "due_date": due}
+        summary = row.get("summary")
+        if summary:
+            task["summary"] = summary
+        tasks.append(task)
+    return tasks, errors
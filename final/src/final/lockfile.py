@@ -0,0 +1,100 @@
+"""Cross-process write lock and store version (``tasks.json.lock``).
+
+Every write to the store (snapshot rewrite, log append, shard change) happens
+while holding an exclusive ``fcntl`` lock on the sidecar and bumps the
+version number stored in it. Read-modify-write callers read the version
+before loading, do their work unlocked, and only take the lock to check the
+version is unchanged and write; on a mismatch they raise :class:`Conflict`
+and the caller retries from a fresh read. tasks.json itself stays a plain
+list, so the version lives in the lock sidecar.
+
+The lock is re-entrant within a process, so a ``batch()`` that holds it for
+its whole duration can still flush through the normal write path.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+
+# Lock file path -> [fd, depth] for the locks this process holds.
+_held = {}
+
+
+class Conflict(Exception):
+    """The store changed between the read and the write."""
+
+
+def lock_path(path: Path) -> Path:
+    return path.with_name(path.name + LOCK_SUFFIX)
+
+
+@contextmanager
+def locked(path: Path):
+    """Hold the exclusive write lock for ``path``; yields the lock file's fd."""
+    lp = lock_path(path)
+    held = _held.get(lp)
+    if held is not None:
+        held[1] += 1
+        try:
+            yield held[0]
+        finally:
+            held[1] -= 1
+        return
+    lp.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lp, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        _held[lp] = [fd, 1]
+        yield fd
+    finally:
+        _held.pop(lp, None)
+        os.close(fd)  # closing releases the lock
+
+
+def is_held(path: Path) -> bool:
+    return lock_path(path) in _held
+
+
+def _parse(data: bytes) -> int:
+    text = data.decode("ascii", "replace").strip()
+    return int(text) if text.isdigit() else 0
+
+
+def version(path: Path) -> int:
+    """Current store version, read without taking the lock."""
+    try:
+        with open(lock_path(path), "rb") as f:
+            return _parse(f.read(32))
+    except FileNotFoundError:
+        return 0
+
+
+def check(fd, expected):
+    """Raise Conflict unless the locked store is still at ``expected``."""
+    if expected is None:
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    if _parse(os.read(fd, 32)) != expected:
+        raise Conflict()
+
+
+def bump(fd) -> int:
+    """Advance the version of the locked store; returns the new value.
+
+    Not fsynced: after a crash no reader from before it is still waiting to
+    write, so a version that goes back a step cannot be mistaken.
+    """
+    os.lseek(fd, 0, os.SEEK_SET)
+    value = _parse(os.read(fd, 32)) + 1
+    data = f"{value}\n".encode("ascii")
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, data)
+    os.ftruncate(fd, len(data))
+    return value
@@ -0,0 +1,141 @@
+"""Append-only operation log kept next to the tasks file.
+
+In ``log`` storage mode an add or done writes one small JSON line to
+``tasks.json.log`` instead of rewriting the whole snapshot. Reads load the
+snapshot and replay the log tail on top of it. Replay is keyed by task id, so
+applying the same record twice is harmless; that is what makes compaction
+(write snapshot, then drop the log) safe to interrupt.
+"""
+from pathlib import Path
+import json
+import os
+
+from . import durable
+
+LOG_SUFFIX = ".log"
+DEFAULT_COMPACT_BYTES = 1 << 20
+
+
+def log_path(path: Path) -> Path:
+    return path.with_name(path.name + LOG_SUFFIX)
+
+
+def compact_threshold() -> int:
+    """Log size in bytes after which the log is folded into the snapshot."""
+    try:
+        return int(os.environ.get("FINAL_LOG_COMPACT_BYTES", DEFAULT_COMPACT_BYTES))
+    except ValueError:
+        return DEFAULT_COMPACT_BYTES
+
+
+def append(path: Path, record: dict, sync: bool = True) -> int:
+    """Append one record to the log for ``path`` and return the new log size.
+
+    With ``sync=False`` the caller takes over the fsync (group commit).
+    """
+    return append_many(path, [record], sync)
+
+
+def append_many(path: Path, records, sync: bool = True) -> int:
+    """Append several records with one write (and at most one fsync)."""
+    lp = log_path(path)
+    lines = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records)
+    with open(lp, "a", encoding="utf-8") as f:
+        f.write(lines)
+        f.flush()
+        if sync:
+            durable.fsync_fd(f.fileno())
+        return f.tell()
+
+
+def read_records(path: Path, raw: bytes = None):
+    """Yield the records in the log for ``path``, oldest first.
+
+    ``raw`` is the log's content when the caller has already read it. A torn
+    final line (a crash in the middle of an append) is skipped; a malformed
+    line anywhere else means the log is corrupt.
+    """
+    lp = log_path(path)
+    if raw is not None:
+        lines = raw.decode("utf-8").splitlines(keepends=True)
+    elif lp.exists():
+        with open(lp, encoding="utf-8") as f:
+            lines = f.readlines()
+    else:
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            if line.endswith("\n"):
+                raise SystemExit(f"Invalid record in {lp}: {e}")
+            return
+
+
+def replay(tasks: list, records) -> list:
+    """Apply log records on top of the snapshot ``tasks``."""
+    by_id = {}
+    for t in tasks:
+        by_id[t.get("id", object())] = t
+    for rec in records:
+        op = rec.get("op")
+        if op == "add":
+            task = rec["task"]
+            by_id[task.get("id", object())] = task
+        elif op == "done":
+            for i in rec.get("ids", [rec.get("id")]):
+                by_id.pop(i, None)
+    return list(by_id.values())
+
+
+def stream_replay(tasks, records):
+    """Like :func:`replay`, but ``tasks`` may be a lazy iterator.
+
+    Only the log's effect is held in memory: snapshot tasks the log does not
+    touch are passed straight through, in the same order ``replay`` gives.
+    """
+    # id -> [task or None if removed, sequence number, may stay in place]
+    state = {}
+    for seq, rec in enumerate(records):
+        op = rec.get("op")
+        if op == "add":
+            task = rec["task"]
+            tid = task.get("id", object())
+            entry = state.get(tid)
+            if entry is None:
+                state[tid] = [task, seq, True]
+            elif entry[0] is None:
+                state[tid] = [task, seq, False]
+            else:
+                entry[0] = task
+        elif op == "done":
+            for i in rec.get("ids", [rec.get("id")]):
+                state[i] = [None, None, False]
+
+    seen = set()
+    for t in tasks:
+        tid = t.get("id", object())
+        entry = state.get(tid)
+        if entry is None:
+            yield t
+        elif entry[0] is not None and entry[2]:
+            seen.add(tid)
+            yield entry[0]
+    tail = [(e[1], e[0]) for tid, e in state.items()
+            if e[0] is not None and not (e[2] and tid in seen)]
+    for _, task in sorted(tail, key=lambda x: x[0]):
+        yield task
+
+
+def has_log(path: Path) -> bool:
+    return log_path(path).exists()
+
+
+def drop(path: Path):
+    """Remove the log once its records are part of the snapshot."""
+    try:
+        log_path(path).unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,71 @@
+"""Sidecar cache of the parsed task list (``tasks.json.cache``).
+
+Read-only commands spend most of their time decoding JSON. The cache holds
+the decoded tasks, plus the date-grouped agenda ``cmd_list`` prints, as a
+pickle. It is only used when the data file's mtime, size and BLAKE2 content
+hash (and the operation log's, if there is one) still match the stamp stored
+with it; ``save_tasks`` removes it so a stale entry is never read.
+"""
+from pathlib import Path
+import hashlib
+import os
+import pickle
+
+CACHE_SUFFIX = ".cache"
+VERSION = 2
+
+
+def cache_path(path: Path) -> Path:
+    return path.with_name(path.name + CACHE_SUFFIX)
+
+
+def enabled() -> bool:
+    return not os.environ.get("FINAL_NO_CACHE")
+
+
+def stamp(path: Path, raw: bytes, log_path: Path, log_raw):
+    """Everything the cached parse depends on."""
+    h = hashlib.blake2b(raw, digest_size=20)
+    st = os.stat(path)
+    parts = [VERSION, st.st_mtime_ns, st.st_size]
+    if log_raw is not None:
+        h.update(b"\0log\0")
+        h.update(log_raw)
+        lst = os.stat(log_path)
+        parts += [lst.st_mtime_ns, lst.st_size]
+    return tuple(parts) + (h.hexdigest(),)
+
+
+def load(path: Path, key):
+    """Return the cached entry dict for ``key``, or None on a miss."""
+    try:
+        with open(cache_path(path), "rb") as f:
+            if pickle.load(f) != key:
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+
+
+def store(path: Path, key, entry: dict):
+    """Write ``entry`` under ``key``; failures only cost the next parse."""
+    target = cache_path(path)
+    tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            # Stamp first so a miss never unpickles the payload.
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def invalidate(path: Path):
+    try:
+        cache_path(path).unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,207 @@
+"""Word postings on disk for binary and sharded stores (``*.words``).
+
+The word index of :mod:`final.textindex` lives in ``final serve``; one-shot
+runs on a JSON store load every task anyway, so they scan. A binary table is
+memory-mapped and a sharded store can skip whole shards, so for those a
+one-shot ``search`` reads this file instead: the sorted vocabulary of the
+``all`` and ``summary`` texts and, for each word, the rows containing it.
+A query reads the vocabulary, the postings of the words it can match (found
+with the same rules as the in-memory index, see ``ranking.word_keys``) and
+then only those rows.
+
+``tasks.bin.words`` sits next to the table and ``tasks.d/<shard>.json.words``
+next to each shard; rows are positions in that file. Layout::
+
+    header    magic b"FPST", version u16, reserved u16, then the data file's
+              inode, size and mtime (ns) as u64
+    sections  for "all" and "summary": word count u64, offset of the word
+              table u64, offset and length u64 of the word blob
+    table     per word: start u32 and count u32 in the postings
+    blob      the words, sorted, UTF-8, separated by "\\n"
+    postings  row numbers u32, ascending per word
+
+Writes pay nothing for it: a file whose stamp no longer matches the data
+file is ignored, and the next search that reads the data rebuilds it.
+"""
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+import mmap
+import os
+import struct
+import sys
+
+from . import ranking, textindex
+
+SUFFIX = ".words"
+MAGIC = b"FPST"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQQ")
+SECTION = struct.Struct("<QQQQ")
+TEXTS = ("all", "summary")
+
+
+def postings_path(path: Path) -> Path:
+    return path.with_name(path.name + SUFFIX)
+
+
+def stamp(st: os.stat_result):
+    """What identifies one version of a data file: inode, size and mtime.
+    Take it from the open file the rows are read from (``os.fstat``)."""
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _u32(data) -> array:
+    a = array("I")
+    a.frombytes(data)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+
+def _le(a: array) -> bytes:
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+class _Vocab:
+    """Sorted words: ``in`` bisects, iteration walks them in order."""
+
+    def __init__(self, words):
+        self.words = words
+
+    def __contains__(self, word):
+        return self.position(word) is not None
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def position(self, word):
+        i = bisect_left(self.words, word)
+        return i if i < len(self.words) and self.words[i] == word else None
+
+
+def build(tasks) -> bytes:
+    """The postings file for ``tasks`` (in row order), without its stamp."""
+    posts = ({}, {})
+    for row, task in enumerate(tasks):
+        for post, words in zip(posts, textindex.task_words(task)):
+            for word in words:
+                rows = post.get(word)
+                if rows is None:
+                    post[word] = rows = array("I")
+                rows.append(row)
+    sections, bodies = [], []
+    offset = HEADER.size + SECTION.size * len(TEXTS)
+    postings = array("I")
+    for post in posts:
+        words = sorted(post)
+        table = array("I")
+        for word in words:
+            table.append(len(postings))
+            table.append(len(post[word]))
+            postings.extend(post[word])
+        blob = "\n".join(words).encode("utf-8")
+        sections.append((len(words), offset, offset + len(table) * 4, len(blob)))
+        bodies += [_le(table), blob]
+        offset += len(table) * 4 + len(blob)
+    # Postings are read as u32 straight from the mapping.
+    pad = -offset % 4
+    return b"".join([b"".join(SECTION.pack(*s) for s in sections), *bodies, b"\0" * pad, _le(postings)])
+
+
+def store(path: Path, version, tasks):
+    """Write the postings of ``tasks`` for the data file version ``version``
+    (see :func:`stamp`); failures only cost the next search a scan."""
+    header = HEADER.pack(MAGIC, VERSION, 0, *version)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(header + build(tasks))
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def load(path: Path, version):
+    """The :class:`Postings` in ``path`` if they were written for data file
+    version ``version``, else None."""
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, _, *got = HEADER.unpack_from(mm, 0)
+    except (OSError, ValueError, struct.error):
+        return None
+    if magic != MAGIC or fmt != VERSION or tuple(got) != tuple(version):
+        return None
+    return Postings(mm)
+
+
+class Postings:
+    def __init__(self, mm):
+        self._mm = mm
+        self._vocab = {}
+        self._sections = {}
+        pos = HEADER.size
+        for name in TEXTS:
+            self._sections[name] = SECTION.unpack_from(mm, pos)
+            pos += SECTION.size
+        self._postings = HEADER.size + SECTION.size * len(TEXTS) + sum(
+            count * 8 + blob_len for count, _, _, blob_len in self._sections.values())
+        self._postings += -self._postings % 4
+
+    def vocab(self, name) -> _Vocab:
+        v = self._vocab.get(name)
+        if v is None:
+            count, _, blob_at, blob_len = self._sections[name]
+            words = self._mm[blob_at:blob_at + blob_len].decode("utf-8").split("\n") if count else []
+            v = self._vocab[name] = _Vocab(words)
+        return v
+
+    def _span(self, name, i):
+        _, table_at, _, _ = self._sections[name]
+        return struct.unpack_from("<II", self._mm, table_at + i * 8)
+
+    def rows(self, name, word) -> array:
+        i = self.vocab(name).position(word)
+        if i is None:
+            return array("I")
+        start, count = self._span(name, i)
+        at = self._postings + start * 4
+        return _u32(self._mm[at:at + count * 4])
+
+    def _keys(self, query, field, exact):
+        name = textindex.FIELDS.get(field)
+        if name not in TEXTS:
+            return None, None
+        keys = list(ranking.word_keys(self.vocab(name), str(query).lower(), exact))
+        return name, keys or None
+
+    def candidates(self, query, field, exact=False):
+        """Rows that may match ``matches(task, query, field, exact)``, or
+        None when the postings cannot narrow the search."""
+        name, keys = self._keys(query, field, exact)
+        if keys is None:
+            return None
+        result = None
+        for alternatives in keys:
+            rows = set()
+            for word in alternatives:
+                rows.update(self.rows(name, word))
+            result = rows if result is None else result & rows
+            if not result:
+                return set()
+        return result
+
+    def estimate(self, query, field, exact=False):
+        """Upper bound on ``len(candidates(...))`` from posting counts."""
+        name, keys = self._keys(query, field, exact)
+        if keys is None:
+            return None
+        vocab = self.vocab(name)
+        return min(sum(self._span(name, vocab.position(w))[1] for w in alternatives) for alternatives in keys)
@@ -0,0 +1,148 @@
+"""Query language for ``search --where``.
+
+A query is a list of terms that must all hold::
+
+    title:essay due<2025-12-01 -summary:draft "lab report"
+
+- ``field:value`` is a case-insensitive substring test and ``field=value`` an
+  exact one, with the same meaning as ``search -f field``. Fields are
+  ``title``, ``description``, ``summary``, ``date`` (or ``due``) and ``id``.
+- ``due`` and ``id`` also take ``<``, ``<=``, ``>`` and ``>=``.
+- A bare word (or quoted phrase) searches title and description (``-f all``).
+- A leading ``-`` negates a term.
+
+:func:`parse` turns the text into :class:`Term` objects. The search planner
+uses the terms to pick an index, and :func:`compile` turns them into the
+predicate that checks each candidate.
+"""
+from datetime import date
+import re
+import shlex
+
+FIELDS = {"title": "title", "description": "description", "summary": "summary",
+          "date": "due_date", "due": "due_date", "due_date": "due_date", "id": "id", "all": "all"}
+ORDERED = {"due_date", "id"}
+_TERM = re.compile(r"^(\w+)(<=|>=|<|>|=|:)(.*)$", re.S)
+
+
+class QueryError(ValueError):
+    pass
+
+
+class Term:
+    """One condition: ``field op value``, possibly negated."""
+
+    __slots__ = ("field", "op", "value", "negated")
+
+    def __init__(self, field, op, value, negated=False):
+        self.field = field
+        self.op = op
+        self.value = value
+        self.negated = negated
+
+    def __repr__(self):
+        return f"Term({self.field!r}, {self.op!r}, {self.value!r}, negated={self.negated})"
+
+    def __str__(self):
+        value = self.value.isoformat() if isinstance(self.value, date) else str(self.value)
+        if not value or any(c.isspace() for c in value):
+            value = f'"{value}"'
+        text = value if (self.field, self.op) == ("all", ":") else f"{self.field}{self.op}{value}"
+        return ("-" if self.negated else "") + text
+
+
+def parse(text) -> list:
+    try:
+        words = shlex.split(text)
+    except ValueError as e:
+        raise QueryError(f"Cannot parse query: {e}") from None
+    terms = []
+    for word in words:
+        negated = word.startswith("-") and len(word) > 1
+        if negated:
+            word = word[1:]
+        m = _TERM.match(word)
+        if m is None or m.group(1).lower() not in FIELDS:
+            terms.append(Term("all", ":", word, negated))
+            continue
+        field, op, value = FIELDS[m.group(1).lower()], m.group(2), m.group(3)
+        if not value:
+            raise QueryError(f"Missing value in {word!r}")
+        if op not in (":", "=") and field not in ORDERED:
+            raise QueryError(f"{m.group(1)} does not support {op}")
+        if field == "id":
+            try:
+                value = int(value)
+            except ValueError:
+                raise QueryError(f"Invalid id in {word!r}") from None
+            if op == ":":
+                op = "="
+        elif field == "due_date" and op not in (":", "="):
+            try:
+                value = date.fromisoformat(value)
+            except ValueError:
+                raise QueryError(f"Invalid date in {word!r}; use YYYY-MM-DD") from None
+        terms.append(Term(field, op, value, negated))
+    if not terms:
+        raise QueryError("Empty query")
+    return terms
+
+
+def _ordered_test(term):
+    op, value = term.op, term.value
+    if term.field == "id":
+        key = lambda t: t.get("id") if isinstance(t.get("id"), int) else None
+    else:
+        value = value.toordinal()
+
+        def key(t):
+            try:
+                return date.fromisoformat(t.get("due_date")).toordinal()
+            except (TypeError, ValueError):
+                return None
+    if op == "=":
+        return lambda t: key(t) == value
+    cmp = {"<": lambda a: a < value, "<=": lambda a: a <= value,
+           ">": lambda a: a > value, ">=": lambda a: a >= value}[op]
+
+    def test(t):
+        k = key(t)
+        return k is not None and cmp(k)
+    return test
+
+
+def compile(terms, matches):
+    """Predicate for ``terms``; ``matches`` is the search-field matcher."""
+    tests = []
+    for term in terms:
+        if term.field == "id" or (term.field == "due_date" and term.op not in (":", "=")):
+            test = _ordered_test(term)
+        else:
+            test = (lambda term: lambda t: matches(t, term.value, term.field, term.op == "="))(term)
+        tests.append((lambda test: lambda t: not test(t))(test) if term.negated else test)
+    if len(tests) == 1:
+        return tests[0]
+    return lambda t: all(test(t) for test in tests)
+
+
+def bounds(terms, field):
+    """``(lo, hi)`` implied by the non-negated ordered terms on ``field``
+    (day ordinals for due dates), or None when there are none."""
+    lo = hi = None
+    found = False
+    for term in terms:
+        if term.negated or term.field != field or term.op == ":":
+            continue
+        if field == "due_date" and term.op == "=":
+            continue  # a string match, not a date comparison
+        found = True
+        v = term.value.toordinal() if isinstance(term.value, date) else term.value
+        if term.op in ("=", ">="):
+            lo = v if lo is None else max(lo, v)
+        if term.op == ">":
+            lo = v + 1 if lo is None else max(lo, v + 1)
+        if term.op in ("=", "<="):
+            hi = v if hi is None else min(hi, v)
+        if term.op == "<":
+            hi = v - 1 if hi is None else min(hi, v - 1)
+    return (lo, hi) if found else None
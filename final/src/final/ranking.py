@@ -0,0 +1,116 @@
+"""BM25 ranking for ``search --rank``.
+
+Tasks are scored on the words of their title, description and summary. The
+statistics BM25 needs (how many tasks contain each word, every task's length
+and the total length) live in :class:`RankStats`, which the word index
+updates on every write, so ranking never recounts the store. Term
+frequencies come from the few tasks being ranked.
+
+A query word is expanded the way ``matches`` treats it as a substring: its
+first word may be the end of a longer word and its last word the start of
+one, so ``search -q home --rank`` ranks by ``homework`` too.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"\w+")
+
+
+def ranked_words(task):
+    text = f"{task.get('title', '')} {task.get('description', '')} {task.get('summary') or ''}"
+    return _WORD.findall(text.lower())
+
+
+def word_keys(vocab, q, exact, narrow=None):
+    """For each word of the lowercased query ``q``, the words of ``vocab``
+    it can match as part of a substring match.
+
+    ``narrow(word)``, if given, returns a subset of ``vocab`` that holds
+    every word containing ``word``; partial words are looked for only there.
+    """
+    for m in _WORD.finditer(q):
+        word = m.group()
+        # With exact matching the whole text equals the query, so every word
+        # is whole.
+        left_open = not exact and m.start() == 0
+        right_open = not exact and m.end() == len(q)
+        pool = narrow(word) if narrow is not None and (left_open or right_open) else vocab
+        if left_open and right_open:
+            yield [k for k in pool if word in k]
+        elif left_open:
+            yield [k for k in pool if k.endswith(word)]
+        elif right_open:
+            yield [k for k in pool if k.startswith(word)]
+        else:
+            yield [word] if word in vocab else []
+
+
+class RankStats:
+    """Document frequencies and lengths over every task's ranked words."""
+
+    def __init__(self):
+        self.df = {}  # word -> number of tasks containing it
+        self.docs = {}  # id -> (length in words, distinct words)
+        self.total = 0  # sum of lengths
+
+    @classmethod
+    def build(cls, tasks):
+        stats = cls()
+        for i, t in enumerate(tasks):
+            stats.add(i, t)
+        return stats
+
+    def add(self, tid, task):
+        self.remove(tid)
+        words = ranked_words(task)
+        distinct = tuple(set(words))
+        df = self.df
+        for w in distinct:
+            df[w] = df.get(w, 0) + 1
+        self.docs[tid] = (len(words), distinct)
+        self.total += len(words)
+
+    def remove(self, tid):
+        old = self.docs.pop(tid, None)
+        if old is None:
+            return
+        length, distinct = old
+        self.total -= length
+        df = self.df
+        for w in distinct:
+            n = df[w] - 1
+            if n:
+                df[w] = n
+            else:
+                del df[w]
+
+    def idf(self, word) -> float:
+        n = self.df.get(word, 0)
+        return math.log(1 + (len(self.docs) - n + 0.5) / (n + 0.5))
+
+    def scorer(self, query, exact=False):
+        """Function giving a task's BM25 score for ``query``."""
+        keysets = [set(keys) for keys in word_keys(self.df, str(query).lower(), exact)]
+        weights = {w: self.idf(w) for keys in keysets for w in keys}
+        avgdl = self.total / len(self.docs) if self.docs else 1.0
+
+        def score(task):
+            tf = Counter(ranked_words(task))
+            norm = K1 * (1 - B + B * sum(tf.values()) / avgdl)
+            s = 0.0
+            for keys in keysets:
+                for w, n in tf.items():
+                    if w in keys:
+                        s += weights[w] * n * (K1 + 1) / (n + norm)
+            return s
+        return score
+
+    def top(self, tasks, query, k, exact=False):
+        """The ``k`` highest-scoring ``tasks``, best first (file order among
+        equal scores), selected with a heap of size ``k``."""
+        return heapq.nlargest(k, tasks, key=self.scorer(query, exact))
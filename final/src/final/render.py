@@ -0,0 +1,129 @@
+"""Output renderers for ``list`` and ``search`` (``--format``).
+
+``table`` is the human-readable layout, ``ndjson`` one JSON object per line
+and ``json`` a single array (encoded one task at a time, indented exactly
+like ``json.dumps(tasks, indent=2)``). Everything goes through
+:class:`Output`, which hands text on in chunks of about ``CHUNK`` characters,
+so memory does not grow with the number of results.
+
+When the reader goes away (``python -m final list | head``) the first
+failed write marks the output closed, the renderers stop pulling tasks, and
+stdout is pointed at ``os.devnull`` so the interpreter's final flush does not
+fail again.
+"""
+import json
+import os
+
+FORMATS = ["table", "ndjson", "json"]
+CHUNK = 1 << 16
+
+
+class Output:
+    """Buffered writer over a text stream; see the module docstring."""
+
+    def __init__(self, out, chunk=CHUNK):
+        self.out = out
+        self.chunk = chunk
+        self.parts = []
+        self.size = 0
+        self.closed = False
+
+    def write(self, s) -> bool:
+        """Queue ``s``; False once the reader has gone away."""
+        if self.closed:
+            return False
+        self.parts.append(s)
+        self.size += len(s)
+        if self.size >= self.chunk:
+            self.flush()
+        return not self.closed
+
+    def flush(self):
+        if self.closed:
+            return
+        data = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        try:
+            if data:
+                self.out.write(data)
+            self.out.flush()
+        except BrokenPipeError:
+            self._broken()
+
+    def _broken(self):
+        self.closed = True
+        try:
+            fd = self.out.fileno()
+        except (AttributeError, OSError, ValueError):
+            return
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, fd)
+        os.close(devnull)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+def _plain(task):
+    return task.to_dict() if hasattr(task, "to_dict") else task
+
+
+def task_line(t) -> str:
+    desc = t.get("summary") or t.get("description") or ""
+    return f"- [{t.get('id')}] {t.get('title')} : {desc}"
+
+
+def tasks(out: Output, items, fmt="json", empty=None) -> int:
+    """Render ``items`` in ``fmt``; returns how many were written.
+
+    ``empty`` is printed instead when there are none (the default leaves an
+    empty array for ``json`` and nothing for the other formats).
+    """
+    n = 0
+    for t in items:
+        if fmt == "json":
+            text = json.dumps(_plain(t), indent=2).replace("\n", "\n  ")
+            ok = out.write(("[\n  " if n == 0 else ",\n  ") + text)
+        elif fmt == "ndjson":
+            ok = out.write(json.dumps(_plain(t)) + "\n")
+        else:
+            ok = out.write(f"{t.get('due_date') or '-':<10}  {task_line(t)[2:]}\n")
+        n += 1
+        if not ok:
+            return n
+    if n == 0:
+        if empty is not None:
+            out.write(empty + "\n")
+        elif fmt == "json":
+            out.write("[]\n")
+    elif fmt == "json":
+        out.write("\n]\n")
+    return n
+
+
+def agenda(out: Output, groups, fmt="table", line=task_line):
+    """Render ``(heading, items)`` groups as ``list`` prints them: a heading
+    per due date, or "No due date:" for the None heading. ``line`` formats
+    one item in the table layout; ``ndjson`` and ``json`` list the tasks in
+    the same order and need task items."""
+    if fmt != "table":
+        tasks(out, (t for _, items in groups for t in items), fmt)
+        return
+    for heading, items in groups:
+        if heading is None:
+            items = iter(items)
+            first = next(items, None)
+            if first is None:
+                continue
+            out.write("No due date:\n" + line(first) + "\n")
+        else:
+            out.write(f"{heading}\n")
+        for item in items:
+            if not out.write(line(item) + "\n"):
+                return
+        if heading is not None:
+            out.write("\n")
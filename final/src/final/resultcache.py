@@ -0,0 +1,112 @@
+"""Cache of recent ``search`` and ``list`` output (``tasks.json.results``).
+
+Each entry is the exact text a command printed, keyed by its normalized
+arguments. The whole cache is tagged with the store generation it was
+filled at (see ``final._store_generation``); as soon as the store is at a
+different generation every entry is dropped, so a hit is always what the
+command would print now. The least recently used entries are evicted beyond
+``SIZE``, and output larger than ``MAX_BYTES`` is never kept.
+"""
+from collections import OrderedDict
+from pathlib import Path
+import os
+import pickle
+
+CACHE_SUFFIX = ".results"
+VERSION = 1
+SIZE = 64
+MAX_BYTES = 1 << 20
+
+
+def cache_path(path: Path) -> Path:
+    return path.with_name(path.name + CACHE_SUFFIX)
+
+
+def enabled() -> bool:
+    return not os.environ.get("FINAL_NO_CACHE")
+
+
+class ResultCache:
+    def __init__(self):
+        self.generation = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, generation, key):
+        """Cached output for ``key`` at ``generation``, or None (a miss)."""
+        if generation != self.generation:
+            self.entries.clear()
+            self.generation = generation
+        text = self.entries.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        while len(self.entries) > SIZE:
+            self.entries.popitem(last=False)
+
+    def size(self) -> int:
+        """Bytes of cached output (as UTF-8)."""
+        return sum(len(text.encode("utf-8", "surrogatepass")) for text in self.entries.values())
+
+
+class Tee:
+    """Text stream that writes through to ``out`` and keeps a copy of up to
+    ``limit`` characters; ``complete`` is False once it stopped copying."""
+
+    def __init__(self, out, limit=MAX_BYTES):
+        self.out = out
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+        self.complete = True
+
+    def write(self, s):
+        self.out.write(s)
+        if self.complete:
+            self.length += len(s)
+            if self.length > self.limit:
+                self.complete = False
+                self.parts = []
+            else:
+                self.parts.append(s)
+        return len(s)
+
+    def flush(self):
+        self.out.flush()
+
+    def getvalue(self):
+        return "".join(self.parts)
+
+
+def load(path: Path) -> ResultCache:
+    try:
+        with open(cache_path(path), "rb") as f:
+            if pickle.load(f) == VERSION:
+                return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        pass
+    return ResultCache()
+
+
+def store(path: Path, cache: ResultCache):
+    """Write ``cache``; failures only cost misses later."""
+    target = cache_path(path)
+    tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(VERSION, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
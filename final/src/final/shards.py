@@ -0,0 +1,290 @@
+"""Due-date-sharded task files (``sharded`` storage mode).
+
+Tasks live in ``tasks.d/`` with one JSON file per due month (``2025-11.json``),
+plus ``undated.json`` for tasks without a due date and ``other.json`` for
+dates that do not parse. ``manifest.json`` keeps a zone map per shard::
+
+    {"shards": {"2025-11": {"file": "2025-11.json", "min_due": "2025-11-03",
+                            "max_due": "2025-11-30", "count": 12,
+                            "min_id": 4, "max_id": 57, "canonical": true}}}
+
+Readers consult the manifest to visit shards in date order and to skip
+shards whose due range or id range cannot match.
+"""
+from datetime import date, timedelta
+from pathlib import Path
+import json
+import os
+
+from . import durable
+
+MANIFEST = "manifest.json"
+UNDATED = "undated"
+OTHER = "other"
+
+
+def shard_dir(path: Path) -> Path:
+    return path.with_suffix(".d")
+
+
+def exists(d: Path) -> bool:
+    return (d / MANIFEST).exists()
+
+
+def shard_key(task) -> str:
+    due = task.get("due_date")
+    if not due:
+        return UNDATED
+    try:
+        parsed = date.fromisoformat(due)
+    except (TypeError, ValueError):
+        return OTHER
+    return f"{parsed.year:04d}-{parsed.month:02d}"
+
+
+def _order(key):
+    # Months first, then unparseable dates (they sort as date.max in
+    # cmd_list), then undated tasks.
+    if key == OTHER:
+        return (1, key)
+    if key == UNDATED:
+        return (2, key)
+    return (0, key)
+
+
+def read_manifest(d: Path) -> dict:
+    try:
+        return json.loads((d / MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {"shards": {}}
+
+
+def _write_json(path: Path, data):
+    durable.atomic_write(path, json.dumps(data, indent=2, ensure_ascii=False))
+
+
+def _zone(key, tasks) -> dict:
+    ids = [t["id"] for t in tasks if isinstance(t.get("id"), int)]
+    zone = {"file": f"{key}.json", "count": len(tasks),
+            "min_id": min(ids, default=0), "max_id": max(ids, default=0)}
+    if key not in (UNDATED, OTHER):
+        dues = [date.fromisoformat(t["due_date"]) for t in tasks]
+        zone["min_due"] = min(dues).isoformat()
+        zone["max_due"] = max(dues).isoformat()
+        zone["canonical"] = all(t["due_date"] == d.isoformat() for t, d in zip(tasks, dues))
+    return zone
+
+
+def read_shard(d: Path, key) -> list:
+    return read_shard_stat(d, key)[0]
+
+
+def read_shard_stat(d: Path, key):
+    """A shard's tasks and ``os.fstat`` of the file they were read from
+    (None for a missing shard)."""
+    try:
+        with open(d / f"{key}.json", "rb") as f:
+            return json.loads(f.read()), os.fstat(f.fileno())
+    except FileNotFoundError:
+        return [], None
+
+
+def _put_shard(d: Path, manifest: dict, key, tasks):
+    """Rewrite one shard (or delete it when empty) and update its zone."""
+    path = d / f"{key}.json"
+    if tasks:
+        _write_json(path, tasks)
+        manifest["shards"][key] = _zone(key, tasks)
+    else:
+        manifest["shards"].pop(key, None)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def write_all(d: Path, tasks) -> Path:
+    """Rewrite the whole sharded layout from ``tasks``."""
+    d.mkdir(parents=True, exist_ok=True)
+    buckets = {}
+    for t in tasks:
+        buckets.setdefault(shard_key(t), []).append(t)
+    old = read_manifest(d)
+    manifest = {"shards": {}}
+    for key, items in buckets.items():
+        _put_shard(d, manifest, key, items)
+    for key in old["shards"]:
+        if key not in buckets:
+            _put_shard(d, manifest, key, [])
+    _write_json(d / MANIFEST, manifest)
+    return d
+
+
+def keys_in_order(manifest: dict) -> list:
+    return sorted(manifest["shards"], key=_order)
+
+
+def iter_shards(d: Path, keys=None):
+    """Yield ``(key, tasks)`` for each shard in due-date order."""
+    manifest = read_manifest(d)
+    for key in keys_in_order(manifest) if keys is None else keys:
+        yield key, read_shard(d, key)
+
+
+def load_all(d: Path) -> list:
+    tasks = []
+    for _, items in iter_shards(d):
+        tasks.extend(items)
+    return tasks
+
+
+def max_id(d: Path) -> int:
+    return max((z["max_id"] for z in read_manifest(d)["shards"].values()), default=0)
+
+
+def remove_where(d: Path, pred) -> list:
+    """Remove every task satisfying ``pred``; returns the removed ids.
+
+    Each shard is read once, and only shards that lose a task are rewritten.
+    """
+    manifest = read_manifest(d)
+    removed = []
+    for key in keys_in_order(manifest):
+        keep = []
+        gone = []
+        for t in read_shard(d, key):
+            (gone if pred(t) else keep).append(t)
+        if gone:
+            removed.extend(t.get("id") for t in gone)
+            _put_shard(d, manifest, key, keep)
+    if removed:
+        _write_json(d / MANIFEST, manifest)
+    return removed
+
+
+def update_where(d: Path, pred, change) -> list:
+    """Replace every task satisfying ``pred`` with ``change(task)``.
+
+    Tasks whose new due date belongs to another month move to that shard.
+    Returns the ids of the changed tasks.
+    """
+    manifest = read_manifest(d)
+    updated = []
+    moved = {}
+    for key in keys_in_order(manifest):
+        keep = []
+        changed = False
+        for t in read_shard(d, key):
+            if pred(t):
+                t = change(t)
+                updated.append(t.get("id"))
+                changed = True
+                if shard_key(t) != key:
+                    moved.setdefault(shard_key(t), []).append(t)
+                    continue
+            keep.append(t)
+        if changed:
+            _put_shard(d, manifest, key, keep)
+    for key, new in moved.items():
+        _put_shard(d, manifest, key, read_shard(d, key) + new)
+    if updated:
+        _write_json(d / MANIFEST, manifest)
+    return updated
+
+
+def add(d: Path, task) -> Path:
+    """Append ``task`` to its month shard; no other shard is touched."""
+    return add_many(d, [task])[0]
+
+
+def add_many(d: Path, tasks) -> list:
+    """Append ``tasks`` to their shards, rewriting each touched shard and the
+    manifest once; returns the paths of the shards written."""
+    manifest = read_manifest(d)
+    buckets = {}
+    for t in tasks:
+        buckets.setdefault(shard_key(t), []).append(t)
+    for key, new in buckets.items():
+        items = read_shard(d, key)
+        items.extend(new)
+        _put_shard(d, manifest, key, items)
+    _write_json(d / MANIFEST, manifest)
+    return [d / f"{key}.json" for key in buckets]
+
+
+def remove(d: Path, ids) -> list:
+    """Remove tasks by id, rewriting only the shards that hold them.
+
+    Shards whose id range excludes every requested id are not opened.
+    Returns the ids that were found and removed.
+    """
+    wanted = set(ids)
+    manifest = read_manifest(d)
+    removed = []
+    for key, zone in list(manifest["shards"].items()):
+        if not any(zone["min_id"] <= i <= zone["max_id"] for i in wanted):
+            continue
+        items = read_shard(d, key)
+        keep = [t for t in items if t.get("id") not in wanted]
+        if len(keep) != len(items):
+            removed.extend(t.get("id") for t in items if t.get("id") in wanted)
+            _put_shard(d, manifest, key, keep)
+    if removed:
+        _write_json(d / MANIFEST, manifest)
+    return removed
+
+
+def may_match_due(key, zone, query, exact) -> bool:
+    """Whether shard ``key`` can hold a due_date matching ``query``.
+
+    Month shards with canonical dates are tested against every date in their
+    [min_due, max_due] range (at most 31 strings); other shards are only
+    skipped when they trivially cannot match.
+    """
+    if key == UNDATED:
+        return query == "" and not exact
+    if key == OTHER or not zone.get("canonical"):
+        return True
+    lo = date.fromisoformat(zone["min_due"])
+    hi = date.fromisoformat(zone["max_due"])
+    q = str(query).lower()
+    day = lo
+    while day <= hi:
+        s = day.isoformat()
+        if (s == query) if exact else (q in s):
+            return True
+        day += timedelta(days=1)
+    return False
+
+
+def keys_due_between(d: Path, lo, hi) -> list:
+    """Month shards whose due range overlaps ``[lo, hi]`` (day ordinals; None
+    leaves that end open), in date order. Undated and unparseable shards
+    can never match."""
+    manifest = read_manifest(d)
+    keys = []
+    for k in keys_in_order(manifest):
+        zone = manifest["shards"][k]
+        if k in (UNDATED, OTHER):
+            continue
+        if lo is not None and date.fromisoformat(zone["max_due"]).toordinal() < lo:
+            continue
+        if hi is not None and date.fromisoformat(zone["min_due"]).toordinal() > hi:
+            continue
+        keys.append(k)
+    return keys
+
+
+def keys_with_ids(d: Path, lo, hi) -> list:
+    """Shards whose id range overlaps ``[lo, hi]`` (None leaves that end
+    open), in date order."""
+    manifest = read_manifest(d)
+    return [k for k in keys_in_order(manifest)
+            if (lo is None or manifest["shards"][k]["max_id"] >= lo)
+            and (hi is None or manifest["shards"][k]["min_id"] <= hi)]
+
+
+def matching_due_keys(d: Path, query, exact) -> list:
+    manifest = read_manifest(d)
+    return [k for k in keys_in_order(manifest)
+            if may_match_due(k, manifest["shards"][k], query, exact)]
@@ -0,0 +1,115 @@
+"""Incremental reader for large JSON task files.
+
+``iter_array`` yields the elements of a top-level JSON array (or of the array
+stored under one key of a top-level object, as in ``{"tasks": [...]}``) one
+at a time, reading the file in fixed-size chunks. Only the current chunk and
+the element being decoded are held in memory, so filtering a huge file runs
+in flat memory. Elements are decoded with the stdlib decoder, so values are
+identical to ``json.loads``.
+"""
+import json
+
+CHUNK = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WS = " \t\n\r"
+
+
+class _Reader:
+    def __init__(self, f, chunk):
+        self.f = f
+        self.chunk = chunk
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch):
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"expected {ch!r}, found {got or 'end of input'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the
+            # next chunk ("12" + "34").
+            if end == len(self.buf) and not self.eof and isinstance(value, (int, float)):
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def _iter_elements(r):
+    r.expect("[")
+    if r.peek() == "]":
+        r.pos += 1
+        return
+    while True:
+        yield r.value()
+        ch = r.peek()
+        r.pos += 1
+        if ch == "]":
+            return
+        if ch != ",":
+            raise ValueError(f"expected ',' or ']' in array, found {ch or 'end of input'!r}")
+
+
+def iter_array(f, key=None, chunk=CHUNK):
+    """Yield the elements of the JSON array in text file ``f``.
+
+    With ``key``, the top-level value must be an object and the array under
+    that key is streamed; other members are decoded and discarded. A missing
+    key or an empty file yields nothing.
+    """
+    r = _Reader(f, chunk)
+    if r.peek() == "":
+        return
+    if key is None:
+        yield from _iter_elements(r)
+        return
+    r.expect("{")
+    if r.peek() == "}":
+        return
+    while True:
+        name = r.value()
+        r.expect(":")
+        if name == key:
+            yield from _iter_elements(r)
+            return
+        r.value()
+        ch = r.peek()
+        r.pos += 1
+        if ch == "}":
+            return
+        if ch != ",":
+            raise ValueError(f"expected ',' or '}}' in object, found {ch or 'end of input'!r}")
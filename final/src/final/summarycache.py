@@ -0,0 +1,97 @@
+"""Cache of AI summaries (``tasks.json.summaries``).
+
+Summaries are keyed by a hash of everything that decides the reply: the
+model, the prompt and the description text. A description summarized
+before, for example a task added again or shared between courses, is
+answered from the cache without a request (or the OpenAI SDK). The least
+recently used summaries are evicted once the cache holds more than
+``MAX_BYTES``.
+"""
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import os
+import pickle
+
+CACHE_SUFFIX = ".summaries"
+VERSION = 1
+MAX_BYTES = 1 << 20
+
+
+def cache_path(path: Path) -> Path:
+    return path.with_name(path.name + CACHE_SUFFIX)
+
+
+def enabled() -> bool:
+    return not os.environ.get("FINAL_NO_CACHE")
+
+
+def summary_key(description: str, model: str, *prompt: str) -> str:
+    """Hex digest of the description, model and prompt text(s)."""
+    h = hashlib.sha256()
+    for part in (model, *prompt, description):
+        data = part.encode("utf-8", "surrogatepass")
+        # Length-prefixed so different inputs never hash the same bytes.
+        h.update(len(data).to_bytes(8, "big") + data)
+    return h.hexdigest()
+
+
+def _cost(key, summary) -> int:
+    return len(key) + len(summary.encode("utf-8", "surrogatepass"))
+
+
+class SummaryCache:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0  # bytes of keys and summaries (as UTF-8)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Cached summary for ``key``, or None (a miss)."""
+        summary = self.entries.get(key)
+        if summary is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return summary
+
+    def put(self, key, summary, limit=MAX_BYTES):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= _cost(key, old)
+        cost = _cost(key, summary)
+        if cost > limit:
+            return
+        self.entries[key] = summary
+        self.size += cost
+        while self.size > limit:
+            k, s = self.entries.popitem(last=False)
+            self.size -= _cost(k, s)
+
+
+def load(path: Path) -> SummaryCache:
+    try:
+        with open(cache_path(path), "rb") as f:
+            if pickle.load(f) == VERSION:
+                return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        pass
+    return SummaryCache()
+
+
+def store(path: Path, cache: SummaryCache):
+    """Write ``cache``; failures only cost requests later."""
+    target = cache_path(path)
+    tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(VERSION, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
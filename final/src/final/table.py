@@ -0,0 +1,187 @@
+"""Column-oriented in-memory task container.
+
+A list of task dicts costs a dict (plus its hash table) per task. ``TaskTable``
+instead keeps ids and due-date ordinals in ``array`` columns, the string fields
+in plain lists with repeated values interned, and the key order of each task
+as a small index into a shared list of layouts. ``TaskRow`` views with
+``__slots__`` are created on demand and answer ``get``/``[]`` like the dicts
+they replace, so ``matches`` and ``cmd_list`` run on them unchanged.
+"""
+from array import array
+from datetime import date
+
+STR_FIELDS = ("title", "description", "summary")
+_COLUMN_KEYS = frozenset(STR_FIELDS + ("id", "due_date"))
+_ID_MIN, _ID_MAX = -2**63, 2**63 - 1
+
+
+class TaskRow:
+    """Read-only dict-like view of one row of a ``TaskTable``."""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def get(self, key, default=None):
+        return self._table.value(self._i, key, default)
+
+    def __getitem__(self, key):
+        value = self._table.value(self._i, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return key in self._table.layout(self._i)
+
+    def keys(self):
+        return self._table.layout(self._i)
+
+    def items(self):
+        return [(k, self.get(k)) for k in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, TaskRow):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return f"TaskRow({self.to_dict()!r})"
+
+
+_MISSING = object()
+
+
+class TaskTable:
+    """Tasks stored column-wise; see the module docstring."""
+
+    def __init__(self):
+        self.ids = array("q")
+        self.due_ordinals = array("i")  # 0 when the date is missing or not canonical
+        self._columns = {name: [] for name in STR_FIELDS}
+        self._layout_ids = array("I")
+        self._layouts = []
+        self._layout_index = {}
+        self._layout_extra = []
+        self._interned = {}
+        self._due_cache = {}
+        # Sparse storage for the unusual cases, keyed by row number.
+        self._odd_ids = {}
+        self._raw_due = {}
+        self._extra = {}
+
+    @classmethod
+    def from_tasks(cls, tasks, consume=False):
+        """Build a table from task dicts.
+
+        With ``consume=True`` and a list, each dict is released from the list
+        as soon as it is copied, so peak memory stays close to one copy.
+        """
+        table = cls()
+        if consume and isinstance(tasks, list):
+            for i in range(len(tasks)):
+                t = tasks[i]
+                tasks[i] = None
+                table.append(t)
+            tasks.clear()
+        else:
+            for t in tasks:
+                table.append(t)
+        # Interning only pays off while loading; the lookup dict itself would
+        # otherwise cost about as much as the duplicates it saved.
+        table._interned = {}
+        table._due_cache = {}
+        return table
+
+    def _intern(self, s):
+        if not isinstance(s, str):
+            return s
+        return self._interned.setdefault(s, s)
+
+    def append(self, task):
+        i = len(self.ids)
+        keys = tuple(task)
+        lid = self._layout_index.get(keys)
+        if lid is None:
+            lid = self._layout_index[keys] = len(self._layouts)
+            self._layouts.append(keys)
+            self._layout_extra.append(not _COLUMN_KEYS.issuperset(keys))
+        self._layout_ids.append(lid)
+
+        tid = task.get("id")
+        if isinstance(tid, int) and not isinstance(tid, bool) and _ID_MIN <= tid <= _ID_MAX:
+            self.ids.append(tid)
+        else:
+            self.ids.append(0)
+            self._odd_ids[i] = tid
+
+        due = task.get("due_date")
+        ordinal = 0
+        if isinstance(due, str) and due:
+            ordinal = self._due_cache.get(due)
+            if ordinal is None:
+                ordinal = self._due_cache[due] = _canonical_ordinal(due)
+        self.due_ordinals.append(ordinal)
+        if not ordinal and due is not None:
+            self._raw_due[i] = due
+
+        for name in STR_FIELDS:
+            self._columns[name].append(self._intern(task.get(name)))
+        if self._layout_extra[lid]:
+            self._extra[i] = {k: v for k, v in task.items() if k not in _COLUMN_KEYS}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return TaskRow(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield TaskRow(self, i)
+
+    def layout(self, i):
+        return self._layouts[self._layout_ids[i]]
+
+    def value(self, i, key, default=None):
+        if key not in self._layouts[self._layout_ids[i]]:
+            return default
+        if key == "id":
+            return self._odd_ids.get(i, self.ids[i]) if self._odd_ids else self.ids[i]
+        if key == "due_date":
+            o = self.due_ordinals[i]
+            return _iso(o) if o else self._raw_due.get(i)
+        column = self._columns.get(key)
+        if column is not None:
+            return column[i]
+        return self._extra[i][key]
+
+    def to_list(self):
+        return [row.to_dict() for row in self]
+
+
+def _canonical_ordinal(due):
+    try:
+        d = date.fromisoformat(due)
+    except ValueError:
+        return 0
+    return d.toordinal() if d.isoformat() == due else 0
+
+
+_iso_cache = {}
+
+
+def _iso(ordinal):
+    s = _iso_cache.get(ordinal)
+    if s is None:
+        s = _iso_cache[ordinal] = date.fromordinal(ordinal).isoformat()
+    return s
@@ -0,0 +1,330 @@
+"""Word index from text to task ids, kept by ``final serve``.
+
+Inside the server, ``search -f all/title/description/summary`` looks up the
+query's words here and runs ``matches`` only on the tasks whose id comes
+back, instead of lowercasing every task. The index may return extra
+candidates (an edited task keeps its old words until the next rebuild) but
+never misses one, so results are exactly those of the linear scan.
+
+Words are runs of ``\\w`` in the lowercased text ``matches`` searches. Since
+``matches`` is a substring test, only a query's inner words must appear
+whole; its first word may be the end of a longer word and its last word the
+start of one. Title and description searches use the ``all`` postings (the
+text ``-f all`` searches), which contain every word of either field.
+
+Such partial words are looked up in the vocabulary rather than in the tasks:
+the words of the ``all`` postings are kept by padded trigram (see
+:mod:`final.fuzzy`, which uses them for ``search --fuzzy`` too), so the
+vocabulary words containing a query word of three or more characters are
+the intersection of its trigrams' word lists. Trigram postings per task
+would be several times the size of the store for the same answer.
+
+Date searches use postings keyed by the whole due-date text; a store has
+few distinct dates, so a substring query simply tests each of them.
+
+The BM25 statistics of ``search --rank`` (see :mod:`final.ranking`) are
+updated with the postings, and due dates are also kept as day ordinals in a
+sorted array, so a date range (``list --from/--to``) is two ``bisect`` calls
+and a slice.
+
+Full rewrites keep the index current by diffing the new task list against
+per-task fingerprints; log-mode appends are replayed from the log offset the
+index has reached. Anything else (a hand edit) makes it rebuild.
+
+The index lives only in memory. A one-shot CLI run has to load every task
+anyway, and scanning them costs less than reading a persisted index would
+(on 50,000 tasks, about 20 ms for the scan against 125 ms to unpickle the
+index), so only the server, which keeps the tasks resident, uses it. Binary and
+sharded stores can be read in part, and keep word postings on disk for
+one-shot runs instead (see :mod:`final.postings`).
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date
+import hashlib
+import os
+import re
+
+from . import fuzzy, ranking
+
+# search field -> postings it is answered from
+FIELDS = {"all": "all", "title": "all", "description": "all", "summary": "summary",
+          "date": "due_date", "due_date": "due_date"}
+# Postings are 32-bit; stores with other ids are not indexed.
+_ID_LIMIT = 2 ** 32
+
+_WORD = re.compile(r"\w+")
+
+
+def enabled() -> bool:
+    return not os.environ.get("FINAL_NO_INDEX")
+
+
+def indexed(field) -> bool:
+    return field in FIELDS
+
+
+def _texts(task):
+    # Exactly the strings matches() tests for "all", "summary" and "date".
+    return (
+        f"{task.get('title', '')} {task.get('description', '')}".lower(),
+        (task.get("summary") or "").lower(),
+        str(task.get("due_date") or "").lower(),
+    )
+
+
+def task_words(task):
+    """The distinct words of ``task``'s ``all`` and ``summary`` texts, as the
+    postings hold them."""
+    all_text, summary, _ = _texts(task)
+    return set(_WORD.findall(all_text)), set(_WORD.findall(summary))
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _post(postings, key, tid):
+    ids = postings.get(key)
+    if ids is None:
+        postings[key] = array("I", (tid,))
+    else:
+        ids.append(tid)
+
+
+def _ordinal(due):
+    try:
+        return date.fromisoformat(due).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _fingerprint(texts) -> int:
+    digest = hashlib.blake2b("\0".join(texts).encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class TextIndex:
+    """Word postings for the ``all`` and ``summary`` texts of every task and
+    postings by due-date text."""
+
+    def __init__(self):
+        self.postings = {"all": {}, "summary": {}, "due_date": {}}
+        # padded trigram -> words of the "all" postings containing it
+        self.word_grams = {}
+        self.rank = ranking.RankStats()
+        self.fingerprints = {}
+        # id -> the task dict last indexed. Writes replace task dicts instead
+        # of changing them, so the same object means nothing to re-index.
+        self.indexed = {}
+        self.stale = 0  # superseded entries still in the postings
+        # id -> due day ordinal, and (ordinal, id) pairs sorted by ordinal;
+        # pairs whose ordinal no longer matches `due` are stale.
+        self.due = {}
+        self.due_ords = array("i")
+        self.due_ids = array("I")
+        self._due_pending = []
+        # What the index reflects: the snapshot files' identity and how far
+        # into the operation log it has read.
+        self.source = None
+        self.log_inode = None
+        self.log_offset = 0
+
+    @classmethod
+    def build(cls, tasks):
+        """Index ``tasks``; None if their ids are not unique 32-bit ints."""
+        idx = cls()
+        return idx if idx.sync(tasks) else None
+
+    def add(self, task) -> bool:
+        tid = task.get("id")
+        if not isinstance(tid, int) or isinstance(tid, bool) or not 0 <= tid < _ID_LIMIT:
+            return False
+        if self.indexed.get(tid) is task:
+            return True
+        self.indexed[tid] = task
+        texts = _texts(task)
+        fp = _fingerprint(texts)
+        old = self.fingerprints.get(tid)
+        if old == fp:
+            return True
+        if old is not None:
+            self.stale += 1
+        self.fingerprints[tid] = fp
+        self.rank.add(tid, task)
+        all_text, summary, due = texts
+        post = self.postings["all"]
+        for word in set(_WORD.findall(all_text)):
+            if word not in post:
+                for gram in fuzzy.grams(word):
+                    self.word_grams.setdefault(gram, []).append(word)
+            _post(post, word, tid)
+        for word in set(_WORD.findall(summary)):
+            _post(self.postings["summary"], word, tid)
+        _post(self.postings["due_date"], due, tid)
+        o = _ordinal(task.get("due_date"))
+        if o is None:
+            self.due.pop(tid, None)
+        elif self.due.get(tid) != o:
+            self.due[tid] = o
+            self._due_pending.append((o, tid))
+        return True
+
+    def remove(self, tid):
+        self.indexed.pop(tid, None)
+        if self.fingerprints.pop(tid, None) is not None:
+            self.stale += 1
+            self.due.pop(tid, None)
+            self.rank.remove(tid)
+
+    def _merge_due(self):
+        if not self._due_pending:
+            return
+        due = self.due
+        pairs = sorted(p for p in set(zip(self.due_ords, self.due_ids)).union(self._due_pending)
+                       if due.get(p[1]) == p[0])
+        self.due_ords = array("i", (o for o, _ in pairs))
+        self.due_ids = array("I", (tid for _, tid in pairs))
+        self._due_pending = []
+
+    def due_between(self, lo, hi):
+        """Ids of the tasks due in ``[lo, hi]`` (day ordinals; None leaves
+        that end open). Exact, not a superset."""
+        self._merge_due()
+        i = 0 if lo is None else bisect_left(self.due_ords, lo)
+        j = len(self.due_ords) if hi is None else bisect_right(self.due_ords, hi)
+        due = self.due
+        return {tid for o, tid in zip(self.due_ords[i:j], self.due_ids[i:j]) if due.get(tid) == o}
+
+    def sync(self, tasks) -> bool:
+        """Bring the index in line with the complete task list ``tasks``.
+
+        Only tasks whose indexed text changed are re-tokenized. Returns
+        False if the list cannot be indexed (missing or repeated ids).
+        """
+        seen = set()
+        for t in tasks:
+            if t.get("id") in seen or not self.add(t):
+                return False  # ids must be unique for id -> date lookups
+            seen.add(t.get("id"))
+        for tid in [i for i in self.fingerprints if i not in seen]:
+            self.remove(tid)
+        return True
+
+    def apply(self, records) -> bool:
+        """Apply operation-log records (see :mod:`final.oplog`)."""
+        for rec in records:
+            op = rec.get("op")
+            if op == "add":
+                if not self.add(rec["task"]):
+                    return False
+            elif op == "done":
+                for tid in rec.get("ids", [rec.get("id")]):
+                    self.remove(tid)
+        return True
+
+    def worn(self) -> bool:
+        """True once superseded entries outnumber live tasks."""
+        return self.stale > max(1024, len(self.fingerprints))
+
+    def candidates(self, query, field, exact=False):
+        """Ids that may match ``matches(task, query, field, exact)``.
+
+        A superset of the real matches, or None when the index cannot narrow
+        the search (the caller then scans).
+        """
+        keys = self._keys(query, field, exact)
+        if keys is None:
+            return None
+        post = self.postings[FIELDS[field]]
+        result = None
+        for alternatives in keys:
+            ids = set()
+            for k in alternatives:
+                ids.update(post[k])
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result
+
+    def estimate(self, query, field, exact=False):
+        """Upper bound on ``len(candidates(...))`` from posting sizes alone,
+        or None when the index cannot narrow the search."""
+        keys = self._keys(query, field, exact)
+        if keys is None:
+            return None
+        post = self.postings[FIELDS[field]]
+        return min(sum(len(post[k]) for k in alternatives) for alternatives in keys)
+
+    def _keys(self, query, field, exact):
+        """Posting keys for ``query``: one list of alternatives per part that
+        must match, or None when nothing narrows the search."""
+        if field not in FIELDS:
+            return None
+        q = str(query).lower()
+        name = FIELDS[field]
+        post = self.postings[name]
+        if name == "due_date":
+            return [[k for k in post if (k == q if exact else q in k)]]
+        keys = list(ranking.word_keys(post, q, exact, self.words_containing if name == "all" else None))
+        return keys or None
+
+    def words_containing(self, word):
+        """Words of the ``all`` postings that may contain ``word`` (all of
+        them for words under three characters)."""
+        grams = sorted((self.word_grams.get(g, ()) for g in _trigrams(word)), key=len)
+        if not grams:
+            return self.postings["all"]
+        words = set(grams[0])
+        for more in grams[1:]:
+            if not words:
+                break
+            words.intersection_update(more)
+        return words
+
+    def estimate_due(self, lo, hi) -> int:
+        """Upper bound on ``len(due_between(lo, hi))``."""
+        self._merge_due()
+        i = 0 if lo is None else bisect_left(self.due_ords, lo)
+        j = len(self.due_ords) if hi is None else bisect_right(self.due_ords, hi)
+        return max(0, j - i)
+
+    def similar_words(self, word, limit):
+        """``{indexed word: distance}`` for the words of the ``all`` postings
+        within edit distance ``limit`` of ``word``."""
+        post = self.postings["all"]
+        grams = fuzzy.grams(word)
+        need = len(grams) - 3 * limit
+        if need <= 0:
+            words = [w for w in post if abs(len(w) - len(word)) <= limit]
+        else:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.word_grams.get(gram, ()))
+            words = [w for w, n in shared.items() if n >= need]
+        found = {}
+        for w in words:
+            d = fuzzy.distance(word, w, limit)
+            if d is not None:
+                found[w] = d
+        return found
+
+    def fuzzy_bounds(self, query_words, limits):
+        """``{id: score}`` for the tasks that have a close word for every
+        query word. Postings of edited tasks still hold their old words, so
+        a score may be too low, never too high."""
+        bounds = None
+        for q, limit in zip(query_words, limits):
+            best = {}
+            for w, d in self.similar_words(q, limit).items():
+                for tid in self.postings["all"][w]:
+                    if d < best.get(tid, limit + 1):
+                        best[tid] = d
+            if bounds is None:
+                bounds = best
+            else:
+                bounds = {tid: s + best[tid] for tid, s in bounds.items() if tid in best}
+            if not bounds:
+                break
+        return {tid: s for tid, s in (bounds or {}).items() if tid in self.fingerprints}
@@ -0,0 +1,90 @@
+import json
+import sys
+import pytest
+import final
+from final import agenda, build_agenda, load_tasks, main, render, save_tasks
+
+
+def _tasks():
+    return [
+        {"id": 1, "title": "Essay", "description": "", "due_date": "2025-11-03"},
+        {"id": 2, "title": "Lab", "description": "report", "due_date": "2025-11-01"},
+        {"id": 3, "title": "Someday", "description": "", "due_date": None},
+        {"id": 4, "title": "Quiz", "description": "", "due_date": "2025-11-03", "summary": "ch. 4"},
+        {"id": 5, "title": "Odd", "description": "", "due_date": "soon"},
+    ]
+
+
+def _expected(capsys):
+    groups, no_date = build_agenda(load_tasks())
+    with render.Output(sys.stdout) as out:
+        render.agenda(out, groups + [(None, no_date)])
+    return capsys.readouterr().out
+
+
+def _listed(capsys, *extra):
+    main(["list", *extra])
+    return capsys.readouterr().out
+
+
+def test_view_moves_only_changed_tasks():
+    view = agenda.Agenda.build(_tasks())
+    assert view.keys() == ["2025-11-01", "2025-11-03", "soon", None]
+    view.add({"id": 1, "title": "Essay", "description": "", "due_date": "2025-10-30"})
+    view.remove(2)
+    assert [(d, len(lines)) for d, lines in view.groups()] == [("2025-10-30", 1), ("2025-11-03", 1), ("soon", 1), (None, 1)]
+    assert agenda.Agenda.build(_tasks() + [{"id": 1, "title": "Twice"}]) is None
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary"])
+def test_list_is_read_from_the_view_kept_by_writes(tmp_path, monkeypatch, capsys, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    monkeypatch.setenv("FINAL_NO_CACHE", "1")
+    save_tasks(_tasks())
+    assert _listed(capsys) == _expected(capsys)
+    assert agenda.agenda_path(fake_file).exists()
+
+    main(["add", "Read", "ch 5", "--due", "2025-11-02"])
+    main(["update", "1", "--due", "2025-11-01"])
+    main(["update", "3", "--summary", "whenever"])
+    main(["done", "4"])
+    capsys.readouterr()
+    expected = _expected(capsys)
+
+    real_load = final.load_tasks
+    monkeypatch.setattr("final.load_tasks", lambda *a, **k: pytest.fail("list rebuilt the view"))
+    assert _listed(capsys) == expected
+    monkeypatch.setattr("final.load_tasks", real_load)
+
+    # A hand edit is noticed and the view rebuilt.
+    final.agenda.invalidate(fake_file)
+    assert _listed(capsys) == expected
+
+
+def test_list_pages(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    save_tasks(_tasks())
+    assert _listed(capsys, "--limit", "2") == "2025-11-01\n- [2] Lab : report\n\n2025-11-03\n- [1] Essay : \n\n"
+    assert _listed(capsys, "--limit", "2", "--page", "2") == "2025-11-03\n- [4] Quiz : ch. 4\n\nsoon\n- [5] Odd : \n\n"
+    assert _listed(capsys, "--limit", "2", "--page", "3") == "No due date:\n- [3] Someday : \n"
+    assert _listed(capsys, "--limit", "2", "--page", "4") == ""
+    assert _listed(capsys, "--page", "2") == "--page needs --limit\n"
+    for bad in (["--limit", "1", "--page", "0"], ["--limit", "1", "--page", "-1"], ["--limit", "0"]):
+        with pytest.raises(SystemExit):
+            main(["list", *bad])
+        assert "must be at least 1" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+def test_every_list_path_orders_alike(tmp_path, monkeypatch, capsys, mode):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    dues = {9: None, 4: "zz", 7: "2025-11-01", 2: None, 5: "later", 1: "2025-11-01", 8: "aa"}
+    save_tasks([{"id": i, "title": f"T{i}", "description": "", "due_date": d} for i, d in dues.items()])
+    expected = [1, 7, 8, 5, 4, 2, 9]
+    table = lambda out: [int(line[3:line.index("]")]) for line in out.splitlines() if line.startswith("- [")]
+    assert table(_listed(capsys)) == expected
+    assert table(_listed(capsys, "--external")) == expected
+    assert [json.loads(line)["id"] for line in _listed(capsys, "--format", "ndjson").splitlines()] == expected
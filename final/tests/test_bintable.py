@@ -0,0 +1,52 @@
+from final import load_tasks, save_tasks, main, bintable
+
+TASKS = [
+    {"id": 3, "title": "Essay", "description": "draft", "due_date": "2025-12-01"},
+    {"id": 1, "title": "HW1", "description": "Chapter 1", "due_date": "2025-11-30", "summary": "ch1"},
+    {"id": 2, "title": "Reading", "description": "", "due_date": "2025-11-30"},
+    {"id": 4, "title": "Someday", "description": None},
+]
+
+
+def _run(monkeypatch, tmp_path, mode, argv, capsys):
+    fake_file = tmp_path / mode / "tasks.json"
+    fake_file.parent.mkdir(exist_ok=True)
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    save_tasks(TASKS)
+    capsys.readouterr()
+    main(argv)
+    return capsys.readouterr().out
+
+
+def test_table_round_trip(tmp_path):
+    path = bintable.write_table(tmp_path / "tasks.bin", TASKS)
+    table = bintable.open_table(path)
+    assert len(table) == 4
+    assert list(table) == TASKS
+    assert list(table.ids()) == [3, 1, 2, 4]
+    assert table.field(1, "summary") == "ch1"
+    assert table.max_id() == 4
+    table.close()
+
+
+def test_binary_mode_matches_json_output(tmp_path, monkeypatch, capsys):
+    for argv in (["list"], ["search", "-q", "11-30", "-f", "date"], ["search", "-q", "2", "-f", "id"],
+                 ["search", "-q", "essay", "-f", "title"]):
+        expected = _run(monkeypatch, tmp_path, "json", argv, capsys)
+        assert _run(monkeypatch, tmp_path, "binary", argv, capsys) == expected
+
+
+def test_binary_mode_add_and_done(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", "binary")
+
+    assert main(["add", "HW1", "Chapter 1", "--due", "2025-11-30"]) == 0
+    assert main(["add", "HW2", "--due", "2025-12-30"]) == 0
+    assert main(["done", "1"]) == 0
+
+    tasks = load_tasks()
+    assert isinstance(tasks, bintable.MappedTaskTable)
+    assert [t["title"] for t in tasks] == ["HW2"]
+    assert bintable.table_path(fake_file).exists()
@@ -0,0 +1,46 @@
+import pytest
+from final import durable, load_tasks, main, save_tasks
+
+
+def _seed():
+    save_tasks([{"id": i, "title": f"HW{i}", "description": "calc" if i % 2 else "essay",
+                 "due_date": f"2025-{10 + i % 3}-1{i % 10}"} for i in range(1, 13)])
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+def test_done_many_ids_ranges_and_predicates(tmp_path, monkeypatch, capsys, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    _seed()
+    before = durable.STATS["writes"]
+    assert main(["done", "1", "3", "5-7"]) == 0
+    if mode in ("json", "binary"):
+        assert durable.STATS["writes"] - before == 1
+    assert "Removed 5 tasks: 1, 3, 5, 6, 7" in capsys.readouterr().out
+    assert main(["done", "-q", "essay", "-f", "description", "--due-before", "2025-11-15"]) == 0
+    # Even ids left: 2 (12-12), 4 (11-14), 8 (12-18), 10 (11-10), 12 (10-12)
+    assert sorted(t["id"] for t in load_tasks()) == [2, 8, 9, 11]
+    assert main(["done", "9", "40"]) == 1
+    assert capsys.readouterr().out.splitlines()[-2:] == ["No task with id 40", "Removed task 9"]
+    assert main(["done"]) == 1
+    assert main(["done", "-q", "nothing"]) == 1
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+def test_update_selected_tasks(tmp_path, monkeypatch, capsys, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    _seed()
+    assert main(["update", "1-4", "--due", "2026-01-05", "--summary", "moved"]) == 0
+    assert "Updated 4 tasks: 1, 2, 3, 4" in capsys.readouterr().out
+    assert main(["update", "2", "--summary", ""]) == 0
+    by_id = {t["id"]: dict(t) for t in load_tasks()}
+    assert len(by_id) == 12
+    assert by_id[1] == {"id": 1, "title": "HW1", "description": "calc", "due_date": "2026-01-05", "summary": "moved"}
+    assert "summary" not in by_id[2] and by_id[2]["due_date"] == "2026-01-05"
+    assert by_id[5]["due_date"] == "2025-12-15"
+    assert main(["update", "1"]) == 1
+    assert main(["update", "99", "--title", "x"]) == 1
+    assert main(["update", "1", "--due", "tomorrow"]) == 1
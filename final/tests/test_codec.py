@@ -0,0 +1,38 @@
+import pytest
+from final import load_tasks, save_tasks, main, codec
+
+
+def _tasks(n):
+    return [
+        {"id": i, "title": f"Homework {i}", "description": "Read chapter and answer questions " * 3,
+         "due_date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "summary": None if i % 2 else "short"}
+        for i in range(1, n + 1)
+    ]
+
+
+@pytest.mark.parametrize("name", codec.CODECS)
+def test_round_trip_and_detection(name):
+    tasks = _tasks(50) + [{"id": -5, "title": "ünïcode ✓", "big": 2**40, "f": 1.5, "ok": True}]
+    raw = codec.encode(tasks, name)
+    assert codec.detect(raw) == name
+    assert codec.decode(raw) == tasks
+
+
+def test_save_keeps_file_codec(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([])
+    assert main(["--codec", "binary", "add", "HW1", "--due", "2025-11-30"]) == 0
+    assert fake_file.read_bytes().startswith(codec.MAGIC)
+
+    # Later writes without --codec keep the binary encoding.
+    assert main(["add", "HW2", "--due", "2025-11-30"]) == 0
+    assert codec.detect_file(fake_file) == "binary"
+    assert [t["title"] for t in load_tasks()] == ["HW1", "HW2"]
+
+
+def test_codec_sizes():
+    tasks = _tasks(2000)
+    sizes = {name: len(codec.encode(tasks, name)) for name in codec.CODECS}
+    assert sizes["compact"] < sizes["pretty"]
+    assert sizes["binary"] < sizes["compact"]
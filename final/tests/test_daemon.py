@@ -0,0 +1,79 @@
+import pytest
+import threading
+import final
+from final import daemon, load_tasks, main, save_tasks
+
+
+def _start_server(sock, monkeypatch):
+    monkeypatch.setattr("final._resident", {})
+    ready = threading.Event()
+    t = threading.Thread(target=daemon.serve, args=(sock, final._serve_request, ready.set), daemon=True)
+    t.start()
+    assert ready.wait(5)
+    return t
+
+
+def test_server_answers_forwarded_commands(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    sock = tmp_path / "s.sock"
+    server = _start_server(sock, monkeypatch)
+
+    r = daemon.forward(sock, ["add", "Write", "report", "--due", "2025-11-30"])
+    assert r["rc"] == 0 and "Task added" in r["out"]
+    assert "Write" in daemon.forward(sock, ["list"])["out"]
+
+    # A write that bypasses the server is picked up on the next request.
+    final._resident, kept = None, final._resident
+    save_tasks(load_tasks() + [{"id": 50, "title": "Outside", "due_date": "2025-12-01"}])
+    final._resident = kept
+    out = daemon.forward(sock, ["list"])["out"]
+    assert "Write" in out and "Outside" in out
+
+    assert daemon.forward(sock, ["done", "abc"])["out"].strip() == "Invalid id: abc"
+    assert daemon.forward(sock, ["search", "-q", "x", "-f", "nope"])["rc"] == 2
+
+    assert daemon.stop(sock)
+    server.join(5)
+    assert not sock.exists()
+    assert daemon.forward(sock, ["list"]) is None
+
+
+def test_main_forwards_only_when_a_server_answers(tmp_path, monkeypatch, capsys):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    sent = []
+
+    def fake_forward(sock, argv):
+        sent.append(argv)
+        return {"rc": 3, "out": "from server\n", "err": ""}
+    monkeypatch.setattr("final.daemon.forward", fake_forward)
+    assert main(["list"]) == 3
+    assert capsys.readouterr().out == "from server\n"
+    # Prompting for a due date needs the caller's terminal.
+    monkeypatch.setattr("builtins.input", lambda _: "2025-11-30")
+    assert main(["add", "Local"]) == 0
+    # The command is read before the parser is built; unclear argv runs here.
+    assert main(["--storage=log", "search", "-q", "x"]) == 3
+    assert main(["add", "Remote", "--due", "2025-11-30"]) == 3
+    assert main(["--stor", "json", "list"]) == 0
+    assert sent == [["list"], ["--storage=log", "search", "-q", "x"], ["add", "Remote", "--due", "2025-11-30"]]
+
+    monkeypatch.setattr("final.daemon.forward", lambda sock, argv: None)
+    assert main(["list"]) == 0
+    assert "Local" in capsys.readouterr().out
+
+
+def test_forwarded_env_reaches_the_command(tmp_path, monkeypatch):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    monkeypatch.setattr("final._resident", {})
+    save_tasks([{"id": 1, "title": "Essay", "description": "", "due_date": "2025-11-30"}])
+    budgets = []
+    real = final.extsort.sorted_stream
+    monkeypatch.setattr("final.extsort.sorted_stream", lambda *a: budgets.append(final.extsort.memory_budget()) or real(*a))
+    r = final._serve_request(["list", "--external"], {"FINAL_SORT_MEMORY": "2"})
+    assert r["rc"] == 0 and "Essay" in r["out"] and budgets == [2 << 20]
+
+    monkeypatch.setattr("final.textindex.TextIndex.build", lambda tasks: pytest.fail("indexed with FINAL_NO_INDEX"))
+    r = final._serve_request(["search", "-q", "essay"], {"FINAL_NO_INDEX": "1"})
+    assert r["rc"] == 0 and "Essay" in r["out"]
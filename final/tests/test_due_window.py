@@ -0,0 +1,60 @@
+import io
+import json
+import contextlib
+from datetime import date
+import pytest
+from final import main, save_tasks
+
+
+def _run(argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        rc = main(argv)
+    return rc, out.getvalue()
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+def test_list_and_search_by_due_window(tmp_path, monkeypatch, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setattr("final._today", lambda: date(2025, 11, 20))
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    save_tasks([
+        {"id": 1, "title": "Old essay", "description": "", "due_date": "2025-11-02"},
+        {"id": 2, "title": "Lab", "description": "", "due_date": "2025-11-21"},
+        {"id": 3, "title": "Essay draft", "description": "", "due_date": "2025-11-27"},
+        {"id": 4, "title": "Final", "description": "", "due_date": "2026-05-01"},
+        {"id": 5, "title": "Someday", "description": "", "due_date": None},
+        {"id": 6, "title": "Odd", "description": "", "due_date": "soon"},
+    ])
+    main(["--storage", mode, "add", "Quiz", "--due", "2025-11-20"])
+
+    rc, out = _run(["list", "--due-within", "7"])
+    assert rc == 0
+    assert out.split("\n\n")[0].splitlines() == ["2025-11-20", "- [7] Quiz : "]
+    assert "Lab" in out and "Essay draft" in out and "Final" not in out and "No due date" not in out
+
+    rc, out = _run(["search", "--overdue"])
+    assert [t["id"] for t in json.loads(out)] == [1]
+    rc, out = _run(["search", "-q", "essay", "--from", "2025-11-10", "--to", "2026-12-31"])
+    assert [t["id"] for t in json.loads(out)] == [3]
+    rc, out = _run(["search", "--from", "2026-01-01"])
+    assert [t["id"] for t in json.loads(out)] == [4]
+
+    assert _run(["list", "--from", "11/20/2025"]) == (1, "Invalid date format for --from. Use YYYY-MM-DD.\n")
+    assert _run(["search"])[0] == 1
+
+
+@pytest.mark.parametrize("mode", ["json", "log"])
+def test_windows_parse_dates_once_per_version(tmp_path, monkeypatch, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    save_tasks([{"id": i, "title": f"T{i}", "description": "", "due_date": f"2025-11-{i:02d}"} for i in range(30, 0, -1)])
+    main(["add", "Late", "--due", "2025-12-24"])
+    assert [t["id"] for t in json.loads(_run(["search", "--from", "2025-11-28"])[1])] == [30, 29, 28, 31]
+
+    # Later runs bisect the due column kept in the parse cache.
+    monkeypatch.setattr("final._due_ordinal", lambda task: pytest.fail("parsed a due date again"))
+    assert [t["id"] for t in json.loads(_run(["search", "--from", "2025-11-02", "--to", "2025-11-03"])[1])] == [3, 2]
+    assert "- [31] Late" in _run(["list", "--from", "2025-12-01"])[1]
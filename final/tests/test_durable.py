@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import pytest
+from final import load_tasks, save_tasks, main, batch, durable, oplog
+
+
+def test_atomic_write_leaves_no_temp_files(tmp_path):
+    target = tmp_path / "tasks.json"
+    durable.atomic_write(target, "[]")
+    durable.atomic_write(target, '[{"id": 1}]')
+    assert json.loads(target.read_text(encoding="utf-8")) == [{"id": 1}]
+    assert [p.name for p in tmp_path.iterdir()] == ["tasks.json"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fchmod"), reason="no POSIX permissions")
+def test_atomic_write_keeps_permissions(tmp_path):
+    target = tmp_path / "tasks.json"
+    umask = os.umask(0o022)
+    try:
+        durable.atomic_write(target, "[]")
+        assert target.stat().st_mode & 0o777 == 0o644
+        target.chmod(0o664)
+        durable.atomic_write(target, '[{"id": 1}]')
+        assert target.stat().st_mode & 0o777 == 0o664
+    finally:
+        os.umask(umask)
+
+
+def test_batch_flushes_once(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([])
+    before = dict(durable.STATS)
+
+    with batch():
+        for i in range(5):
+            assert main(["add", f"HW{i}", "--due", "2025-11-30"]) == 0
+        # Reads inside the batch see the staged adds; the file does not yet.
+        assert len(load_tasks()) == 5
+        assert json.loads(fake_file.read_text(encoding="utf-8")) == []
+
+    assert durable.STATS["writes"] - before["writes"] == 1
+    assert [t["id"] for t in load_tasks()] == [1, 2, 3, 4, 5]
+
+
+def test_batch_discards_on_error(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([])
+    try:
+        with batch():
+            main(["add", "HW", "--due", "2025-11-30"])
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert load_tasks() == []
+
+
+def test_log_mode_batch_fsyncs_once(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", "log")
+    save_tasks([])
+    before = durable.STATS["fsyncs"]
+    with batch():
+        for i in range(10):
+            main(["add", f"HW{i}", "--due", "2025-11-30"])
+    # One for the log, one for the id sequence.
+    assert durable.STATS["fsyncs"] - before == 2
+    assert len(oplog.log_path(fake_file).read_text(encoding="utf-8").splitlines()) == 10
+
+
+def test_batch_command_reads_stdin(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setattr("sys.stdin", io.StringIO(
+        'add "Essay 1" --due 2025-11-30\n'
+        "# comment\n"
+        "add Broken --due nope\n"
+        "add Reading --due 2025-12-01\n"
+    ))
+    assert main(["batch"]) == 1
+    assert [t["title"] for t in load_tasks()] == ["Essay 1", "Reading"]
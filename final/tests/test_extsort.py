@@ -0,0 +1,43 @@
+import json
+import pytest
+from final import extsort, main, save_tasks
+
+
+def _tasks():
+    tasks = []
+    for i in range(60):
+        due = [None, "2025-11-03", "2025-11-01", "", "someday", "2025-10-30", "2025-11-01"][i % 7]
+        tasks.append({"id": (i * 37) % 61, "title": f"Task {i}", "description": "x" * (i % 5), "due_date": due})
+    return tasks
+
+
+def test_sorted_stream_spills_runs_and_merges_them():
+    items = [{"n": (i * 7919) % 1000} for i in range(1000)]
+    with extsort.sorted_stream(iter(items), lambda t: t["n"], memory=2000) as ordered:
+        assert [t["n"] for t in ordered] == sorted(t["n"] for t in items)
+    with extsort.sorted_stream(iter([]), lambda t: t, memory=10) as ordered:
+        assert list(ordered) == []
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+@pytest.mark.parametrize("extra", [[], ["--format", "ndjson"], ["--limit", "7", "--page", "3"], ["--to", "2025-11-02"]])
+def test_external_list_matches_list(tmp_path, monkeypatch, capsys, mode, extra):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    monkeypatch.setenv("FINAL_NO_CACHE", "1")
+    save_tasks(_tasks())
+    main(["list", *extra])
+    expected = capsys.readouterr().out
+    # About 2 KiB: a handful of tasks per run and several merge passes.
+    main(["list", "--external", "--memory", "0.002", *extra])
+    assert capsys.readouterr().out == expected
+    assert expected
+
+
+def test_external_list_json(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    monkeypatch.setenv("FINAL_SORT_MEMORY", "0.001")
+    save_tasks(_tasks())
+    main(["list", "--external", "--format", "json"])
+    ids = [t["id"] for t in json.loads(capsys.readouterr().out)]
+    assert sorted(ids) == sorted(t["id"] for t in _tasks())
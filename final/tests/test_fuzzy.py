@@ -0,0 +1,57 @@
+import json
+import pytest
+import final
+from final import fuzzy, main, save_tasks
+
+
+def test_bounded_distance():
+    assert fuzzy.distance("homwork", "homework", 2) == 1
+    assert fuzzy.distance("kitten", "sitting", 3) == 3
+    assert fuzzy.distance("kitten", "sitting", 2) is None
+    assert fuzzy.distance("ab", "abcd", 1) is None
+    assert fuzzy.default_distance("is") == 0 and fuzzy.default_distance("essay") == 1
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+@pytest.mark.parametrize("no_index", ["", "1"])
+def test_fuzzy_search_ranks_by_typos(tmp_path, monkeypatch, capsys, mode, no_index):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    monkeypatch.setenv("FINAL_NO_INDEX", no_index)
+    monkeypatch.setattr("final._resident", {})  # as inside `final serve`
+    save_tasks([
+        {"id": 1, "title": "Homework 1", "description": "math", "due_date": "2025-11-01"},
+        {"id": 2, "title": "Homeworks", "description": "physics lab", "due_date": "2025-11-02"},
+        {"id": 3, "title": "Essay", "description": "history", "due_date": "2025-11-03"},
+        {"id": 4, "title": "Hamewerk", "description": "math", "due_date": "2025-11-04"},
+    ])
+    assert main(["search", "-q", "homwork", "--fuzzy"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [1, 2]
+    assert main(["search", "-q", "hamewerk math", "--fuzzy"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [4, 1]
+    assert main(["search", "-q", "hamewerk", "--fuzzy", "--distance", "3"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [4, 1, 2]
+    assert main(["search", "-q", "homwork", "--fuzzy", "--limit", "1", "-f", "title"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [1]
+    assert main(["search", "-q", "histry", "--fuzzy", "-f", "title"]) == 0
+    assert capsys.readouterr().out == "No tasks found.\n"
+
+
+def test_fuzzy_search_skips_words_edited_away(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([{"id": i, "title": f"Homework {i}", "description": "", "due_date": None} for i in range(1, 6)])
+    assert [t["id"] for t in final.fuzzy_search("homwork", k=3)] == [1, 2, 3]
+    main(["update", "1-2", "--title", "Reading"])
+    # The index still lists ids 1 and 2 under "homework"; they are rescored.
+    assert [t["id"] for t in final.fuzzy_search("homwork", k=3)] == [3, 4, 5]
+    assert [t["id"] for t in final.fuzzy_search("reding")] == [1, 2]
+
+
+def test_fuzzy_argument_errors(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    assert main(["search", "--fuzzy", "--overdue"]) == 1
+    assert main(["search", "-q", "x", "--fuzzy", "-f", "date"]) == 1
+    assert main(["search", "-q", "!!", "--fuzzy"]) == 1
+    assert "--fuzzy searches all, title, description" in capsys.readouterr().out
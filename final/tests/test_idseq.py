@@ -0,0 +1,49 @@
+import multiprocessing
+from final import load_tasks, save_tasks, main, idseq
+
+
+def test_ids_are_not_reused_after_done(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([{"id": 7, "title": "seeded"}])
+
+    main(["add", "A", "--due", "2025-11-30"])
+    main(["done", "8"])
+    main(["add", "B", "--due", "2025-11-30"])
+    assert [t["id"] for t in load_tasks()] == [7, 9]
+    assert idseq.current(fake_file) == 9
+
+
+def test_log_mode_add_never_reads_the_store(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", "log")
+    save_tasks([{"id": 1, "title": "old"}])
+    main(["add", "A", "--due", "2025-11-30"])  # seeds the sequence
+
+    def boom(*a, **k):
+        raise AssertionError("add should not load tasks")
+    monkeypatch.setattr("final.load_tasks", boom)
+    monkeypatch.setattr("final.iter_tasks", boom)
+    assert main(["add", "B", "--due", "2025-11-30"]) == 0
+
+
+def test_save_raises_sequence_past_written_ids(tmp_path):
+    path = tmp_path / "tasks.json"
+    assert idseq.allocate(path, lambda: 0) == 1
+    idseq.observe(path, lambda: 40)
+    assert idseq.allocate(path, lambda: 0, count=5) == 41
+    assert idseq.allocate(path, lambda: 0) == 46
+
+
+def _allocate_many(path):
+    return [idseq.allocate(path, lambda: 0) for _ in range(50)]
+
+
+def test_concurrent_allocators_get_distinct_ids(tmp_path):
+    path = tmp_path / "tasks.json"
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(4) as pool:
+        chunks = pool.map(_allocate_many, [path] * 4)
+    ids = [i for chunk in chunks for i in chunk]
+    assert sorted(ids) == list(range(1, 201))
@@ -0,0 +1,61 @@
+import json
+import pytest
+from final import durable, load_tasks, main, save_tasks
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+def test_import_csv_is_one_commit(tmp_path, monkeypatch, capsys, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    save_tasks([{"id": 4, "title": "old", "description": "", "due_date": "2025-11-01"}])
+    src = tmp_path / "rows.csv"
+    src.write_text("title,description,due_date,extra\n"
+                   "HW1,Read,2025-11-30,x\n"
+                   "\"HW2, part b\",,2025-12-01,\n"
+                   "Project,,,\n", encoding="utf-8")
+    before = durable.STATS["writes"]
+    assert main(["import", str(src)]) == 0
+    assert "Imported 3 tasks (ids 5-7)" in capsys.readouterr().out
+    if mode in ("json", "log", "binary"):
+        assert durable.STATS["writes"] - before == 1
+    tasks = sorted((dict(t) for t in load_tasks()), key=lambda t: t["id"])
+    assert tasks[1:] == [
+        {"id": 5, "title": "HW1", "description": "Read", "due_date": "2025-11-30"},
+        {"id": 6, "title": "HW2, part b", "description": "", "due_date": "2025-12-01"},
+        {"id": 7, "title": "Project", "description": "", "due_date": None},
+    ]
+
+
+def test_import_jsonl_reports_every_bad_row(tmp_path, monkeypatch, capsys):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    src = tmp_path / "rows.jsonl"
+    rows = [{"title": "A", "due": "2025-11-30", "summary": "short"}, {"title": "B", "due_date": "30/11/2025"},
+            {"description": "no title"}]
+    src.write_text("\n".join(json.dumps(r) for r in rows) + "\n{oops\n", encoding="utf-8")
+    assert main(["import", str(src)]) == 1
+    out = capsys.readouterr().out
+    assert "line 2: invalid due date '30/11/2025'" in out
+    assert "line 3: missing title" in out and "line 4: invalid JSON" in out
+    assert load_tasks() == []
+
+    assert main(["import", "--skip-invalid", str(src)]) == 0
+    assert load_tasks() == [{"id": 1, "title": "A", "description": "", "due_date": "2025-11-30", "summary": "short"}]
+
+
+def test_import_jsonl_rejects_fields_that_are_not_text(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    src = tmp_path / "rows.jsonl"
+    rows = [{"title": 2025, "description": ["a"]}, {"title": "B", "summary": {"x": 1}},
+            {"title": "C", "due_date": 20251130}, {"title": "D", "description": "ok"}]
+    src.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    assert main(["import", str(src)]) == 1
+    out = capsys.readouterr().out
+    assert "line 1: title must be text, not int" in out
+    assert "line 2: summary must be text, not dict" in out
+    assert "line 3: due_date must be text, not int" in out
+    assert main(["import", "--skip-invalid", str(src)]) == 0
+    assert [t["title"] for t in load_tasks()] == ["D"]
+    capsys.readouterr()
+    assert main(["search", "-q", "20", "-f", "title"]) == 0
@@ -0,0 +1,56 @@
+import contextlib
+import io
+import multiprocessing
+import pytest
+import final
+from final import load_tasks, lockfile, main, save_tasks
+
+
+def _add_many(path, mode, n):
+    final.find_tasks_file = lambda: path
+    final.STORAGE_MODE = mode
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(n):
+            assert main(["add", f"T{i}", "--due", "2025-11-30"]) == 0
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "sharded"])
+def test_concurrent_adders_lose_nothing(tmp_path, monkeypatch, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_NO_DAEMON", "1")
+    monkeypatch.setenv("FINAL_NO_CACHE", "1")
+    monkeypatch.setenv("FINAL_LOG_COMPACT_BYTES", "2000")  # compact while others append
+    monkeypatch.setattr("final.STORAGE_MODE", mode)
+    save_tasks([])
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_add_many, args=(fake_file, mode, 25)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    ids = sorted(t["id"] for t in load_tasks())
+    assert ids == list(range(1, 101))
+
+
+def test_stale_write_is_rejected(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([{"id": 1}])
+    seen = lockfile.version(fake_file)
+    save_tasks([{"id": 1}, {"id": 2}])  # another writer gets in first
+    with pytest.raises(lockfile.Conflict):
+        save_tasks([{"id": 1}, {"id": 3}], expect=seen)
+    assert [t["id"] for t in load_tasks()] == [1, 2]
+
+    calls = []
+
+    def change(tasks):
+        calls.append(len(tasks))
+        if len(calls) == 1:
+            save_tasks(tasks + [{"id": 9}])  # lands between read and write
+        return tasks + [{"id": 3}]
+    final.update_tasks(change)
+    assert calls == [2, 3]
+    assert [t["id"] for t in load_tasks()] == [1, 2, 9, 3]
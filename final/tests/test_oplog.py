@@ -0,0 +1,48 @@
+import json
+from final import load_tasks, save_tasks, main, oplog
+
+
+def test_log_mode_appends_instead_of_rewriting(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", "log")
+
+    save_tasks([{"id": 1, "title": "old", "description": "", "due_date": "2025-11-01"}])
+    snapshot = fake_file.read_text(encoding="utf-8")
+
+    assert main(["add", "HW2", "Chapter 2", "--due", "2025-11-30"]) == 0
+    assert main(["done", "1"]) == 0
+
+    # The snapshot is untouched; the log holds one line per operation.
+    assert fake_file.read_text(encoding="utf-8") == snapshot
+    lines = oplog.log_path(fake_file).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["op"] for l in lines] == ["add", "done"]
+
+    tasks = load_tasks()
+    assert [t["id"] for t in tasks] == [2]
+    assert tasks[0]["title"] == "HW2"
+
+
+def test_log_compacts_past_threshold(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", "log")
+    monkeypatch.setenv("FINAL_LOG_COMPACT_BYTES", "1")
+
+    assert main(["add", "HW1", "--due", "2025-11-30"]) == 0
+
+    assert not oplog.log_path(fake_file).exists()
+    assert json.loads(fake_file.read_text(encoding="utf-8"))[0]["title"] == "HW1"
+
+
+def test_replay_is_idempotent_and_skips_torn_tail(tmp_path):
+    fake_file = tmp_path / "tasks.json"
+    lp = oplog.log_path(fake_file)
+    lp.write_text(
+        '{"op":"add","task":{"id":1,"title":"a"}}\n'
+        '{"op":"add","task":{"id":1,"title":"a"}}\n'
+        '{"op":"add","task":{"id":2',
+        encoding="utf-8",
+    )
+    tasks = oplog.replay([{"id": 1, "title": "a"}], oplog.read_records(fake_file))
+    assert tasks == [{"id": 1, "title": "a"}]
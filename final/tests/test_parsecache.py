@@ -0,0 +1,52 @@
+import os
+from final import load_tasks, save_tasks, main, parsecache, codec
+
+
+def test_list_is_served_from_cache_until_file_changes(tmp_path, monkeypatch, capsys):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([{"id": 2, "title": "B", "description": "", "due_date": "2025-12-01"},
+                {"id": 1, "title": "A", "description": "", "due_date": "2025-11-30"}])
+    main(["list"])
+    first = capsys.readouterr().out
+    assert parsecache.cache_path(fake_file).exists()
+
+    calls = []
+    real_decode = codec.decode
+    monkeypatch.setattr(codec, "decode", lambda *a, **k: calls.append(1) or real_decode(*a, **k))
+    main(["list"])
+    assert capsys.readouterr().out == first
+    main(["search", "-q", "A", "-f", "title"])
+    assert calls == []
+
+    # save_tasks drops the cache; the next read parses again.
+    main(["add", "C", "--due", "2025-11-01"])
+    assert not parsecache.cache_path(fake_file).exists()
+    capsys.readouterr()
+    main(["list"])  # answered from the agenda view the add kept current
+    assert capsys.readouterr().out.startswith("2025-11-01\n- [3] C")
+    assert [t["title"] for t in load_tasks()] == ["B", "A", "C"]
+    assert calls
+
+
+def test_external_edit_invalidates_cache(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([{"id": 1, "title": "A"}])
+    assert [t["title"] for t in load_tasks()] == ["A"]
+
+    # Same size, same mtime: only the content hash tells them apart.
+    st = os.stat(fake_file)
+    fake_file.write_text(fake_file.read_text().replace('"A"', '"Z"'))
+    os.utime(fake_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert [t["title"] for t in load_tasks()] == ["Z"]
+
+
+def test_log_append_invalidates_cache(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", "log")
+    save_tasks([])
+    assert load_tasks() == []
+    main(["add", "HW", "--due", "2025-11-30"])
+    assert [t["title"] for t in load_tasks()] == ["HW"]
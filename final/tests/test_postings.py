@@ -0,0 +1,94 @@
+import io
+import json
+import random
+import contextlib
+import pytest
+import final
+from final import main, postings, save_tasks, shards
+
+
+def _run(argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        main(argv)
+    text = out.getvalue()
+    return [] if text.startswith("No tasks") else json.loads(text)
+
+
+def _store(tmp_path, monkeypatch, mode, n=120):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    monkeypatch.setenv("FINAL_NO_CACHE", "1")  # compare the work, not cached output
+    rng = random.Random(3)
+    words = ["read", "chapter", "essay", "lab-report", "Calc", "homework", "über", "x2"]
+    save_tasks([{"id": i, "title": " ".join(rng.sample(words, 2)),
+                 "description": " ".join(rng.sample(words, 3)),
+                 "due_date": f"20{rng.choice([24, 25, 26])}-{rng.randint(1, 12):02d}-10",
+                 **({"summary": rng.choice(words)} if i % 3 == 0 else {})} for i in range(1, n)])
+    return fake_file
+
+
+def _sidecars(tmp_path):
+    return sorted(p.name for p in tmp_path.rglob("*" + postings.SUFFIX))
+
+
+@pytest.mark.parametrize("mode", ["binary", "sharded"])
+def test_one_shot_postings_answer_like_the_scan(tmp_path, monkeypatch, mode):
+    _store(tmp_path, monkeypatch, mode)
+    queries = [("read", "all"), ("ead cha", "all"), ("ssay", "title"), ("lab-rep", "description"),
+               ("CALC", "all"), ("work", "summary"), ("-", "all"), ("über x", "all"), ("nothing", "all")]
+    wheres = ["title:essay", "description:calc title:read", "summary:work -title:x2", "all=homework"]
+
+    def check():
+        for q, f in queries:
+            for exact in ([], ["--exact"]):
+                argv = ["search", "-q", q, "-f", f, "--limit", "500"] + exact
+                got = _run(argv)
+                monkeypatch.setenv("FINAL_NO_INDEX", "1")
+                assert got == _run(argv), (q, f, exact)
+                monkeypatch.delenv("FINAL_NO_INDEX")
+        for where in wheres:
+            argv = ["search", "--where", where, "--limit", "500"]
+            got = _run(argv)
+            monkeypatch.setenv("FINAL_NO_INDEX", "1")
+            assert got == _run(argv), where
+            monkeypatch.delenv("FINAL_NO_INDEX")
+
+    check()
+    assert _sidecars(tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        main(["add", "Read more", "essay draft", "--due", "2025-12-01"])
+        main(["done", "3", "10-20"])
+        main(["update", "-q", "calc", "--title", "Physics", "--summary", "lab work"])
+    check()
+
+
+def test_stale_postings_are_rebuilt(tmp_path, monkeypatch):
+    _store(tmp_path, monkeypatch, "binary")
+    assert _run(["search", "-q", "zebra"]) == []
+    with contextlib.redirect_stdout(io.StringIO()):
+        main(["add", "Zebra", "stripes", "--due", "2026-05-01"])
+    assert [t["title"] for t in _run(["search", "-q", "zebra"])] == ["Zebra"]
+
+
+def test_shards_without_candidates_are_not_read(tmp_path, monkeypatch):
+    _store(tmp_path, monkeypatch, "sharded")
+    with contextlib.redirect_stdout(io.StringIO()):
+        main(["add", "Zebra", "stripes", "--due", "2026-05-01"])
+    _run(["search", "-q", "zebra"])  # builds the postings
+    read = []
+    real = shards.read_shard_stat
+    monkeypatch.setattr("final.shards.read_shard_stat", lambda d, key: read.append(key) or real(d, key))
+    assert [t["title"] for t in _run(["search", "-q", "zebra"])] == ["Zebra"]
+    assert read == ["2026-05"]
+
+
+def test_explain_shows_the_postings_path(tmp_path, monkeypatch, capsys):
+    _store(tmp_path, monkeypatch, "binary")
+    assert final._resident is None
+    _run(["search", "--where", "title:homework", "--explain"])
+    err = capsys.readouterr().err
+    assert "Plan: word postings for title:homework" in err
+    scanned = int(err.split("Scanned ")[1].split()[0])
+    assert 0 < scanned < 119
@@ -0,0 +1,74 @@
+import json
+import pytest
+import final
+from final import main, query, save_tasks
+
+
+def _tasks():
+    return [
+        {"id": i, "title": f"Essay {i}" if i % 10 == 0 else f"Homework {i}", "description": "read",
+         "due_date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", **({"summary": "draft"} if i % 20 == 0 else {})}
+        for i in range(1, 301)
+    ] + [{"id": 301, "title": "Essay undated", "description": "", "due_date": None}]
+
+
+def test_parse_terms_and_errors():
+    terms = query.parse('title:essay due<2025-12-01 -summary:draft "lab report" id=3')
+    assert [str(t) for t in terms] == ["title:essay", "due_date<2025-12-01", "-summary:draft", '"lab report"', "id=3"]
+    assert terms[2].negated and terms[4].value == 3
+    assert query.bounds(terms, "due_date")[1] == terms[1].value.toordinal() - 1
+    assert str(query.parse("http://x")[0]) == "http://x"
+    for bad in ["due<soon", "title<x", "id:abc", "title:", "", '"open']:
+        with pytest.raises(query.QueryError):
+            query.parse(bad)
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+@pytest.mark.parametrize("expr", [
+    "title:essay due<2025-03-01 -summary:draft",
+    "id>=100 id<110 homework",
+    "id:77",
+    "due:2025-02-0 -title=Homework\\ 29",
+    "essay -due>=2025-01-01",
+])
+def test_where_matches_linear_filter(tmp_path, monkeypatch, capsys, mode, expr):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    save_tasks(_tasks())
+    pred = query.compile(query.parse(expr), final.matches)
+    expected = [t["id"] for t in _tasks() if pred(t)]
+
+    assert main(["search", "--where", expr, "--explain"]) == 0
+    captured = capsys.readouterr()
+    got = json.loads(captured.out) if expected else []
+    assert sorted(t["id"] for t in got) == expected
+    assert captured.err.startswith("Plan: ") and f"{len(expected)} matched" in captured.err
+
+
+def test_planner_picks_most_selective_index(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setattr("final._resident", {})  # the word index lives in `final serve`
+    save_tasks(_tasks())
+
+    _, plan = final.run_query(query.parse("homework id>=100 id<110"))
+    assert plan["path"] == "id lookup id>=100 id<=109" and plan["scanned"] == 10
+    _, plan = final.run_query(query.parse("title:essay due<2025-03-01"))
+    assert plan["path"].startswith("word index for title:essay") and plan["scanned"] == plan["estimate"] == 31
+    _, plan = final.run_query(query.parse("-title:essay"))
+    assert plan["path"] == "full scan" and plan["scanned"] == 301
+
+    monkeypatch.setenv("FINAL_NO_INDEX", "1")
+    _, plan = final.run_query(query.parse("id:77"))
+    assert plan["path"] == "full scan"
+
+
+def test_where_combines_with_query_and_window(tmp_path, monkeypatch, capsys):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks(_tasks())
+    assert main(["search", "--where=-summary:draft", "-q", "essay", "--from", "2025-11-01"]) == 0
+    assert sorted(t["id"] for t in json.loads(capsys.readouterr().out)) == [10, 70, 130, 190, 250]
+    assert main(["search", "--where", "due<tomorrow"]) == 1
+    assert "Invalid date" in capsys.readouterr().out
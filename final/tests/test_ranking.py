@@ -0,0 +1,67 @@
+import json
+import pytest
+import final
+from final import main, load_tasks, ranking, save_tasks
+
+
+def _tasks():
+    return [
+        {"id": 1, "title": "Read chapter", "description": "history essay outline", "due_date": "2025-11-01"},
+        {"id": 2, "title": "Essay", "description": "essay on essays", "due_date": "2025-11-02"},
+        {"id": 3, "title": "Essay draft for the long history seminar", "description": "", "due_date": "2025-11-03"},
+        {"id": 4, "title": "Lab", "description": "physics", "due_date": "2025-11-04", "summary": "essay"},
+        {"id": 5, "title": "Quiz", "description": "", "due_date": None},
+    ]
+
+
+def test_stats_follow_adds_edits_and_removals():
+    stats = ranking.RankStats()
+    for t in _tasks():
+        stats.add(t["id"], t)
+    stats.add(2, {"title": "Lab notes", "description": ""})
+    stats.remove(5)
+    fresh = ranking.RankStats.build([t if t["id"] != 2 else {"title": "Lab notes"} for t in _tasks()[:4]])
+    assert stats.df == fresh.df and stats.total == fresh.total and len(stats.docs) == 4
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary", "sharded"])
+@pytest.mark.parametrize("no_index", ["", "1"])
+def test_rank_orders_matches_by_bm25(tmp_path, monkeypatch, capsys, mode, no_index):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    monkeypatch.setenv("FINAL_NO_INDEX", no_index)
+    monkeypatch.setattr("final._resident", {})  # as inside `final serve`
+    save_tasks(_tasks())
+
+    assert main(["search", "-q", "essay", "--rank"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [2, 1, 3]
+    assert main(["search", "-q", "essay", "-f", "summary", "--rank"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [4]
+    assert main(["search", "-q", "history essay", "--rank", "--limit", "1"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [1]
+    assert main(["search", "-q", "essay", "--rank", "--from", "2025-11-02"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [2, 3]
+    assert main(["search", "-q", "essay", "--limit", "2"]) == 0
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [1, 2]
+    for bad in ("0", "-1"):
+        with pytest.raises(SystemExit):
+            main(["search", "-q", "essay", "--limit", bad])
+        assert "--limit: must be at least 1" in capsys.readouterr().err
+
+
+def test_index_stats_are_maintained_by_writes(tmp_path, monkeypatch, capsys):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setattr("final._resident", {})
+    save_tasks(_tasks())
+    main(["search", "-q", "essay", "--rank"])  # builds the index
+    main(["update", "2", "--title", "Lab report"])
+    main(["done", "5"])
+    main(["--storage", "log", "add", "Essay", "essay", "--due", "2025-12-01"])
+    main(["search", "-q", "essay", "--rank"])  # replays the log entry
+    capsys.readouterr()
+
+    stats = final._resident[("index", fake_file)].rank
+    fresh = ranking.RankStats.build(load_tasks())
+    assert stats.df == fresh.df and stats.total == fresh.total and len(stats.docs) == 5
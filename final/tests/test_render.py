@@ -0,0 +1,58 @@
+import io
+import json
+import itertools
+import pytest
+from final import main, render, save_tasks
+
+
+TASKS = [
+    {"id": 1, "title": "Essay", "description": "é \"quoted\"", "due_date": "2025-11-01"},
+    {"id": 2, "title": "Lab", "description": "", "due_date": None, "summary": "write-up"},
+]
+
+
+def _render(items, fmt, **kw):
+    buf = io.StringIO()
+    with render.Output(buf, chunk=8) as out:
+        render.tasks(out, items, fmt, **kw)
+    return buf.getvalue()
+
+
+def test_formats_match_whole_document_encoders():
+    assert _render(TASKS, "json") == json.dumps(TASKS, indent=2) + "\n"
+    assert _render([], "json") == "[]\n"
+    assert [json.loads(line) for line in _render(TASKS, "ndjson").splitlines()] == TASKS
+    assert _render([], "ndjson") == ""
+    assert _render(TASKS, "table") == "2025-11-01  [1] Essay : é \"quoted\"\n-           [2] Lab : write-up\n"
+    assert _render([], "table", empty="No tasks found.") == "No tasks found.\n"
+
+
+def test_output_stops_when_the_reader_goes_away():
+    class Pipe(io.StringIO):
+        def write(self, s):
+            if self.tell() > 100:
+                raise BrokenPipeError
+            return super().write(s)
+
+    pulled = []
+    endless = ({"id": i, "title": "t", "due_date": None} for i in itertools.count() if not pulled.append(i))
+    out = render.Output(Pipe(), chunk=50)
+    n = render.tasks(out, endless, "ndjson")
+    out.flush()
+    assert out.closed and n == len(pulled) < 20
+    assert not out.write("more")
+
+
+@pytest.mark.parametrize("mode", ["json", "binary", "sharded"])
+def test_list_and_search_formats(tmp_path, monkeypatch, capsys, mode):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    save_tasks(TASKS + [{"id": 3, "title": "Quiz", "description": "", "due_date": "2025-10-01"}])
+    main(["list", "--format", "ndjson"])
+    assert [json.loads(line)["id"] for line in capsys.readouterr().out.splitlines()] == [3, 1, 2]
+    main(["list", "--format", "json"])
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [3, 1, 2]
+    main(["search", "-q", "zzz", "--format", "json"])
+    assert capsys.readouterr().out == "[]\n"
+    main(["search", "-q", "lab", "--format", "table"])
+    assert capsys.readouterr().out == "-           [2] Lab : write-up\n"
@@ -0,0 +1,60 @@
+import json
+import final
+from final import main, resultcache, save_tasks
+
+
+def _setup(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([
+        {"id": 1, "title": "Essay", "description": "", "due_date": "2025-11-01"},
+        {"id": 2, "title": "Lab", "description": "", "due_date": "2025-11-02"},
+    ])
+    return fake_file
+
+
+def test_repeated_commands_are_answered_from_the_cache(tmp_path, monkeypatch, capsys):
+    _setup(tmp_path, monkeypatch)
+    assert main(["search", "-q", "essay"]) == 0
+    assert main(["list"]) == 0
+    first = capsys.readouterr().out
+
+    def no_reads(*a, **k):
+        raise AssertionError("store read on a cache hit")
+    monkeypatch.setattr("final.load_tasks", no_reads)
+    monkeypatch.setattr("final.load_agenda", no_reads)
+    assert main(["search", "-q", "ESSAY"]) == 0  # case does not matter without --exact
+    assert main(["list"]) == 0
+    assert capsys.readouterr().out == first
+
+    assert main(["stats"]) == 0
+    out = capsys.readouterr().out
+    assert "2 of 64 entries" in out and "2 hits, 2 misses (50% hit rate)" in out
+
+
+def test_writes_and_hand_edits_start_a_new_generation(tmp_path, monkeypatch, capsys):
+    fake_file = _setup(tmp_path, monkeypatch)
+    main(["search", "-q", "a"])
+    main(["--storage", "log", "add", "Read", "chapter", "--due", "2025-11-03"])
+    capsys.readouterr()
+    main(["search", "-q", "a"])
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [1, 2, 3]
+
+    fake_file.write_text(json.dumps([{"id": 9, "title": "Hand", "description": "", "due_date": None}]))
+    fake_file.with_name("tasks.json.log").unlink()
+    main(["search", "-q", "a"])
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [9]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch, capsys):
+    _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr("final.resultcache.SIZE", 2)
+    for q in ["essay", "lab", "essay", "x"]:
+        main(["search", "-q", q])
+    cache = resultcache.load(final.find_tasks_file())
+    assert [k[1] for k in cache.entries] == ["essay", "x"]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    monkeypatch.setenv("FINAL_NO_CACHE", "1")
+    main(["search", "-q", "lab"])
+    assert resultcache.load(final.find_tasks_file()).misses == 3
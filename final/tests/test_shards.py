@@ -0,0 +1,60 @@
+import json
+from final import load_tasks, save_tasks, main, shards
+
+TASKS = [
+    {"id": 1, "title": "HW1", "description": "Chapter 1", "due_date": "2025-11-30"},
+    {"id": 2, "title": "Essay", "description": "draft", "due_date": "2025-12-01"},
+    {"id": 3, "title": "Quiz", "description": "", "due_date": "2025-11-03"},
+    {"id": 4, "title": "Someday", "description": "whenever"},
+]
+
+
+def _use(monkeypatch, tmp_path, mode):
+    fake_file = tmp_path / mode / "tasks.json"
+    fake_file.parent.mkdir(exist_ok=True)
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    return fake_file
+
+
+def test_sharded_output_matches_json(tmp_path, monkeypatch, capsys):
+    for argv in (["list"], ["search", "-q", "11-3", "-f", "date"], ["search", "-q", "essay"]):
+        outputs = []
+        for mode in ("json", "sharded"):
+            _use(monkeypatch, tmp_path, mode)
+            save_tasks(TASKS)
+            capsys.readouterr()
+            main(argv)
+            outputs.append(capsys.readouterr().out)
+        assert outputs[0] == outputs[1]
+
+
+def test_manifest_zone_maps_and_pruning(tmp_path, monkeypatch):
+    fake_file = _use(monkeypatch, tmp_path, "sharded")
+    save_tasks(TASKS)
+    sd = shards.shard_dir(fake_file)
+    manifest = shards.read_manifest(sd)
+    assert shards.keys_in_order(manifest) == ["2025-11", "2025-12", "undated"]
+    nov = manifest["shards"]["2025-11"]
+    assert (nov["min_due"], nov["max_due"], nov["count"], nov["max_id"]) == ("2025-11-03", "2025-11-30", 2, 3)
+
+    assert shards.matching_due_keys(sd, "2025-12", False) == ["2025-12"]
+    assert shards.matching_due_keys(sd, "2025-11-01", True) == []
+
+
+def test_done_and_add_rewrite_one_shard(tmp_path, monkeypatch):
+    fake_file = _use(monkeypatch, tmp_path, "sharded")
+    save_tasks(TASKS)
+    sd = shards.shard_dir(fake_file)
+    december = (sd / "2025-12.json").read_text(encoding="utf-8")
+    (sd / "2025-12.json").write_text(december + " ", encoding="utf-8")
+
+    assert main(["done", "3"]) == 0
+    assert main(["add", "HW2", "--due", "2025-11-20"]) == 0
+    assert main(["done", "99"]) == 1
+
+    # Untouched shard keeps our marker byte.
+    assert (sd / "2025-12.json").read_text(encoding="utf-8") == december + " "
+    nov = json.loads((sd / "2025-11.json").read_text(encoding="utf-8"))
+    assert [(t["id"], t["title"]) for t in nov] == [(1, "HW1"), (5, "HW2")]
+    assert sorted(t["id"] for t in load_tasks()) == [1, 2, 4, 5]
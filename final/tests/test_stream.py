@@ -0,0 +1,48 @@
+import io
+import json
+import pytest
+from final import iter_tasks, load_tasks, save_tasks, main, stream, oplog
+
+
+def test_iter_array_across_tiny_chunks():
+    data = [{"id": 12345, "title": 'a "quoted" [x] \\', "n": [1, 2.5e3, None, True]}, 678, "s", []]
+    text = json.dumps(data, indent=2)
+    assert list(stream.iter_array(io.StringIO(text), chunk=3)) == data
+    wrapped = json.dumps({"meta": {"v": [1]}, "tasks": data})
+    assert list(stream.iter_array(io.StringIO(wrapped), key="tasks", chunk=2)) == data
+    assert list(stream.iter_array(io.StringIO(""))) == []
+    with pytest.raises(ValueError):
+        list(stream.iter_array(io.StringIO('[{"id": 1} {"id": 2}]'), chunk=4))
+
+
+def test_stream_replay_matches_replay():
+    snapshot = [{"id": i, "title": str(i)} for i in range(1, 6)]
+    records = [
+        {"op": "add", "task": {"id": 2, "title": "two v2"}},
+        {"op": "done", "ids": [3]},
+        {"op": "add", "task": {"id": 9, "title": "nine"}},
+        {"op": "done", "ids": [4]},
+        {"op": "add", "task": {"id": 4, "title": "four again"}},
+        {"op": "add", "task": {"id": 9, "title": "nine v2"}},
+        {"op": "done", "ids": [42]},
+    ]
+    expected = oplog.replay(list(snapshot), records)
+    assert list(oplog.stream_replay(iter(snapshot), records)) == expected
+
+
+@pytest.mark.parametrize("mode", ["json", "log"])
+def test_streaming_search_matches_regular_search(tmp_path, monkeypatch, capsys, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    save_tasks([{"id": i, "title": f"HW {i}", "description": "", "due_date": "2025-11-30"} for i in range(1, 40)])
+    main(["add", "Essay", "--due", "2025-12-01"])
+    main(["done", "7"])
+    assert list(iter_tasks()) == load_tasks()
+
+    capsys.readouterr()
+    for argv in (["search", "-q", "hw 1"], ["search", "-q", "12-01", "-f", "date"]):
+        main(argv)
+        expected = capsys.readouterr().out
+        main(argv + ["--stream"])
+        assert capsys.readouterr().out == expected
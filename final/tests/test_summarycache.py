@@ -0,0 +1,52 @@
+import pytest
+import final
+from final import main, summarycache
+
+
+def test_least_recently_used_summaries_are_evicted_by_size():
+    cache = summarycache.SummaryCache()
+    keys = [summarycache.summary_key(f"text {i}", "model", "prompt") for i in range(3)]
+    assert len(set(keys)) == 3 and keys[0] != summarycache.summary_key("text 0", "other", "prompt")
+    cache.put(keys[0], "a" * 10, limit=200)
+    cache.put(keys[1], "b" * 10, limit=200)
+    assert cache.get(keys[0]) == "a" * 10  # now the most recent
+    cache.put(keys[2], "c" * 10, limit=200)
+    assert list(cache.entries) == [keys[0], keys[2]] and cache.size == 2 * (64 + 10)
+    assert cache.get(keys[1]) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_repeated_descriptions_are_summarized_once(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+    requests = []
+    monkeypatch.setattr("final._request_summary", lambda d: requests.append(d) or f"sum of {d}")
+    main(["add", "Essay", "long text", "--due", "2025-11-01", "--summarize"])
+    main(["add", "Essay again", "long text", "--due", "2025-12-01", "--summarize"])
+    main(["add", "Lab", "other text", "--due", "2025-12-01", "--summarize"])
+    assert requests == ["long text", "other text"]
+    assert [t["summary"] for t in final.load_tasks()] == ["sum of long text"] * 2 + ["sum of other text"]
+
+    # Hits need neither the SDK nor an API key.
+    monkeypatch.setattr("final._request_summary", lambda d: pytest.fail("requested a cached summary"))
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert final.summarize_task("other text") == "sum of other text"
+    capsys.readouterr()
+    main(["stats"])
+    out = capsys.readouterr().out
+    assert "Summary cache: 2 summaries" in out
+    assert "Summary lookups: 2 hits, 2 misses (50% hit rate)" in out
+
+
+def test_failed_requests_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr("final.find_tasks_file", lambda: tmp_path / "tasks.json")
+
+    def fail(d):
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr("final._request_summary", fail)
+    with pytest.raises(RuntimeError):
+        final.summarize_task("text")
+    monkeypatch.setattr("final._request_summary", lambda d: "ok")
+    assert final.summarize_task("text") == "ok"
+    cache = summarycache.load(tmp_path / "tasks.json")
+    assert (cache.hits, cache.misses, len(cache.entries)) == (0, 2, 1)
@@ -0,0 +1,57 @@
+import sys
+import tracemalloc
+import final
+from final import TaskTable, matches, load_tasks, save_tasks, main, render
+
+
+def _tasks(n):
+    return [
+        {"id": i, "title": f"Homework {i}", "description": ["Read chapter", "Problem set", ""][i % 3],
+         "due_date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}"}
+        for i in range(1, n + 1)
+    ]
+
+
+def test_rows_behave_like_dicts():
+    tasks = _tasks(5) + [{"title": "odd", "id": "x", "due_date": "soon", "tags": ["a"]}]
+    table = TaskTable.from_tasks(tasks)
+    assert len(table) == 6
+    assert table.to_list() == tasks
+    row = table[-1]
+    assert row["id"] == "x" and row.get("due_date") == "soon" and row.get("summary") is None
+    assert "description" not in row
+    assert [matches(r, "home", "title", False) for r in table] == [True] * 5 + [False]
+    assert matches(table[0], "2025-02-02", "date", True)
+
+
+def test_table_uses_far_less_memory():
+    n = 20000
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    as_dicts = _tasks(n)
+    dict_bytes = tracemalloc.get_traced_memory()[0] - base
+
+    base = tracemalloc.get_traced_memory()[0]
+    table = TaskTable.from_tasks(_tasks(n), consume=True)
+    table_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    assert len(table) == len(as_dicts)
+    assert table_bytes < dict_bytes / 2
+
+
+def test_list_output_unchanged(tmp_path, monkeypatch, capsys):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    tasks = _tasks(30) + [{"id": 99, "title": "No date", "description": "x"}]
+    groups, no_date = final.build_agenda(tasks)
+    with render.Output(sys.stdout) as out:
+        render.agenda(out, groups + [(None, no_date)])
+    expected = capsys.readouterr().out
+
+    # Without the parse cache, list runs on a TaskTable.
+    monkeypatch.setenv("FINAL_NO_CACHE", "1")
+    save_tasks(tasks)
+    assert isinstance(load_tasks(as_table=True), TaskTable)
+    main(["list"])
+    assert capsys.readouterr().out == expected
@@ -0,0 +1,108 @@
+import io
+import json
+import random
+import contextlib
+from datetime import date
+import pytest
+import final
+from final import main, save_tasks, textindex
+
+
+def _search(argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        main(["search"] + argv)
+    text = out.getvalue()
+    return [] if text.startswith("No tasks") else json.loads(text)
+
+
+@pytest.mark.parametrize("mode", ["json", "log", "binary"])
+def test_index_answers_like_the_scan(tmp_path, monkeypatch, mode):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setattr("final._resident", {})  # as inside `final serve`
+    monkeypatch.setenv("FINAL_STORAGE", mode)
+    rng = random.Random(7)
+    words = ["read", "chapter", "essay", "lab-report", "Calc", "homework", "über", "x2"]
+    save_tasks([{"id": i, "title": " ".join(rng.sample(words, 2)),
+                 "description": " ".join(rng.sample(words, 3)), "due_date": f"2025-{rng.choice([11, 12])}-30",
+                 **({"summary": rng.choice(words)} if i % 3 == 0 else {})} for i in range(1, 80)])
+    queries = [("read", "all"), ("ead cha", "all"), ("ssay", "title"), ("lab-rep", "description"),
+               ("CALC", "all"), ("work", "summary"), ("-", "all"), ("über x", "all"), ("nothing", "all"),
+               ("pter es", "all"), ("ab-", "title"), ("2025-12", "date"), ("11-30", "due_date"), ("25", "date")]
+
+    def check():
+        for q, f in queries:
+            for exact in ([], ["--exact"]):
+                got = _search(["-q", q, "-f", f] + exact)
+                monkeypatch.setenv("FINAL_NO_INDEX", "1")
+                assert got == _search(["-q", q, "-f", f] + exact), (q, f, exact)
+                monkeypatch.delenv("FINAL_NO_INDEX")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        check()
+        main(["add", "Read more", "essay draft", "--due", "2025-12-01"])
+        main(["done", "3", "10-20"])
+        main(["update", "-q", "calc", "--title", "Physics", "--summary", "lab work"])
+        check()
+
+
+def test_only_the_server_keeps_an_index(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    save_tasks([{"id": 1, "title": "Essay", "description": "draft"}])
+    monkeypatch.setattr("final.textindex.TextIndex.build", lambda tasks: pytest.fail("indexed outside the server"))
+    assert _search(["-q", "essay"])[0]["id"] == 1
+    assert sorted(f.name for f in tmp_path.iterdir() if ".idx" in f.name) == []
+
+
+def test_writes_keep_the_index_without_rebuilding(tmp_path, monkeypatch):
+    fake_file = tmp_path / "tasks.json"
+    monkeypatch.setattr("final.find_tasks_file", lambda: fake_file)
+    monkeypatch.setattr("final._resident", {})
+    save_tasks([{"id": 1, "title": "Essay", "description": "draft"}])
+    assert _search(["-q", "essay"])[0]["id"] == 1  # builds the index
+
+    def no_rebuild(tasks):
+        raise AssertionError("index was rebuilt")
+    monkeypatch.setattr("final.textindex.TextIndex.build", no_rebuild)
+    with contextlib.redirect_stdout(io.StringIO()):
+        main(["add", "Lab", "titration", "--due", "2025-11-30"])
+        main(["--storage", "log", "add", "Quiz", "titration prep", "--due", "2025-11-30"])
+    assert [t["title"] for t in _search(["-q", "titration"])] == ["Lab", "Quiz"]
+    idx = final._resident[("index", fake_file)]
+    assert idx.candidates("titr", "all") == {2, 3}
+
+    # A rewrite by another process is diffed in, not rebuilt from scratch.
+    resident, final._resident = final._resident, None
+    save_tasks([{"id": 1, "title": "Essay", "description": "titration"}])
+    final._resident = resident
+    assert [t["id"] for t in _search(["-q", "titration"])] == [1]
+    assert idx.candidates("titr", "all") >= {1}
+
+
+def test_partial_words_and_dates_narrow_any_substring():
+    idx = textindex.TextIndex.build([
+        {"id": 1, "title": "Chapter 3", "description": "read", "due_date": "2025-11-30"},
+        {"id": 2, "title": "Lab", "description": "adapter notes", "due_date": "2025-12-01"},
+        {"id": 3, "title": "Essay", "description": "", "due_date": "2025-11-03"},
+    ])
+    assert idx.candidates("apte", "all") == {1, 2}
+    assert idx.candidates("APTER N", "description") == {2}
+    assert idx.candidates("11-", "date") == {1, 3}
+    assert idx.candidates("zzz", "title") == set()
+    assert idx.candidates("11", "date") == {1, 3}
+    assert idx.candidates("2025-11-3", "date", exact=True) == set()
+    assert idx.words_containing("apte") == {"chapter", "adapter"}
+
+
+def test_due_ordinals_follow_updates():
+    d = lambda s: date.fromisoformat(s).toordinal()
+    tasks = [{"id": i, "title": "t", "due_date": f"2025-11-{i:02d}"} for i in range(1, 11)]
+    idx = textindex.TextIndex.build(tasks)
+    assert idx.due_between(d("2025-11-03"), d("2025-11-05")) == {3, 4, 5}
+    tasks[3] = dict(tasks[3], due_date="2026-01-01")  # writes replace task dicts
+    del tasks[4]
+    idx.sync(tasks + [{"id": 11, "title": "t", "due_date": "2025-11-04"}])
+    assert idx.due_between(d("2025-11-03"), d("2025-11-05")) == {3, 11}
+    assert idx.due_between(d("2025-12-01"), None) == {4}
@@ -2,7 +2,13 @@ import json
 import os
 import sys
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 TASKS_FILE = 'tasks.json'
+SEQ_FILE = TASKS_FILE + '.seq'
 
 def load_tasks():
     if not os.path.exists(TASKS_FILE):
@@ -14,9 +20,27 @@ def save_tasks(tasks):
     with open(TASKS_FILE, 'w') as file:
         json.dump(tasks, file)
 
+def next_id(tasks):
+    # Last id handed out lives in a sidecar so ids are never reused, even if
+    # tasks are removed; the lock keeps concurrent adds from colliding.
+    fd = os.open(SEQ_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        text = os.read(fd, 64).decode('ascii').strip()
+        last = int(text) if text else max((t.get('id', 0) for t in tasks), default=0)
+        data = f'{last + 1}\n'.encode('ascii')
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, data)
+        os.ftruncate(fd, len(data))
+        os.fsync(fd)
+        return last + 1
+    finally:
+        os.close(fd)
+
 def add_task(title, description):
     tasks = load_tasks()
-    task_id = len(tasks) + 1
+    task_id = next_id(tasks)
     task = {
         'id': task_id,
         'title': title,
@@ -1,21 +1,22 @@
 import unittest
-from simple_task_cli.cli import add_task, list_tasks
+from simple_task_cli.cli import add_task, list_tasks, load_tasks, save_tasks
 import json
 import os
+import tempfile
 
 class TestCLI(unittest.TestCase):
 
     def setUp(self):
-        self.test_file = 'test_tasks.json'
         self.original_file = 'tasks.json'
-        # Create a test tasks file
-        if os.path.exists(self.original_file):
-            os.rename(self.original_file, self.test_file)
+        # Run in an empty directory so tasks.json and tasks.json.seq never
+        # leak between tests or into the checkout.
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
 
     def tearDown(self):
-        # Restore the original tasks file if it exists
-        if os.path.exists(self.test_file):
-            os.rename(self.test_file, self.original_file)
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
 
     def test_add_task(self):
         task_title = "Test Task"
@@ -39,5 +40,13 @@ class TestCLI(unittest.TestCase):
         self.assertEqual(tasks[0]['title'], "Task 1")
         self.assertEqual(tasks[1]['title'], "Task 2")
 
+    def test_removed_ids_are_not_reused(self):
+        add_task("Task 1", "Description 1")
+        add_task("Task 2", "Description 2")
+        # Remove the highest id by hand; the sequence remembers it.
+        save_tasks([t for t in load_tasks() if t['id'] != 2])
+        add_task("Task 3", "Description 3")
+        self.assertEqual([t['id'] for t in load_tasks()], [1, 3])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
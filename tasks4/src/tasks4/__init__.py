@@ -1,43 +1,111 @@
+import hashlib
+import json
 import os
+from pathlib import Path
 from typing import List
 
-from openai import OpenAI
+# NOTE: replace this with the exact model name your instructor wants,
+# e.g. "gpt-5.1-mini" or whatever is documented for ChatGPT-5-mini.
+MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = (
+    "You summarize tasks as very short phrases, 15 words or less. "
+    "just output the bare summary."
+)
+USER_PROMPT = "Summarize the following task description as a very short phrase:\n\n"
 
-# Create a single OpenAI client (reads OPENAI_API_KEY from env)
-client = OpenAI()
+# Summaries already fetched, keyed by a hash of the description, model and
+# prompts. Least recently used entries go first once the file would exceed
+# CACHE_MAX_BYTES.
+CACHE_FILE = Path(os.getenv("TASKS4_SUMMARY_CACHE", Path.home() / ".cache" / "tasks4" / "summaries.json"))
+CACHE_MAX_BYTES = 1 << 20
+
+_client = None
+
+
+def get_client():
+    """
+    The OpenAI client (reads OPENAI_API_KEY from env), created on first use
+    so cached summaries work without the SDK installed.
+    """
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        _client = OpenAI()
+    return _client
+
+
+def summary_key(description: str) -> str:
+    h = hashlib.sha256()
+    for part in (MODEL, SYSTEM_PROMPT, USER_PROMPT, description):
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "big") + data)
+    return h.hexdigest()
+
+
+def load_cache() -> dict:
+    """
+    The summary cache: {"hits": n, "misses": n, "summaries": {key: summary}},
+    summaries ordered from least to most recently used.
+    """
+    try:
+        cache = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+        if isinstance(cache.get("summaries"), dict):
+            return cache
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"hits": 0, "misses": 0, "summaries": {}}
+
+
+def save_cache(cache: dict) -> None:
+    summaries = cache["summaries"]
+    text = json.dumps(cache)
+    size = len(text.encode("utf-8"))
+    if size > CACHE_MAX_BYTES:
+        for key in list(summaries):
+            if size <= CACHE_MAX_BYTES:
+                break
+            # Each entry takes its key/value pair plus a separator.
+            size -= len(json.dumps({key: summaries.pop(key)}).encode("utf-8"))
+        text = json.dumps(cache)
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_FILE.with_name(CACHE_FILE.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        pass  # only costs requests later
 
 
 def summarize_task(description: str) -> str:
     """
     Use Chat Completions to summarize a paragraph-length task description
-    into a short phrase (3–7 words).
+    into a short phrase (3–7 words). Descriptions summarized before are
+    answered from the cache without a request.
     """
-    response = client.chat.completions.create(
-        # NOTE: replace this with the exact model name your instructor wants,
-        # e.g. "gpt-5.1-mini" or whatever is documented for ChatGPT-5-mini.
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You summarize tasks as very short phrases, 15 words or less. "
-                    "just output the bare summary."
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Summarize the following task description as a very short phrase:\n\n"
-                    + description
-                ),
-            },
-        ],
-        max_tokens=32,
-        temperature=0.2,
-    )
-
-    # Grab the assistant's reply text
-    return response.choices[0].message.content.strip()
+    cache = load_cache()
+    key = summary_key(description)
+    summary = cache["summaries"].pop(key, None)
+    try:
+        if summary is not None:
+            cache["hits"] += 1
+        else:
+            cache["misses"] += 1
+            response = get_client().chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": USER_PROMPT + description},
+                ],
+                max_tokens=32,
+                temperature=0.2,
+            )
+            # Grab the assistant's reply text
+            summary = response.choices[0].message.content.strip()
+        cache["summaries"][key] = summary  # now the most recently used
+    finally:
+        save_cache(cache)
+    return summary
 
 
 def sample_descriptions() -> List[str]:
@@ -88,6 +156,9 @@ def main() -> None:
         print(summary)
         print("=" * 40)
 
+    cache = load_cache()
+    print(f"\nSummary cache: {cache['hits']} hits, {cache['misses']} misses ({CACHE_FILE})")
+
 
 if __name__ == "__main__":
     main()
@@ -1,20 +1,27 @@
 import argparse
+import sys
 from pathlib import Path
 from typing import Optional
 
-from .storage import TaskStore
+from . import render
+from .storage import migrate_json, open_store
 
 
-def _print_task(t):
-    print(f"[{t.id}] {t.title}")
-    if t.description:
-        print(f"    {t.description}")
-    print(f"    created: {t.created_at}")
+def _print_task(t, fmt="table"):
+    _print_tasks([t], fmt)
+
+
+def _print_tasks(tasks, fmt="table"):
+    with render.Output(sys.stdout) as out:
+        render.tasks(out, tasks, fmt)
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="tasker", description="Simple task manager")
-    parser.add_argument("--data", default="./.tasker/tasks.json", help="Path to JSON data file")
+    parser.add_argument("--data", default="./.tasker/tasks.json", help="Path to data file (.db/.sqlite selects the SQLite backend)")
+    parser.add_argument("--codec", choices=["pretty", "compact", "binary"], default=None, help="Encoding for the JSON backend's data file (default: keep the file's current one)")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default=None, help="Storage backend (default: from --data suffix)")
+    parser.add_argument("--format", choices=render.FORMATS, default="table", help="Output format for printed tasks")
 
     sub = parser.add_subparsers(dest="cmd", required=True)
 
@@ -27,24 +34,37 @@ def build_parser() -> argparse.ArgumentParser:
     search = sub.add_parser("search", help="Search tasks")
     search.add_argument("query")
 
+    migrate = sub.add_parser("migrate", help="Copy tasks from a JSON data file into the SQLite store at --data")
+    migrate.add_argument("source", help="Path to the existing JSON data file")
+
     return parser
 
 
 def main(argv: Optional[list] = None):
     parser = build_parser()
     args = parser.parse_args(argv)
-    store = TaskStore(args.data)
+
+    if args.cmd == "migrate":
+        if args.backend == "json":
+            parser.error("migrate writes a SQLite store; drop --backend json")
+        try:
+            n = migrate_json(args.source, args.data)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"{parser.prog}: error: {e}\n")
+        print(f"Migrated {n} tasks into {args.data}")
+        return
+
+    store = open_store(args.data, args.backend, args.codec)
 
     if args.cmd == "add":
         t = store.add(args.title, args.description)
-        print("Added:")
-        _print_task(t)
+        if args.format == "table":
+            print("Added:")
+        _print_task(t, args.format)
     elif args.cmd == "list":
-        for t in store.list():
-            _print_task(t)
+        _print_tasks(store.list(), args.format)
     elif args.cmd == "search":
-        for t in store.search(args.query):
-            _print_task(t)
+        _print_tasks(store.search(args.query), args.format)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""Persisted, monotonic task id sequence (``<data file>.seq``).
+
+The sidecar holds the last id handed out, so allocating the next one never
+needs the task list. Allocation happens under an exclusive ``fcntl`` lock on
+the sidecar, which makes concurrent ``add`` processes receive distinct ids.
+Ids are never reused, even after the highest task is marked done.
+
+The sequence is seeded from the existing tasks the first time it is needed,
+and :func:`observe` raises it past ids written by other means.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+SEQ_SUFFIX = ".seq"
+
+
+def seq_path(path: Path) -> Path:
+    return path.with_name(path.name + SEQ_SUFFIX)
+
+
+@contextmanager
+def _locked(sp: Path):
+    fd = os.open(sp, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield fd
+    finally:
+        os.close(fd)  # closing releases the lock
+
+
+def _read(fd):
+    os.lseek(fd, 0, os.SEEK_SET)
+    text = os.read(fd, 64).decode("ascii").strip()
+    return int(text) if text else None
+
+
+def _write(fd, value, sync):
+    data = f"{value}\n".encode("ascii")
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, data)
+    os.ftruncate(fd, len(data))
+    if sync:
+        os.fsync(fd)
+
+
+def allocate(path: Path, floor, count=1, sync=True) -> int:
+    """Reserve ``count`` consecutive ids and return the first one.
+
+    ``floor`` is a callable returning the highest id already in use; it is
+    only called when the sequence has not been seeded yet. With
+    ``sync=False`` the caller is responsible for fsyncing the sidecar.
+    """
+    with _locked(seq_path(path)) as fd:
+        last = _read(fd)
+        if last is None:
+            last = floor()
+        _write(fd, last + count, sync)
+        return last + 1
+
+
+def observe(path: Path, max_id):
+    """Raise the sequence to at least ``max_id()`` (never lowers it).
+
+    ``max_id`` is a callable so the scan is skipped while there is no
+    sequence yet; it is seeded from the tasks on first allocation anyway.
+    """
+    sp = seq_path(path)
+    if not sp.exists():
+        return
+    highest = max_id()
+    with _locked(sp) as fd:
+        last = _read(fd)
+        if last is None or highest > last:
+            _write(fd, highest, True)
+
+
+def current(path: Path):
+    """The last id handed out, or None before the first allocation."""
+    try:
+        text = seq_path(path).read_text(encoding="ascii").strip()
+    except FileNotFoundError:
+        return None
+    return int(text) if text else None
@@ -0,0 +1,91 @@
+"""Output renderers for the CLI (``--format table|ndjson|json``).
+
+``table`` is the indented text layout, ``ndjson`` one JSON object per line
+and ``json`` a single indented array, encoded one task at a time. Text goes
+through :class:`Output`, which passes it on in chunks of about ``CHUNK``
+characters, so memory does not grow with the number of tasks printed. If the
+reader goes away (``tasker list | head``), output stops quietly.
+"""
+import json
+import os
+from dataclasses import asdict
+
+FORMATS = ["table", "ndjson", "json"]
+CHUNK = 1 << 16
+
+
+class Output:
+    """Buffered writer over a text stream.
+
+    After a ``BrokenPipeError`` it is ``closed``: writes return False and are
+    dropped, and the stream's descriptor is pointed at ``os.devnull`` so the
+    interpreter's last flush does not fail again.
+    """
+
+    def __init__(self, out, chunk=CHUNK):
+        self.out = out
+        self.chunk = chunk
+        self.parts = []
+        self.size = 0
+        self.closed = False
+
+    def write(self, s) -> bool:
+        if self.closed:
+            return False
+        self.parts.append(s)
+        self.size += len(s)
+        if self.size >= self.chunk:
+            self.flush()
+        return not self.closed
+
+    def flush(self):
+        if self.closed:
+            return
+        data = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        try:
+            if data:
+                self.out.write(data)
+            self.out.flush()
+        except BrokenPipeError:
+            self.closed = True
+            try:
+                fd = self.out.fileno()
+            except (AttributeError, OSError, ValueError):
+                return
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, fd)
+            os.close(devnull)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+def table(t) -> str:
+    text = f"[{t.id}] {t.title}\n"
+    if t.description:
+        text += f"    {t.description}\n"
+    return text + f"    created: {t.created_at}\n"
+
+
+def tasks(out: Output, items, fmt="table") -> int:
+    """Render ``items`` (Task objects); returns how many were written."""
+    n = 0
+    for t in items:
+        if fmt == "json":
+            text = json.dumps(asdict(t), indent=2).replace("\n", "\n  ")
+            ok = out.write(("[\n  " if n == 0 else ",\n  ") + text)
+        elif fmt == "ndjson":
+            ok = out.write(json.dumps(asdict(t)) + "\n")
+        else:
+            ok = out.write(table(t))
+        n += 1
+        if not ok:
+            return n
+    if fmt == "json":
+        out.write("[]\n" if n == 0 else "\n]\n")
+    return n
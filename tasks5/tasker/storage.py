@@ -1,12 +1,37 @@
-import json
+import os
+import random
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Optional
+
+from . import codec as codecs
+from . import idseq, stream
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+# Optimistic attempts before a write falls back to holding the lock throughout.
+WRITE_RETRIES = 5
+_VERSION_HEAD = re.compile(rb'\s*\{\s*"version"\s*:\s*(\d+)')
+
+
+class VersionConflict(Exception):
+    """The data file changed between a read and the write based on it."""
 
 
 @dataclass
 class Task:
+    # No per-instance __dict__: large listings hold many of these at once.
+    __slots__ = ("id", "title", "description", "created_at")
+
     id: int
     title: str
     description: Optional[str]
@@ -19,41 +44,283 @@ class TaskStore:
     Responsibilities:
     - persist tasks to a JSON file
     - provide add/list/search operations
+
+    ``codec`` picks the file encoding (see :mod:`tasker.codec`); by default
+    an existing file keeps the encoding it has.
+
+    The file carries a ``version`` that every write increments. Writers read
+    it with the tasks, work without a lock, and only lock (``fcntl`` on
+    ``<file>.lock``) to check it is unchanged and replace the file; on a
+    conflict they start over from a fresh read.
     """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, codec: Optional[str] = None):
         self.path = Path(path)
+        self.codec = codec
         self._ensure_file()
 
     def _ensure_file(self):
-        if not self.path.exists():
-            self.path.parent.mkdir(parents=True, exist_ok=True)
-            self.path.write_text(json.dumps({"tasks": []}, indent=2))
+        if self.path.exists():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            # Another first-time writer may have created it (and written to
+            # it) while this one waited for the lock.
+            if self.path.exists():
+                return
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(codecs.encode({"version": 0, "tasks": []}, self.codec or codecs.DEFAULT))
+            os.replace(tmp, self.path)
 
     def _read(self) -> List[dict]:
-        data = json.loads(self.path.read_text())
-        return data.get("tasks", [])
+        return self._read_doc().get("tasks", [])
+
+    def _read_doc(self) -> dict:
+        return codecs.decode(self.path.read_bytes(), empty={})
+
+    def _version(self) -> int:
+        # Written as the first key, so JSON files only need their head read.
+        with open(self.path, "rb") as f:
+            m = _VERSION_HEAD.match(f.read(64))
+        if m:
+            return int(m.group(1))
+        return self._read_doc().get("version", 0)
 
-    def _write(self, tasks: List[dict]):
-        self.path.write_text(json.dumps({"tasks": tasks}, indent=2))
+    @contextmanager
+    def _locked(self):
+        fd = os.open(self.path.with_name(self.path.name + LOCK_SUFFIX), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # closing releases the lock
+
+    def _iter_raw(self):
+        """Yield raw task dicts one at a time (binary files are read whole)."""
+        if codecs.detect_file(self.path) == "binary":
+            yield from self._read()
+            return
+        with open(self.path, encoding="utf-8") as f:
+            yield from stream.iter_array(f, key="tasks")
+
+    def _write(self, tasks: List[dict], expect: Optional[int] = None):
+        """Replace the file's tasks; with ``expect``, only if the file is
+        still at that version (else :class:`VersionConflict`)."""
+        with self._locked():
+            self._write_locked(tasks, expect)
+
+    def _write_locked(self, tasks, expect=None):
+        version = self._version()
+        if expect is not None and version != expect:
+            raise VersionConflict(f"{self.path} changed (version {expect} -> {version})")
+        name = self.codec or codecs.detect_file(self.path)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(codecs.encode({"version": version + 1, "tasks": tasks}, name))
+        # Readers never see a half-written file.
+        os.replace(tmp, self.path)
+
+    def _update(self, change):
+        """Apply ``change(tasks) -> tasks`` without losing concurrent writes."""
+        for attempt in range(WRITE_RETRIES):
+            doc = self._read_doc()
+            tasks = change(doc.get("tasks", []))
+            try:
+                return self._write(tasks, expect=doc.get("version", 0))
+            except VersionConflict:
+                time.sleep(random.uniform(0, 0.002 * 2 ** attempt))
+        with self._locked():
+            self._write_locked(change(self._read()))
 
     def list(self) -> List[Task]:
         raw = self._read()
-        return [Task(**r) for r in raw]
+        # Share repeated descriptions instead of keeping one copy per task.
+        seen = {}
+        tasks = []
+        for i, r in enumerate(raw):
+            raw[i] = None
+            desc = r.get("description")
+            if desc is not None:
+                desc = seen.setdefault(desc, desc)
+            tasks.append(Task(r["id"], r["title"], desc, r["created_at"]))
+        return tasks
+
+    def _max_id(self) -> int:
+        return max((r.get("id", 0) for r in self._iter_raw()), default=0)
 
     def add(self, title: str, description: Optional[str] = None) -> Task:
-        tasks = self._read()
-        next_id = max((t.get("id", 0) for t in tasks), default=0) + 1
+        # The id comes from the persisted sequence, not a scan of every task.
+        next_id = idseq.allocate(self.path, self._max_id)
         t = Task(
             id=next_id,
             title=title,
             description=description,
             created_at=datetime.now(timezone.utc).isoformat(),
         )
-        tasks.append(asdict(t))
-        self._write(tasks)
+        self._update(lambda tasks: tasks + [asdict(t)])
         return t
 
+    def bulk_add(self, rows: Iterable[dict]) -> List[Task]:
+        """Add every ``{"title", "description"}`` row with one block of ids
+        and a single write."""
+        new = _rows_to_tasks(rows)
+        if not new:
+            return []
+        first = idseq.allocate(self.path, self._max_id, count=len(new))
+        for i, t in enumerate(new):
+            t.id = first + i
+        self._update(lambda tasks: tasks + [asdict(t) for t in new])
+        return new
+
     def search(self, q: str) -> List[Task]:
+        # Filter while reading so memory does not grow with the file.
         q_lower = q.lower()
-        return [t for t in self.list() if q_lower in t.title.lower() or (t.description and q_lower in t.description.lower())]
+        results = []
+        for r in self._iter_raw():
+            desc = r.get("description")
+            if q_lower in r["title"].lower() or (desc and q_lower in desc.lower()):
+                results.append(Task(r["id"], r["title"], desc, r["created_at"]))
+        return results
+
+
+class SqliteTaskStore:
+    """SQLite-backed task store with the same API as :class:`TaskStore`.
+
+    id, created_at and title are indexed columns, so ``add`` no longer
+    rewrites every task and ``search`` runs as a SQL query. When SQLite ships
+    FTS5 a trigram index answers substring searches; otherwise (or for
+    queries shorter than a trigram) it falls back to ``LIKE``.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._fts = self._init_schema()
+
+    def _init_schema(self) -> bool:
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                "description TEXT, created_at TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks(title)")
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+                    "title, description, content='tasks', content_rowid='id', tokenize='trigram')"
+                )
+                self._conn.executescript(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS tasks_ai AFTER INSERT ON tasks BEGIN
+                        INSERT INTO tasks_fts(rowid, title, description)
+                        VALUES (new.id, new.title, new.description);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS tasks_ad AFTER DELETE ON tasks BEGIN
+                        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+                        VALUES ('delete', old.id, old.title, old.description);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS tasks_au AFTER UPDATE ON tasks BEGIN
+                        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+                        VALUES ('delete', old.id, old.title, old.description);
+                        INSERT INTO tasks_fts(rowid, title, description)
+                        VALUES (new.id, new.title, new.description);
+                    END;
+                    """
+                )
+            return True
+        except sqlite3.OperationalError:
+            # No FTS5 (or no trigram tokenizer) in this SQLite build.
+            return False
+
+    def close(self):
+        self._conn.close()
+
+    def list(self) -> List[Task]:
+        rows = self._conn.execute("SELECT id, title, description, created_at FROM tasks ORDER BY id")
+        return [Task(*r) for r in rows]
+
+    def add(self, title: str, description: Optional[str] = None) -> Task:
+        created_at = datetime.now(timezone.utc).isoformat()
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO tasks (title, description, created_at) VALUES (?, ?, ?)",
+                (title, description, created_at),
+            )
+        return Task(id=cur.lastrowid, title=title, description=description, created_at=created_at)
+
+    def search(self, q: str) -> List[Task]:
+        if self._fts and len(q) >= 3:
+            rows = self._conn.execute(
+                "SELECT t.id, t.title, t.description, t.created_at "
+                "FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid "
+                "WHERE tasks_fts MATCH ? ORDER BY t.id",
+                ('"' + q.replace('"', '""') + '"',),
+            )
+        else:
+            pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self._conn.execute(
+                "SELECT id, title, description, created_at FROM tasks "
+                "WHERE title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\' ORDER BY id",
+                (pattern, pattern),
+            )
+        return [Task(*r) for r in rows]
+
+    def bulk_add(self, rows: Iterable[dict]) -> List[Task]:
+        """Add every ``{"title", "description"}`` row in one transaction."""
+        new = _rows_to_tasks(rows)
+        with self._conn:
+            for t in new:
+                t.id = self._conn.execute(
+                    "INSERT INTO tasks (title, description, created_at) VALUES (?, ?, ?)",
+                    (t.title, t.description, t.created_at),
+                ).lastrowid
+        return new
+
+    def import_tasks(self, tasks: List[dict]) -> int:
+        """Insert task dicts keeping their ids; returns the number inserted."""
+        with self._conn:
+            cur = self._conn.executemany(
+                "INSERT INTO tasks (id, title, description, created_at) VALUES (?, ?, ?, ?)",
+                ((t["id"], t["title"], t.get("description"), t["created_at"]) for t in tasks),
+            )
+        return cur.rowcount
+
+
+def _rows_to_tasks(rows) -> List[Task]:
+    created_at = datetime.now(timezone.utc).isoformat()
+    tasks = []
+    for n, r in enumerate(rows, 1):
+        if not r.get("title"):
+            raise ValueError(f"row {n}: missing title")
+        tasks.append(Task(0, r["title"], r.get("description") or None, created_at))
+    return tasks
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def open_store(path: str, backend: Optional[str] = None, codec: Optional[str] = None):
+    """Open the store for ``path``; the backend defaults from the file suffix."""
+    if backend is None:
+        backend = "sqlite" if Path(path).suffix in SQLITE_SUFFIXES else "json"
+    if backend == "sqlite":
+        return SqliteTaskStore(path)
+    if backend == "json":
+        return TaskStore(path, codec)
+    raise ValueError(f"unknown backend: {backend}")
+
+
+def migrate_json(json_path: str, db_path: str) -> int:
+    """One-shot copy of a ``{"tasks": [...]}`` JSON file into a SQLite store."""
+    tasks = codecs.decode(Path(json_path).read_bytes(), empty={}).get("tasks", [])
+    store = SqliteTaskStore(db_path)
+    try:
+        if store._conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone():
+            raise ValueError(f"{db_path} already contains tasks; refusing to migrate into it")
+        return store.import_tasks(tasks)
+    finally:
+        store.close()
@@ -0,0 +1,37 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tasker.cli import main
+
+
+def test_list_formats(tmp_path, capsys):
+    data = str(tmp_path / "tasks.json")
+    main(["--data", data, "add", "Buy milk", "-d", "2 liters"])
+    main(["--data", data, "add", "Call Alice"])
+    capsys.readouterr()
+
+    main(["--data", data, "list"])
+    out = capsys.readouterr().out
+    assert out.startswith("[1] Buy milk\n    2 liters\n    created: ") and "[2] Call Alice\n    created: " in out
+
+    main(["--data", data, "--format", "ndjson", "list"])
+    assert [json.loads(line)["title"] for line in capsys.readouterr().out.splitlines()] == ["Buy milk", "Call Alice"]
+    main(["--data", data, "--format", "json", "search", "milk"])
+    assert [t["id"] for t in json.loads(capsys.readouterr().out)] == [1]
+    main(["--data", data, "--format", "json", "search", "nothing"])
+    assert json.loads(capsys.readouterr().out) == []
+
+
+def test_migrate_reports_a_bad_source(tmp_path, capsys):
+    src = tmp_path / "tasks.json"
+    src.write_text('{"tasks": [', encoding="utf-8")
+    with pytest.raises(SystemExit) as e:
+        main(["--data", str(tmp_path / "tasks.db"), "migrate", str(src)])
+    assert e.value.code == 1
+    err = capsys.readouterr().err
+    assert err.startswith("tasker: error: ") and err.count("\n") == 1
@@ -0,0 +1,57 @@
+import json
+import sys
+from pathlib import Path
+
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+from tasker.storage import SqliteTaskStore, TaskStore, migrate_json, open_store
+
+
+def test_sqlite_add_list_search(tmp_path: Path):
+    store = SqliteTaskStore(str(tmp_path / "tasks.db"))
+    t1 = store.add("Fix bug", "null pointer in parser")
+    t2 = store.add("Write docs", "usage examples")
+
+    assert [t.id for t in store.list()] == [t1.id, t2.id] == [1, 2]
+    assert [t.title for t in store.search("BUG")] == ["Fix bug"]
+    assert [t.title for t in store.search("usage")] == ["Write docs"]
+    # Short queries and LIKE wildcards still behave like substring search.
+    assert [t.title for t in store.search("ix")] == ["Fix bug"]
+    assert store.search("%") == []
+
+
+def test_sqlite_matches_json_store(tmp_path: Path):
+    js = TaskStore(str(tmp_path / "tasks.json"))
+    db = SqliteTaskStore(str(tmp_path / "tasks.db"))
+    for title, desc in [("Buy milk", "2 liters"), ("Call Alice", None), ("Milkshake", "vanilla")]:
+        js.add(title, desc)
+        db.add(title, desc)
+    for q in ["milk", "li", "alice", "nothing"]:
+        assert [t.title for t in js.search(q)] == [t.title for t in db.search(q)]
+
+
+def test_migrate_json_keeps_ids(tmp_path: Path):
+    src = tmp_path / "tasks.json"
+    js = TaskStore(str(src))
+    js.add("One")
+    js.add("Two", "second")
+
+    assert migrate_json(str(src), str(tmp_path / "tasks.db")) == 2
+    store = open_store(str(tmp_path / "tasks.db"))
+    assert isinstance(store, SqliteTaskStore)
+    assert [(t.id, t.title) for t in store.list()] == [(1, "One"), (2, "Two")]
+    assert store.add("Three").id == 3
+
+    with pytest.raises(ValueError):
+        migrate_json(str(src), str(tmp_path / "tasks.db"))
+
+
+def test_sqlite_bulk_add(tmp_path: Path):
+    store = SqliteTaskStore(str(tmp_path / "tasks.db"))
+    added = store.bulk_add([{"title": "A", "description": "x"}, {"title": "B"}])
+    assert [t.id for t in added] == [1, 2]
+    assert store.list() == added
+    store.close()
@@ -8,6 +8,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 import pytest
 
+from tasker import codec as codecs
 from tasker.storage import TaskStore
 
 
@@ -37,3 +38,91 @@ def test_search(tmp_path: Path):
     res2 = store.search("usage")
     assert len(res2) == 1
     assert res2[0].title == "Write docs"
+
+
+@pytest.mark.parametrize("codec", ["pretty", "compact", "binary"])
+def test_codecs_round_trip_and_keep_encoding(tmp_path: Path, codec):
+    data = tmp_path / "tasks.json"
+    store = TaskStore(str(data), codec=codec)
+    store.add("Buy milk", "2 liters")
+
+    # Reopening without a codec detects the file's encoding and keeps it.
+    reopened = TaskStore(str(data))
+    reopened.add("Café", None)
+    assert [t.title for t in reopened.list()] == ["Buy milk", "Café"]
+    assert codecs.detect(data.read_bytes()) == codec
+
+
+def test_list_tasks_are_slotted_and_share_descriptions(tmp_path: Path):
+    store = TaskStore(str(tmp_path / "tasks.json"))
+    store.add("One", "same text")
+    store.add("Two", "same text")
+    a, b = store.list()
+    assert not hasattr(a, "__dict__")
+    assert a.description is b.description
+
+
+def test_search_streams_large_files(tmp_path: Path):
+    data = tmp_path / "tasks.json"
+    store = TaskStore(str(data))
+    tasks = [{"id": i, "title": f"Task {i}", "description": "needle" if i % 100 == 0 else "hay",
+              "created_at": "2025-01-01T00:00:00+00:00"} for i in range(1, 2001)]
+    store._write(tasks)
+    res = store.search("NEEDLE")
+    assert [t.id for t in res] == list(range(100, 2001, 100))
+    assert res == [t for t in store.list() if t.description == "needle"]
+
+
+def test_add_uses_persisted_sequence(tmp_path: Path):
+    data = tmp_path / "tasks.json"
+    store = TaskStore(str(data))
+    store.add("One")
+    store.add("Two")
+    # Dropping the highest task must not make its id available again.
+    store._write([t for t in store._read() if t["id"] != 2])
+    assert store.add("Three").id == 3
+    assert (tmp_path / "tasks.json.seq").read_text().strip() == "3"
+
+
+def _add_many(path, n):
+    store = TaskStore(path)
+    for i in range(n):
+        store.add(f"T{i}")
+
+
+def test_concurrent_adders_lose_nothing(tmp_path: Path):
+    import multiprocessing
+    data = tmp_path / "tasks.json"
+    # No file yet: the adders also race to create it.
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_add_many, args=(str(data), 25)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    store = TaskStore(str(data))
+    assert sorted(t.id for t in store.list()) == list(range(1, 101))
+    assert json.loads(data.read_text())["version"] == 100
+
+
+def test_stale_write_is_rejected(tmp_path: Path):
+    from tasker.storage import VersionConflict
+    store = TaskStore(str(tmp_path / "tasks.json"))
+    store.add("One")
+    with pytest.raises(VersionConflict):
+        store._write([], expect=0)
+    assert [t.title for t in store.list()] == ["One"]
+
+
+def test_bulk_add_is_one_write_with_a_block_of_ids(tmp_path: Path):
+    data = tmp_path / "tasks.json"
+    store = TaskStore(str(data))
+    store.add("First")
+    added = store.bulk_add({"title": f"Row {i}", "description": "d" if i % 2 else ""} for i in range(1000))
+    assert [t.id for t in added] == list(range(2, 1002))
+    assert added[1].description == "d" and added[0].description is None
+    assert json.loads(data.read_text())["version"] == 2
+    assert len(store.list()) == 1001
+    with pytest.raises(ValueError):
+        store.bulk_add([{"title": "ok"}, {"description": "no title"}])
+    assert len(store.list()) == 1001